@@ -0,0 +1,28 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy.orm import joinedload
+from extension import db
+from models import User, UserRole
+
+
+def get_user_with_profile(user_id):
+    # โหลด User พร้อม student/graduate profile ใน query เดียว (LEFT OUTER JOIN)
+    return db.session.get(User, int(user_id), options=[
+        joinedload(User.student_profile),
+        joinedload(User.graduate_profile),
+    ])
+
+
+def get_profile(user):
+    if user.role == UserRole.student:
+        return user.student_profile
+    if user.role == UserRole.graduate:
+        return user.graduate_profile
+    return None
+
+
+def issue_access_token(user_id, role, has_profile):
+    # ฝัง role และสถานะ profile ไว้ใน JWT เพื่อให้ /user/check-account-type ตอบได้โดยไม่ต้อง query
+    return create_access_token(identity=str(user_id), additional_claims={
+        "role": role.value,
+        "has_profile": bool(has_profile),
+    })
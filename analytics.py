@@ -0,0 +1,204 @@
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import case, extract, func, literal_column, select
+
+from extension import db, cache, table_versions
+from models import GraduateProfile
+
+# สถิติผลลัพธ์การทำงานของ graduate คำนวณจาก GROUP BY แล้วเก็บเป็นตารางสรุป (จำนวนต่อกลุ่ม) ใน cache
+# endpoint ทุกตัวคำนวณจากตารางสรุปนี้ → ใช้เวลาตามจำนวนกลุ่ม ไม่ใช่จำนวน graduate
+# key ของ cache มี version ของ graduate_profiles (TableVersions) เหมือน cached_json → ทุก worker / CLI ที่เขียนตาราง
+# ทำให้สร้างตารางสรุปใหม่ตอนเรียกครั้งถัดไป และตารางสรุปตรงกับ ETag ของ endpoint เสมอ
+# (ANALYTICS_TTL แค่ไล่ตารางสรุปของ version เก่าออกจาก cache)
+
+OUTCOMES_KEY = 'analytics:outcomes'
+EMPLOYERS_KEY = 'analytics:employers'
+
+EMPLOYED = 'employed'
+INTERNSHIP_COMPLETED = 'completed'
+
+GROUP_FIELDS = ('faculty', 'major', 'cohort')
+
+
+def _cohort(column):
+    return extract('year', column)
+
+
+def _outcome_key(faculty, major, cohort, enrolled_month, career_status, internship_status, hired, employed_year,
+                 employed_month):
+    return (faculty, major, cohort, enrolled_month, career_status, internship_status, hired, employed_year,
+            employed_month)
+
+
+def load_outcomes():
+    # (faculty, major, cohort, เดือนที่เข้าเรียน, career_status, internship_status, ได้งานที่เดียวกับที่ฝึกงาน,
+    #  ปี/เดือนที่ได้งาน) → จำนวน graduate
+    # ใช้ literal_column แทน bind parameter เพราะ SQL Server ไม่ยอมให้ GROUP BY expression ที่มี parameter
+    hired = case(
+        (GraduateProfile.internship_company == GraduateProfile.career_company, literal_column('1')),
+        else_=literal_column('0'),
+    )
+    keys = (
+        GraduateProfile.faculty,
+        GraduateProfile.major,
+        _cohort(GraduateProfile.year_of_enrollment),
+        extract('month', GraduateProfile.year_of_enrollment),
+        GraduateProfile.career_status,
+        GraduateProfile.internship_status,
+        hired,
+        extract('year', GraduateProfile.date_of_employment),
+        extract('month', GraduateProfile.date_of_employment),
+    )
+    stmt = select(*keys, func.count()).group_by(*keys)
+    return {_outcome_key(*row[:-1]): row[-1] for row in db.session.execute(stmt)}
+
+
+def load_employers():
+    # (faculty, major, cohort, company, position) → จำนวน graduate ที่ทำงานอยู่
+    keys = (
+        GraduateProfile.faculty,
+        GraduateProfile.major,
+        _cohort(GraduateProfile.year_of_enrollment),
+        GraduateProfile.career_company,
+        GraduateProfile.career_position,
+    )
+    stmt = (
+        select(*keys, func.count())
+        .where(GraduateProfile.career_status == EMPLOYED)
+        .group_by(*keys)
+    )
+    return {tuple(row[:-1]): row[-1] for row in db.session.execute(stmt)}
+
+
+def outcomes():
+    return cache.get_or_set(_key(OUTCOMES_KEY), load_outcomes, _ttl())
+
+
+def employers():
+    return cache.get_or_set(_key(EMPLOYERS_KEY), load_employers, _ttl())
+
+
+def _key(name):
+    version, = table_versions.get(GraduateProfile.__tablename__)
+    return f"{name}:{version}"
+
+
+def _ttl():
+    return current_app.config.get('ANALYTICS_TTL')
+
+
+# ---------- คำนวณจากตารางสรุป ----------
+
+def _matches(faculty, major, cohort, filters):
+    return all(
+        expected is None or value == expected
+        for value, expected in zip((faculty, major, cohort), (filters.get(f) for f in GROUP_FIELDS))
+    )
+
+
+def _group_value(faculty, major, cohort, group_by):
+    if group_by is None:
+        return None
+    return {'faculty': faculty, 'major': major, 'cohort': cohort}[group_by]
+
+
+def _rate(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def employment_summary(group_by=None, filters=None):
+    # อัตราการได้งาน และ internship → ได้งานที่บริษัทเดิม ต่อกลุ่ม
+    filters = filters or {}
+    totals = defaultdict(lambda: [0, 0, 0, 0])  # graduates, employed, ฝึกงานครบ, ได้งานที่ที่ฝึกงาน
+    for (faculty, major, cohort, _, career_status, internship_status, hired, _, _), count in outcomes().items():
+        if not _matches(faculty, major, cohort, filters):
+            continue
+        row = totals[_group_value(faculty, major, cohort, group_by)]
+        row[0] += count
+        if career_status == EMPLOYED:
+            row[1] += count
+        if internship_status == INTERNSHIP_COMPLETED:
+            row[2] += count
+            if hired and career_status == EMPLOYED:
+                row[3] += count
+
+    return [
+        {
+            "group": group,
+            "graduates": graduates,
+            "employed": employed,
+            "employment_rate": _rate(employed, graduates),
+            "internship_completed": interned,
+            "hired_by_internship_company": hired,
+            "internship_conversion_rate": _rate(hired, interned),
+        }
+        for group, (graduates, employed, interned, hired) in sorted(totals.items(), key=_group_sort_key)
+    ]
+
+
+def top_employers(by='company', limit=10, group_by=None, filters=None):
+    # บริษัท / ตำแหน่งที่ graduate ทำงานมากที่สุด ต่อกลุ่ม
+    filters = filters or {}
+    index = 3 if by == 'company' else 4
+    counts = defaultdict(lambda: defaultdict(int))
+    for key, count in employers().items():
+        faculty, major, cohort = key[:3]
+        if key[index] is None or not _matches(faculty, major, cohort, filters):
+            continue
+        counts[_group_value(faculty, major, cohort, group_by)][key[index]] += count
+
+    return [
+        {
+            "group": group,
+            "top": [
+                {"name": name, "count": count}
+                for name, count in sorted(names.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            ],
+        }
+        for group, names in sorted(counts.items(), key=_group_sort_key)
+    ]
+
+
+def _percentile(histogram, total, fraction):
+    # histogram: [(เดือน, จำนวน)] ที่เรียงแล้ว
+    target = fraction * (total - 1)
+    seen = 0
+    for months, count in histogram:
+        seen += count
+        if seen > target:
+            return months
+    return histogram[-1][0]
+
+
+def time_to_employment(group_by=None, filters=None):
+    # จำนวนเดือนตั้งแต่เข้าเรียน (year_of_enrollment) จนได้งาน (date_of_employment)
+    filters = filters or {}
+    histograms = defaultdict(lambda: defaultdict(int))
+    for (faculty, major, cohort, enrolled_month, career_status, _, _, employed_year, employed_month), count \
+            in outcomes().items():
+        if cohort is None or employed_year is None or not _matches(faculty, major, cohort, filters):
+            continue
+        months = (employed_year * 12 + employed_month) - (cohort * 12 + enrolled_month)
+        if months < 0:
+            continue
+        histograms[_group_value(faculty, major, cohort, group_by)][months] += count
+
+    results = []
+    for group, histogram in sorted(histograms.items(), key=_group_sort_key):
+        buckets = sorted(histogram.items())
+        total = sum(count for _, count in buckets)
+        results.append({
+            "group": group,
+            "count": total,
+            "mean_months": round(sum(months * count for months, count in buckets) / total, 1),
+            "p25_months": _percentile(buckets, total, 0.25),
+            "median_months": _percentile(buckets, total, 0.5),
+            "p75_months": _percentile(buckets, total, 0.75),
+        })
+    return results
+
+
+def _group_sort_key(item):
+    # None (ไม่ได้กรอก) ไว้ท้ายสุด
+    return (item[0] is None, item[0] if item[0] is not None else 0)
@@ -1,46 +1,130 @@
+import os
+
+import click
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
-from extension import db, migrate
+from extension import db, async_db, cache, hasher, uploads, replica_router, search_index, table_versions, compressor, instrumentation, rate_limiter
 from config import Config
 from flask_cors import CORS
+from db_pool import configure_connections, dispose_after_fork, engine_options
+import metrics
+
+
+def create_app(config=Config):
+    # สร้าง app ใหม่จาก config (class หรือ dict) → test / CLI / benchmark สร้าง app ของตัวเองได้
+    # ไม่มีการต่อ DB หรือ Azure ตอนสร้าง: connection pool, blob client, hashing / upload pool และ search index
+    # ถูกสร้างเมื่อใช้งานครั้งแรกในแต่ละ process จึงใช้กับ gunicorn --preload (สร้าง app ใน master แล้ว fork) ได้
+    app = Flask(__name__)
+    if isinstance(config, dict):
+        app.config.from_object(Config)
+        app.config.from_mapping(config)
+    else:
+        app.config.from_object(config)
+
+    # Database (pool options ตาม driver ของ URI ที่ใช้จริง ถ้าไม่ได้กำหนด SQLALCHEMY_ENGINE_OPTIONS เอง)
+    if app.config.get('SQLALCHEMY_ENGINE_OPTIONS') is None:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], os.environ)
+    db.init_app(app)
+    with app.app_context():
+        configure_connections(db.engine, app.config.get('DB_LOCK_TIMEOUT_MS'))
+        dispose_after_fork(db.engines.values())
+
+    # Flask-Migrate (alembic) ใช้เฉพาะคำสั่ง `flask db ...` → import เฉพาะตอนรันผ่าน CLI ไม่ให้ worker เสียเวลา start
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Read replica สำหรับ route ที่อ่านอย่างเดียว (ถ้าตั้งค่าไว้)
+    replica_router.init_app(app)
+
+    # Metrics (/metrics) + latency / SQL / bcrypt / blob ต่อ request
+    metrics.init_app(app)
+    instrumentation.init_app(app)
+
+    # Cache
+    cache.init_app(app)
+
+    # HTTP caching: ETag จาก version ของตาราง (เปลี่ยนทุกครั้งที่ commit) และบีบอัด response ทั้ง app
+    table_versions.init_app(app)
+    compressor.init_app(app)
+
+    # Async DB session สำหรับ async view ที่รันผ่าน asgi.py (ไม่ต่อ DB จนกว่าจะถูกใช้ใน event loop)
+    async_db.init_app(app)
+
+    # Profile image uploads (Azure Blob หรือ filesystem)
+    uploads.init_app(app)
+
+    # Search index ของ /data/search
+    search_index.init_app(app)
+
+    # JWT Config
+    app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = 3600  # 1 hour
+    app.config["JWT_COOKIE_SECURE"] = True
+    app.config["JWT_COOKIE_SAMESITE"] = "None"
+
+    # Extensions
+    JWTManager(app)
+    Bcrypt(app)
+    hasher.init_app(app)
+
+    # Token revocation (logout): ตรวจ jti กับรายการใน memory ของ worker แทนการ query ทุก request
+    from revocation import revocation
+    revocation.init_app(app)
+
+    # Rate limit / concurrency cap ของ /auth/login และ /auth/signup (ตรวจก่อนแตะ DB หรือ bcrypt)
+    rate_limiter.init_app(app)
+
+    # CORS configuration
+    CORS(app, resources={
+        r"/*": {
+            "origins": "your_frontend_url", # ✅ ใส่ URL ของ frontend
+            "methods": ["GET", "POST", "PUT", "DELETE"],
+            "allow_headers": ["Content-Type", "Authorization"],
+            "supports_credentials": True
+        }
+    })
+
+    # Import Blueprints หลังจาก JWTManager ถูกสร้างแล้ว
+    from routes.auth_routes import auth_bp
+    from routes.user_routes import user_bp
+    from routes.data_routes import data_bp
+    from routes.analytics_routes import analytics_bp
+    from routes.history_routes import history_bp
+
+    # Blueprint registration
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(user_bp, url_prefix='/user')
+    app.register_blueprint(data_bp, url_prefix='/data')
+    app.register_blueprint(analytics_bp, url_prefix='/analytics')
+    app.register_blueprint(history_bp, url_prefix='/history')
+
+    # CLI commands
+    from bulk_import import import_profiles_command
+    from lookups import add_lookup_alias_command
+    from revocation import purge_revoked_tokens_command
+    from snapshot import export_snapshot_command
+
+    app.cli.add_command(import_profiles_command)
+    app.cli.add_command(add_lookup_alias_command)
+    app.cli.add_command(purge_revoked_tokens_command)
+    app.cli.add_command(export_snapshot_command)
+
+    return app
+
+
+def __getattr__(name):
+    # `gunicorn app:app` และ `flask --app app` ยังใช้ได้เหมือนเดิม แต่ app จะถูกสร้างเมื่อถูกอ้างถึงเท่านั้น
+    # (import create_app อย่างเดียวไม่สร้าง app)
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        if click.get_current_context(silent=True) is None and app.config.get('REVOCATION_ENABLED', True):
+            # worker ของ gunicorn: โหลดรายการ token ที่ถูก revoke ก่อนรับ request (ไม่ใช่คำสั่ง `flask ...`)
+            app.extensions['revocation'].preload(app)
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# Database
-db.init_app(app)
-migrate.init_app(app, db)
-
-# JWT Config
-app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = 3600  # 1 hour
-app.config["JWT_COOKIE_SECURE"] = True 
-app.config["JWT_COOKIE_SAMESITE"] = "None"
-
-# Extensions
-jwt = JWTManager(app)
-bcrypt = Bcrypt(app)
-
-# CORS configuration
-CORS(app, resources={
-    r"/*": {
-        "origins": "your_frontend_url", # ✅ ใส่ URL ของ frontend
-        "methods": ["GET", "POST", "PUT", "DELETE"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": True
-    }
-})
-
-# Import Blueprints หลังจาก JWTManager ถูกสร้างแล้ว
-from routes.auth_routes import auth_bp
-from routes.user_routes import user_bp
-from routes.data_routes import data_bp
-
-# Blueprint registration
-app.register_blueprint(auth_bp, url_prefix='/auth')
-app.register_blueprint(user_bp, url_prefix='/user')
-app.register_blueprint(data_bp, url_prefix='/data')
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
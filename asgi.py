@@ -0,0 +1,243 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask.signals import request_started
+from werkzeug.exceptions import HTTPException
+
+from app import create_app
+from config import Config
+from extension import async_db
+from revocation import revocation
+
+# ASGI entry point: uvicorn asgi:app  หรือ  gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+#
+# Flask รัน `async def` view ได้อยู่แล้ว แต่ภายใต้ WSGI แต่ละ request ยังครอง worker thread ไว้ทั้งหมด
+# (Flask สร้าง event loop ใหม่ต่อ request) จึงไม่ได้รับ request พร้อมกันได้มากขึ้น
+# ที่นี่รันบน event loop ของ uvicorn แทน:
+# - route ที่มี async view ใน routes/async_views.py → เรียกบน event loop โดยตรงใน request context ของ Flask
+#   (before_request / after_request / error handler / @cache_policy ทำงานเหมือนเดิม)
+# - route อื่น หรือ async view ที่ raise UseSyncView → เรียก Flask app แบบ WSGI ใน thread pool ขนาด ASGI_SYNC_THREADS
+#
+# body ของ request ถูกอ่านจนครบก่อน (เก็บใน memory, ใหญ่เกิน SPOOL_MAX_SIZE จะย้ายลงไฟล์ชั่วคราว)
+
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class AsgiApp:
+
+    def __init__(self, flask_app):
+        from routes.async_views import ASYNC_VIEWS, UseSyncView
+
+        self.flask_app = flask_app
+        self.async_views = {endpoint: view for endpoint, view in ASYNC_VIEWS.items()
+                            if endpoint in flask_app.view_functions}
+        self.use_sync_view = UseSyncView
+        self.executor = ThreadPoolExecutor(max_workers=flask_app.config.get('ASGI_SYNC_THREADS', 16),
+                                           thread_name_prefix='asgi-sync')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body, size = await self._read_body(receive)
+        try:
+            environ = self._environ(scope, body, size)
+            view, args = self._match(environ)
+            if view is not None:
+                try:
+                    response = await self._dispatch_async(view, args, environ)
+                except self.use_sync_view:
+                    body.seek(0)
+                else:
+                    await self._send_response(response, environ, send)
+                    return
+            await self._run_wsgi(environ, send)
+        finally:
+            body.close()
+
+    # ---------- request ----------
+
+    async def _read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            if chunk:
+                body.write(chunk)
+                size += len(chunk)
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body, size
+
+    def _environ(self, scope, body, size):
+        # PEP 3333 environ จาก ASGI scope (string ใน environ เป็น latin-1 ตาม spec)
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client')
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0] if client else '',
+            'CONTENT_LENGTH': str(size),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').lower()
+            value = value.decode('latin-1')
+            if name == 'content-length':
+                continue
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+                continue
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _match(self, environ):
+        # คืนค่า (async view, view args) หรือ (None, None) ถ้า route นี้ต้องใช้ view แบบ sync
+        # (404 / 405 / OPTIONS ให้ Flask จัดการตามปกติ)
+        if not self.async_views or environ['REQUEST_METHOD'] == 'OPTIONS':
+            return None, None
+        try:
+            endpoint, args = self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None, None
+        view = self.async_views.get(endpoint)
+        return (view, args) if view is not None else (None, None)
+
+    # ---------- async view ----------
+
+    async def _dispatch_async(self, view, args, environ):
+        # เหมือน Flask.full_dispatch_request แต่ await view บน event loop
+        # request context ผูกกับ task ของ request นี้ (contextvars) จึงไม่ปนกับ request อื่นที่รันพร้อมกัน
+        app = self.flask_app
+        ctx = app.request_context(environ)
+        error = None
+        ctx.push()
+        try:
+            try:
+                request_started.send(app, _async_wrapper=app.ensure_sync)
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await view(**args)
+            except self.use_sync_view:
+                raise
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.finalize_request(rv)
+        except self.use_sync_view:
+            raise
+        except Exception as e:
+            error = e
+            return app.handle_exception(e)
+        finally:
+            ctx.pop(error)
+
+    async def _send_response(self, response, environ, send):
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        try:
+            await send({'type': 'http.response.body', 'body': b''.join(app_iter)})
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    # ---------- sync (WSGI) ----------
+
+    async def _run_wsgi(self, environ, send):
+        # ทั้ง request (รวมการวน iterate body ของ response แบบ streaming) รันใน thread เดียว
+        # เพราะ stream_with_context / db.session ผูกกับ thread ที่เริ่ม request
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = []
+
+            def start_response(status, headers, exc_info=None):
+                if exc_info and started and started[0] is None:
+                    raise exc_info[1].with_traceback(exc_info[2])
+                started[:] = [{
+                    'type': 'http.response.start',
+                    'status': int(status.split(' ', 1)[0]),
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+                }]
+
+            def start():
+                # ส่ง status / header ตอนมี body ก้อนแรก (error ก่อนหน้านั้นยังเปลี่ยน status ได้)
+                if started[0] is not None:
+                    send_from_thread(started[0])
+                    started[0] = None
+
+            result = self.flask_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        start()
+                        send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                start()
+                send_from_thread({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        await loop.run_in_executor(self.executor, run)
+
+    # ---------- lifespan ----------
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # โหลดรายการ token ที่ถูก revoke ก่อนรับ request (ไม่งั้น request แรกที่ต้อง login จะ query บน event loop)
+                if self.flask_app.config.get('REVOCATION_ENABLED', True):
+                    await asyncio.to_thread(revocation.preload, self.flask_app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config=Config):
+    # uvicorn --factory asgi:create_asgi_app
+    return AsgiApp(create_app(config))
+
+
+def __getattr__(name):
+    # เหมือน app.py: สร้าง app เมื่อถูกอ้างถึง (uvicorn asgi:app)
+    if name == 'app':
+        globals()['app'] = create_asgi_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
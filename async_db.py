@@ -0,0 +1,87 @@
+import asyncio
+
+from sqlalchemy.orm import Session
+
+from db_pool import configure_connections
+from db_routing import track_writes
+
+# SQLAlchemy แบบ asyncio สำหรับ async view ที่รันผ่าน asgi.py (uvicorn)
+# ระหว่างรอ DB event loop รับ request อื่นต่อได้ แทนที่จะกัน thread ของ worker ไว้ทั้ง request
+#
+# - URL ได้จาก ASYNC_DATABASE_URI หรือแปลงจาก SQLALCHEMY_DATABASE_URI: mssql+pyodbc → mssql+aioodbc,
+#   sqlite → sqlite+aiosqlite (aioodbc ยังเรียก ODBC driver ใน thread pool ของมันเอง เพราะไม่มี driver
+#   SQL Server ที่เป็น async จริง แต่ thread เหล่านั้นไม่ได้จำกัดจำนวน request ที่รอพร้อมกันเหมือน worker thread)
+# - ใช้ primary เสมอ (read replica / @read_only ใช้กับ session แบบ sync เท่านั้น)
+# - engine ผูกกับ event loop → สร้างครั้งแรกที่ใช้ในแต่ละ loop (uvicorn worker ละหนึ่ง loop)
+
+ASYNC_DRIVERS = {
+    'mssql+pyodbc': 'mssql+aioodbc',
+    'mssql': 'mssql+aioodbc',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+# option ของ engine แบบ sync ที่ใช้กับ async engine ไม่ได้
+SYNC_ONLY_OPTIONS = {'poolclass', 'fast_executemany'}
+
+
+def async_url(uri):
+    scheme, rest = uri.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+class AsyncWriteSession(Session):
+    # sync session ที่อยู่ข้างใต้ AsyncSession → ให้ TableVersions ฟัง commit ได้เหมือน session ปกติ
+    pass
+
+
+track_writes(AsyncWriteSession)
+
+
+class AsyncDatabase:
+
+    def __init__(self, app=None):
+        self.url = None
+        self.engine_options = {}
+        self.lock_timeout_ms = None
+        self._engine = None
+        self._sessionmaker = None
+        self._loop = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.url = app.config.get('ASYNC_DATABASE_URI') or async_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        self.engine_options = {
+            key: value for key, value in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).items()
+            if key not in SYNC_ONLY_OPTIONS
+        }
+        self.lock_timeout_ms = app.config.get('DB_LOCK_TIMEOUT_MS')
+        versions = app.extensions.get('table_versions')
+        if versions is not None:
+            versions.watch(AsyncWriteSession)
+        app.extensions['async_db'] = self
+
+    @property
+    def engine(self):
+        loop = asyncio.get_running_loop()
+        if self._engine is None or self._loop is not loop:
+            # import ตอนใช้งาน: worker แบบ sync ไม่ต้องโหลด asyncio extension / greenlet
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+            self._engine = create_async_engine(self.url, **self.engine_options)
+            configure_connections(self._engine.sync_engine, self.lock_timeout_ms)
+            self._sessionmaker = async_sessionmaker(
+                self._engine, expire_on_commit=False, sync_session_class=AsyncWriteSession)
+            self._loop = loop
+        return self._engine
+
+    def session(self):
+        # async with async_db.session() as session: ...
+        self.engine
+        return self._sessionmaker()
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._loop = None
@@ -0,0 +1,96 @@
+# ตรวจจำนวน SQL statement และการออก token ใหม่ของ GET /user/check-account-type
+# - token ที่มี role และ profile ครบ → ตอบจาก claims (0 statement)
+# - token ที่ยังไม่ครบ (ยังไม่เลือก role / ยังไม่มี profile) → query 1 statement แต่ไม่ออก token ใหม่ถ้า claims ยังตรงกับ DB
+# - token ที่ claims เก่ากว่า DB → ได้ token ใหม่ครั้งเดียว แล้ว token นั้นตอบจาก claims
+# exit 1 ถ้าจำนวน statement หรือการออก token ไม่เป็นไปตามนี้
+#
+#   python benchmarks/account_queries.py --repeat 5
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5, help="requests per token")
+    args = parser.parse_args()
+
+    from app import create_app
+    from accounts import issue_access_token
+    from benchmarks.datagen import seed
+    from extension import db
+    from models import User, UserRole
+    from revocation import revocation
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_file.name}",
+        'CACHE_BACKEND': 'memory',
+        'STORAGE_BACKEND': 'filesystem',
+        'RATELIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+        ids = seed(db.session, 'x', students=1, graduates=1, unassigned=1, records=1)
+        # graduate ที่เลือก role แล้วแต่ยังไม่กรอก profile
+        user = User(email='noprofile@bench.example.com', password_hash='x', role=UserRole.graduate)
+        db.session.add(user)
+        db.session.commit()
+        tokens = {
+            'graduate, profile': issue_access_token(ids['graduate'][0], UserRole.graduate, True),
+            'student, profile': issue_access_token(ids['student'][0], UserRole.student, True),
+            'graduate, no profile': issue_access_token(user.id, UserRole.graduate, False),
+            'unassigned': issue_access_token(ids['unassigned'][0], UserRole.unassigned, False),
+            'stale claims': issue_access_token(ids['graduate'][0], UserRole.graduate, False),
+        }
+        # เหมือน worker ที่ preload รายการ token ที่ถูก revoke แล้ว
+        revocation.load()
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *_: statements.append(1))
+    client = app.test_client()
+
+    def check(token):
+        statements.clear()
+        response = client.get('/user/check-account-type', headers={'Authorization': f"Bearer {token}"})
+        if response.status_code != 200:
+            print(f"FAIL: GET /user/check-account-type -> {response.status_code} {response.get_data(as_text=True)}")
+            sys.exit(1)
+        return len(statements), response.get_json().get('token')
+
+    # (statement ต่อ request, จำนวน request ที่ได้ token ใหม่)
+    expected = {
+        'graduate, profile': (0, 0),
+        'student, profile': (0, 0),
+        'graduate, no profile': (1, 0),
+        'unassigned': (1, 0),
+        'stale claims': (1, args.repeat),
+        'reissued token': (0, 0),
+    }
+    failed = False
+    print(f"{'token':<24}{'requests':>10}{'statements':>12}{'new tokens':>12}")
+    for name, (want_statements, want_tokens) in expected.items():
+        results = [check(tokens[name]) for _ in range(args.repeat)]
+        counts = {statements_run for statements_run, _ in results}
+        issued = [token for _, token in results if token]
+        print(f"{name:<24}{args.repeat:>10}{'/'.join(map(str, sorted(counts))):>12}{len(issued):>12}")
+        if counts != {want_statements} or len(issued) != want_tokens:
+            print(f"FAIL: {name}: expected {want_statements} statement(s) and {want_tokens} new token(s)")
+            failed = True
+        if name == 'stale claims' and issued:
+            tokens['reissued token'] = issued[-1]
+
+    engine.dispose()
+    os.unlink(db_file.name)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+# เทียบ throughput เมื่อมี request พร้อมกันจำนวนมาก: WSGI (gunicorn gthread) กับ ASGI (asgi.py บน uvicorn worker)
+# ใช้ SQLite + blob store แบบ filesystem แทน Azure SQL / Azure Blob และหน่วงเวลาเพิ่มทุก query / upload
+# เพื่อจำลอง network latency (ส่วนที่ worker แบบ sync ต้องนั่งรอ)
+#
+#   python benchmarks/async_bench.py --db-latency-ms 20 --blob-latency-ms 80 --concurrency 64
+#   python benchmarks/async_bench.py --only graduate_page,graduate_form --workers 2 --threads 8
+#
+# - sync: workers × threads คือจำนวน request ที่รับพร้อมกันได้สูงสุด
+# - async: request ที่รอ DB / blob ไม่กัน worker, จำกัดด้วย connection pool (--async-pool) แทน
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.run import PNG, percentile  # noqa: E402
+
+
+# ---------- server (รันใน process ของ gunicorn) ----------
+
+class SlowStorage:
+    # หุ้ม storage backend เดิม หน่วงเวลาทุกครั้งที่อัปโหลด (sync: time.sleep, async: asyncio.sleep)
+
+    def __init__(self, backend, delay):
+        self.backend = backend
+        self.delay = delay
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def upload(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return self.backend.upload(*args, **kwargs)
+
+    async def upload_async(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await self.backend.upload_async(*args, **kwargs)
+
+
+def inject_latency(uploads):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.util import await_only
+
+    db_delay = float(os.environ.get('BENCH_DB_LATENCY_MS', '0')) / 1000
+    blob_delay = float(os.environ.get('BENCH_BLOB_LATENCY_MS', '0')) / 1000
+
+    if db_delay:
+        @event.listens_for(Engine, 'before_cursor_execute')
+        def delay_query(conn, cursor, statement, parameters, context, executemany):
+            # engine แบบ async: listener รันใน greenlet ของ SQLAlchemy → await ได้โดยไม่กัน event loop
+            if conn.dialect.is_async:
+                await_only(asyncio.sleep(db_delay))
+            else:
+                time.sleep(db_delay)
+
+    if blob_delay:
+        uploads.backend = SlowStorage(uploads.backend, blob_delay)
+
+
+def _create_app():
+    from app import create_app
+    from extension import uploads
+
+    # SQLite ล็อกทั้งไฟล์ตอนเขียน (SQL Server ล็อกระดับแถว) → ให้ form ที่เขียนพร้อมกันรอ lock ได้นานขึ้นแทนที่จะ error
+    pool = int(os.environ.get('BENCH_DB_POOL', '10'))
+    app = create_app({'SQLALCHEMY_ENGINE_OPTIONS': {
+        'pool_size': pool, 'max_overflow': 0, 'pool_timeout': 30, 'connect_args': {'timeout': 30},
+    }})
+    inject_latency(uploads)
+    return app
+
+
+def wsgi_app():
+    # gunicorn 'benchmarks.async_bench:wsgi_app()'
+    return _create_app()
+
+
+def asgi_app():
+    # gunicorn -k uvicorn.workers.UvicornWorker 'benchmarks.async_bench:asgi_app()'
+    from asgi import AsgiApp
+    return AsgiApp(_create_app())
+
+
+# ---------- load generator ----------
+
+def prepare(args):
+    from app import create_app
+    from accounts import issue_access_token
+    from benchmarks.datagen import seed
+    from extension import db, hasher
+    from models import UserRole
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        password_hash = hasher.generate_password_hash('benchmark-password')
+        ids = seed(db.session, password_hash, args.students, args.graduates, 0, 2, args.seed)
+        # user ที่ยังไม่มี profile: หนึ่งคนต่อ request ของ graduate_form ในแต่ละ stack
+        form_ids = seed(db.session, password_hash, 0, 0, args.requests * 2, 0, args.seed + 1)['unassigned']
+        faculty = db.session.execute(db.text("SELECT faculty FROM graduate_profiles LIMIT 1")).scalar()
+        with app.test_request_context():
+            reader = issue_access_token(ids['graduate'][0], UserRole.graduate, True)
+            form_tokens = [issue_access_token(user_id, UserRole.graduate, False) for user_id in form_ids]
+    hasher.shutdown()
+    return {'reader': reader, 'forms': {'sync': form_tokens[:args.requests], 'async': form_tokens[args.requests:]},
+            'faculty': faculty}
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content_type, data) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: {content_type}\r\n\r\n'.encode() + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def build_scenarios(data, stack):
+    from urllib.parse import quote
+
+    reader = {'Authorization': f"Bearer {data['reader']}"}
+    faculty = quote(data['faculty'])
+
+    def get(path, headers=None):
+        return lambda i: ('GET', path, None, headers or {})
+
+    def graduate_form(i):
+        body, content_type = multipart({
+            'full_name': f"Async bench {stack} {i}", 'studentId': f"AB{stack[0]}{i}",
+            'faculty': 'วิศวกรรมศาสตร์', 'major': 'วิศวกรรมคอมพิวเตอร์', 'yearOfEnrollment': '2019-06-01',
+            'careerStatus': 'employed', 'careerCompany': 'SCB', 'careerPosition': 'Software Engineer',
+        }, {'profileImage': ('avatar.png', 'image/png', PNG)})
+        return 'POST', '/data/graduate-form', body, {
+            'Authorization': f"Bearer {data['forms'][stack][i]}", 'Content-Type': content_type}
+
+    return {
+        'graduate_page': (get('/data/graduate-data?limit=50'), (200,)),
+        'graduates_by_faculty': (get(f'/data/graduates?faculty={faculty}'), (200,)),
+        'graduate_query': (get('/data/graduates/query?career_status=employed&limit=50'), (200,)),
+        'current_user': (get('/data/current-user', reader), (200,)),
+        'graduate_form': (graduate_form, (201,)),
+    }
+
+
+def run_scenario(port, request_for, ok, requests, concurrency):
+    latencies = []
+    errors = []
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            method, path, body, headers = request_for(i)
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = repr(e)
+            latencies.append(time.perf_counter() - start)
+            if status not in ok:
+                errors.append(status)
+        connection.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': len(errors),
+        'error_sample': [str(e) for e in errors[:3]],
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+    }
+
+
+def start_server(stack, args, port, env):
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+               '--log-level', 'warning', '--graceful-timeout', '5']
+    if stack == 'sync':
+        command += ['--worker-class', 'gthread', '--threads', str(args.threads), 'benchmarks.async_bench:wsgi_app()']
+        env = dict(env, BENCH_DB_POOL=str(args.threads))
+    else:
+        command += ['--worker-class', 'uvicorn.workers.UvicornWorker', 'benchmarks.async_bench:asgi_app()']
+        env = dict(env, BENCH_DB_POOL=str(args.async_pool), ASGI_SYNC_THREADS=str(args.threads))
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/data/faculties')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{stack} server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--graduates', type=int, default=5000)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=400, help="requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8, help="gthread threads (sync) / ASGI_SYNC_THREADS (async)")
+    parser.add_argument('--async-pool', type=int, default=64, help="DB connections per worker for the async stack")
+    parser.add_argument('--db-latency-ms', type=float, default=20)
+    parser.add_argument('--blob-latency-ms', type=float, default=80)
+    parser.add_argument('--only', help="comma separated scenario names")
+    parser.add_argument('--port', type=int, default=8931)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write results JSON here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='careertracker-async-')
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'STORAGE_BACKEND': 'filesystem',
+        'STORAGE_LOCAL_PATH': os.path.join(workdir, 'blobs'),
+        'HASH_EXECUTOR': 'inline',
+        'BCRYPT_LOG_ROUNDS': '4',
+        'CACHE_BACKEND': 'memory',
+        'BENCH_DB_LATENCY_MS': str(args.db_latency_ms),
+        'BENCH_BLOB_LATENCY_MS': str(args.blob_latency_ms),
+        'PYTHONPATH': ROOT + os.pathsep + env.get('PYTHONPATH', ''),
+    })
+    env.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-that-is-long-enough')
+    os.environ.update(env)
+
+    data = prepare(args)
+    only = set(args.only.split(',')) if args.only else None
+
+    results = {}
+    for stack in ('sync', 'async'):
+        server = start_server(stack, args, args.port, env)
+        try:
+            for name, (request_for, ok) in build_scenarios(data, stack).items():
+                if only and name not in only:
+                    continue
+                results.setdefault(name, {})[stack] = run_scenario(args.port, request_for, ok, args.requests,
+                                                                   args.concurrency)
+        finally:
+            # รูปย่อที่ยังค้างคิวอยู่ใน background ไม่ต้องรอ
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    print(f"db latency {args.db_latency_ms} ms, blob latency {args.blob_latency_ms} ms, "
+          f"concurrency {args.concurrency}, {args.workers} worker(s), sync threads {args.threads}")
+    print(f"{'scenario':<22}{'stack':<7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    for name, stacks in results.items():
+        for stack, result in stacks.items():
+            print(f"{name:<22}{stack:<7}{result['rps']:>9}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+                  f"{result['errors']:>8}  {' '.join(result['error_sample'])}".rstrip())
+        if stacks['sync']['rps']:
+            print(f"{'':<22}{'x':<7}{stacks['async']['rps'] / stacks['sync']['rps']:>9.2f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
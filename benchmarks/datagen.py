@@ -0,0 +1,186 @@
+# สร้างข้อมูลจำลอง (ชื่อ / บริษัท / ตำแหน่ง / โปรเจกต์ ภาษาไทยปนอังกฤษ) สำหรับ benchmark
+# ใช้ random.Random(seed) → ได้ข้อมูลชุดเดิมทุกครั้งเมื่อใช้ seed เดียวกัน
+#
+#   DATABASE_URL=sqlite:///bench.db python benchmarks/datagen.py --graduates 50000 --students 20000
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import insert, select, func
+
+from lookups import Resolver
+from models import User, UserRole, StudentProfile, GraduateProfile, AcademicRecord, CareerRecord
+
+PASSWORD = 'benchmark-password'
+INSERT_BATCH_SIZE = 1000
+
+FIRST_NAMES = ('สมชาย', 'สมหญิง', 'ณัฐวุฒิ', 'กิตติพงษ์', 'พิมพ์ชนก', 'ธนากร', 'ศิริพร', 'วรเมธ', 'ปิยะวัฒน์',
+               'อรอุมา', 'Somchai', 'Nattapong', 'Pimchanok', 'Thanakorn', 'Siriporn', 'Kittipong', 'Anan')
+LAST_NAMES = ('ใจดี', 'รักเรียน', 'ศรีสุข', 'วงศ์สวัสดิ์', 'แก้วมณี', 'ทองดี', 'Srisuk', 'Wongsawat',
+              'Kaewmanee', 'Thongdee', 'Chaiyaporn')
+FACULTIES = {
+    'วิศวกรรมศาสตร์': ('วิศวกรรมคอมพิวเตอร์', 'วิศวกรรมไฟฟ้า', 'วิศวกรรมโยธา'),
+    'วิทยาศาสตร์': ('วิทยาการคอมพิวเตอร์', 'สถิติ', 'เคมี'),
+    'บริหารธุรกิจ': ('การเงิน', 'การตลาด', 'ระบบสารสนเทศ'),
+    'Engineering': ('Computer Engineering', 'Electrical Engineering'),
+    'Science': ('Computer Science', 'Data Science'),
+}
+COMPANIES = ('SCB', 'KBTG', 'Agoda', 'LINE MAN Wongnai', 'ปตท.', 'ธนาคารกรุงเทพ', 'Google Thailand', 'AIS',
+             'True Digital Group', 'Central Tech', 'Shopee', 'Lazada', 'บริษัท ซีพี ออลล์', 'Bitkub', 'Accenture')
+POSITIONS = ('Software Engineer', 'Data Scientist', 'Data Analyst', 'Business Analyst', 'Product Manager',
+             'วิศวกรซอฟต์แวร์', 'นักวิเคราะห์ข้อมูล', 'DevOps Engineer', 'QA Engineer', 'UX Designer')
+TOPICS = ('ระบบแนะนำสินค้า', 'machine learning', 'แอปพลิเคชันมือถือ', 'IoT สำหรับฟาร์มอัจฉริยะ', 'chatbot ภาษาไทย',
+          'ระบบจองห้องเรียน', 'data pipeline', 'computer vision', 'blockchain', 'เว็บไซต์ร้านค้าออนไลน์')
+TASKS = ('พัฒนา REST API', 'ออกแบบฐานข้อมูล', 'เขียน unit test', 'วิเคราะห์ข้อมูลลูกค้า', 'ทำ dashboard ด้วย Power BI',
+         'ดูแลระบบ CI/CD', 'build data pipeline on Azure', 'review code กับทีม', 'สัมภาษณ์ผู้ใช้งาน')
+ACTIVITIES = ('ชมรมหุ่นยนต์', 'ค่ายอาสาพัฒนาชนบท', 'hackathon', 'สโมสรนักศึกษา', 'ชมรมดนตรีไทย', 'ทีมฟุตบอลคณะ')
+
+
+class Generator:
+
+    def __init__(self, seed=42):
+        self.random = random.Random(seed)
+
+    def pick(self, values):
+        return self.random.choice(values)
+
+    def sentence(self, values, words=3):
+        return ' '.join(self.random.sample(values, min(words, len(values))))
+
+    def day(self, start_year, end_year):
+        start = date(start_year, 1, 1)
+        return start + timedelta(days=self.random.randrange((date(end_year, 12, 31) - start).days))
+
+    def profile(self, user_id, email, graduate):
+        faculty = self.pick(tuple(FACULTIES))
+        enrolled = date(self.random.randint(2012, 2021), 6, 1)
+        values = dict(
+            user_id=user_id,
+            email=email,
+            full_name=f"{self.pick(FIRST_NAMES)} {self.pick(LAST_NAMES)}",
+            student_id=f"6{user_id:09d}",
+            gender=self.pick(('ชาย', 'หญิง', 'ไม่ระบุ')),
+            date_of_birth=self.day(1993, 2003),
+            phone_number=f"08{self.random.randrange(10 ** 8):08d}",
+            faculty=faculty,
+            major=self.pick(FACULTIES[faculty]),
+            year_of_enrollment=enrolled,
+            current_academic_year=str(self.random.randint(1, 4)),
+            extracurricular_activities=self.sentence(ACTIVITIES, 2),
+            academic_projects=f"โปรเจกต์: {self.sentence(TOPICS, 2)}",
+            profile_image=None,
+        )
+        if not graduate:
+            return values
+
+        interned = self.random.random() < 0.7
+        employed = self.random.random() < 0.8
+        internship_company = self.pick(COMPANIES) if interned else None
+        career_company = (internship_company if interned and self.random.random() < 0.4 else self.pick(COMPANIES)) \
+            if employed else None
+        values.update(
+            internship_status='completed' if interned else 'none',
+            internship_company=internship_company,
+            internship_position=self.pick(POSITIONS) if interned else None,
+            internship_duration=f"{self.random.choice((2, 3, 4, 6))} เดือน" if interned else None,
+            internship_task=self.sentence(TASKS, 2) if interned else None,
+            internship_experience=self.sentence(TASKS, 3) if interned else None,
+            career_status='employed' if employed else self.pick(('unemployed', 'studying')),
+            career_company=career_company,
+            career_position=self.pick(POSITIONS) if employed else None,
+            date_of_employment=enrolled + timedelta(days=self.random.randint(1400, 2200)) if employed else None,
+            career_task=self.sentence(TASKS, 3) if employed else None,
+            career_experience=self.sentence(TASKS, 2) if employed else None,
+        )
+        return values
+
+    def academic_record(self, user_id):
+        start = self.day(2012, 2020)
+        return dict(user_id=user_id, degree=self.pick(('ปริญญาตรี', 'ปริญญาโท', 'B.Eng.', 'B.Sc.')),
+                    institution=self.pick(('มหาวิทยาลัยเกษตรศาสตร์', 'จุฬาลงกรณ์มหาวิทยาลัย', 'KMUTT', 'Mahidol')),
+                    major=self.pick(FACULTIES[self.pick(tuple(FACULTIES))]),
+                    gpa=round(self.random.uniform(2.0, 4.0), 2), start_date=start,
+                    end_date=start + timedelta(days=365 * 4))
+
+    def career_record(self, user_id):
+        start = self.day(2016, 2024)
+        return dict(user_id=user_id, company=self.pick(COMPANIES), position=self.pick(POSITIONS),
+                    start_date=start, end_date=start + timedelta(days=self.random.randint(180, 1500))
+                    if self.random.random() < 0.5 else None)
+
+
+def _insert(session, model, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        session.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+
+
+def _user_ids(session, emails):
+    ids = {}
+    for start in range(0, len(emails), INSERT_BATCH_SIZE):
+        chunk = emails[start:start + INSERT_BATCH_SIZE]
+        ids.update(session.execute(select(User.email, User.id).where(User.email.in_(chunk))).all())
+    return [ids[email] for email in emails]
+
+
+def seed(session, password_hash, students=1000, graduates=1000, unassigned=0, records=2, seed=42):
+    # เพิ่ม user + profile + academic / career record (ไม่กำหนด id เอง → ใช้ได้กับ IDENTITY ของ SQL Server)
+    # คืนค่า dict ของ user id แยกตามประเภท (ใช้สร้าง token / login ใน benchmark)
+    generator = Generator(seed)
+    run = f"{seed}-{session.scalar(select(func.count()).select_from(User))}"
+
+    ids = {}
+    for kind, count in (('graduate', graduates), ('student', students), ('unassigned', unassigned)):
+        emails = [f"{kind}{n}.{run}@bench.example.com" for n in range(count)]
+        _insert(session, User, [dict(email=email, password_hash=password_hash, role=UserRole[kind])
+                                for email in emails])
+        ids[kind] = _user_ids(session, emails)
+        if kind == 'unassigned':
+            continue
+
+        model = GraduateProfile if kind == 'graduate' else StudentProfile
+        profiles = [generator.profile(user_id, email, kind == 'graduate') for user_id, email in zip(ids[kind], emails)]
+        if kind == 'graduate':
+            # ใส่ id ของ lookup table เหมือน add_graduate / bulk import
+            resolver = Resolver(session)
+            for values in profiles:
+                resolver.canonicalize(values)
+        _insert(session, model, profiles)
+        _insert(session, AcademicRecord, [generator.academic_record(user_id)
+                                          for user_id in ids[kind] for _ in range(records)])
+        if kind == 'graduate':
+            _insert(session, CareerRecord, [generator.career_record(user_id)
+                                            for user_id in ids[kind] for _ in range(records)])
+
+    session.commit()
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--graduates', type=int, default=1000)
+    parser.add_argument('--unassigned', type=int, default=0)
+    parser.add_argument('--records', type=int, default=2, help="academic / career records per user")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import create_app
+    from extension import db, hasher
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        ids = seed(db.session, hasher.generate_password_hash(PASSWORD), args.students, args.graduates,
+                   args.unassigned, args.records, args.seed)
+        print(f"seeded {sum(len(v) for v in ids.values())} users in {time.perf_counter() - start:.1f}s"
+              f" (password: {PASSWORD})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# ตรวจว่า endpoint ของ /history ใช้จำนวน SQL statement คงที่ไม่ว่าจะมี graduate / record กี่รายการ (ไม่มี N+1)
+# นับ statement ที่ส่งถึง DB ต่อ request ด้วย event ของ Engine แล้วเทียบระหว่างขนาดหน้า / ขนาด timeline ต่าง ๆ
+# exit 1 ถ้าจำนวน statement เพิ่มตามจำนวนแถว
+#
+#   python benchmarks/history_queries.py --graduates 200 --records 5
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--graduates', type=int, default=200)
+    parser.add_argument('--records', type=int, default=5, help="academic / career records per graduate")
+    args = parser.parse_args()
+
+    from app import create_app
+    from accounts import issue_access_token
+    from benchmarks.datagen import seed
+    from extension import db
+    from models import UserRole
+    from revocation import revocation
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_file.name}",
+        'CACHE_BACKEND': 'memory',
+        'STORAGE_BACKEND': 'filesystem',
+        'RATELIMIT_ENABLED': False,
+        'TABLE_VERSION_TTL': 0,  # อ่าน version ทุก request → จำนวน statement ไม่ขึ้นกับลำดับ request
+    })
+    with app.app_context():
+        db.create_all()
+        ids = seed(db.session, 'x', students=0, graduates=args.graduates, records=args.records)
+        token = issue_access_token(ids['graduate'][0], UserRole.graduate, True)
+        # เหมือน worker ที่ preload รายการ token ที่ถูก revoke แล้ว (ไม่นับ query โหลดครั้งแรกเข้ากับ request)
+        revocation.load()
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *_: statements.append(1))
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {token}"}
+
+    def count(method, url, **kwargs):
+        statements.clear()
+        response = getattr(client, method)(url, headers=headers, **kwargs)
+        if response.status_code != 200:
+            print(f"FAIL: {method.upper()} {url} -> {response.status_code} {response.get_data(as_text=True)}")
+            sys.exit(1)
+        return len(statements)
+
+    def timeline(size):
+        return {
+            'academic_records': [{'degree': f"degree {n}", 'start_date': f"20{10 + n % 10}-06-01"} for n in range(size)],
+            'career_records': [{'company': f"company {n}", 'position': 'Engineer'} for n in range(size)],
+        }
+
+    checks = {
+        'GET /history/graduates': [
+            (limit, count('get', f"/history/graduates?limit={limit}"))
+            for limit in (1, 10, min(100, args.graduates))
+        ],
+        'GET /history/me': [],
+        'PUT /history/me': [],
+    }
+    for size in (1, 10, 50):
+        checks['PUT /history/me'].append((size, count('put', '/history/me', json=timeline(size))))
+        checks['GET /history/me'].append((size, count('get', '/history/me')))
+
+    failed = False
+    print(f"{'request':<26}{'rows':>8}{'statements':>12}")
+    for name, results in checks.items():
+        for rows, statements_run in results:
+            print(f"{name:<26}{rows:>8}{statements_run:>12}")
+        if len({statements_run for _, statements_run in results}) > 1:
+            print(f"FAIL: {name} runs more statements as rows grow (N+1)")
+            failed = True
+
+    engine.dispose()
+    os.unlink(db_file.name)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Load benchmark: latency ของ endpoint อื่น (/data/faculties) ระหว่างที่มี login storm
+# เทียบ bcrypt แบบ inline กับ hashing pool
+#
+#   python benchmarks/login_storm.py --executor inline
+#   python benchmarks/login_storm.py --executor process
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault(
+    'AZURE_STORAGE_CONNECTION_STRING',
+    'DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;'
+    'AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;'
+    'BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;'
+)
+
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from extension import db, cache, hasher
+from models import User, UserRole
+from routes.auth_routes import auth_bp
+from routes.data_routes import data_bp
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--executor', default='process', choices=('inline', 'thread', 'process'))
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--probe-threads', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_file.name}",
+        JWT_SECRET_KEY='benchmark-secret-key-benchmark-secret-key',
+        BCRYPT_LOG_ROUNDS=args.rounds,
+        HASH_EXECUTOR=args.executor,
+        CACHE_DEFAULT_TTL=0,
+    )
+    db.init_app(app)
+    cache.init_app(app)
+    hasher.init_app(app)
+    JWTManager(app)
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(data_bp, url_prefix='/data')
+
+    with app.app_context():
+        db.create_all()
+        password_hash = hasher.generate_password_hash('password123')
+        db.session.add_all([User(email=f"user{i}@example.com", password_hash=password_hash, role=UserRole.graduate)
+                            for i in range(args.login_threads)])
+        db.session.commit()
+
+    stop = threading.Event()
+    login_status = {}
+    probe_latencies = []
+    lock = threading.Lock()
+
+    def login_worker(i):
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/auth/login', json={'email': f"user{i}@example.com", 'password': 'password123'})
+            with lock:
+                login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+
+    def probe_worker():
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/data/faculties')
+            elapsed = time.perf_counter() - start
+            with lock:
+                probe_latencies.append(elapsed)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login_worker, args=(i,)) for i in range(args.login_threads)]
+    threads += [threading.Thread(target=probe_worker) for _ in range(args.probe_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    hasher.shutdown()
+    os.unlink(db_file.name)
+
+    print(f"executor={args.executor} rounds={args.rounds} login_threads={args.login_threads}")
+    print(f"logins: {sum(login_status.values()) / args.duration:.1f}/s  status={dict(sorted(login_status.items()))}")
+    print(f"/data/faculties: n={len(probe_latencies)}"
+          f"  p50={statistics.median(probe_latencies) * 1000:.1f}ms"
+          f"  p99={percentile(probe_latencies, 99) * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Load test ของ connection pool: ยิง request พร้อมกันหลาย thread แล้วตรวจว่าไม่มี connection ค้าง
+# ใช้ SQLite (ไฟล์) กับ InstrumentedQueuePool ขนาดเล็กเพื่อให้เกิดการรอ connection จริง
+#
+#   python benchmarks/pool_leak.py --threads 32 --requests 200
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from extension import db, cache, uploads
+from models import User, UserRole, GraduateProfile, StudentProfile
+from db_pool import InstrumentedQueuePool, POOL_CHECKOUT_WAIT, POOL_TIMEOUTS, _pool_stats
+import metrics
+from routes.data_routes import data_bp
+
+URLS = (
+    '/data/graduate-data?limit=20',
+    '/data/student-data?limit=20',
+    '/data/graduates?faculty=Engineering',
+    '/data/faculties',
+    '/data/companies',
+    '/data/graduate-data?format=ndjson',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200, help="requests per thread")
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--max-overflow', type=int, default=2)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_file.name}",
+        SQLALCHEMY_ENGINE_OPTIONS={
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": args.pool_size,
+            "max_overflow": args.max_overflow,
+            "pool_timeout": 30,
+            "pool_pre_ping": True,
+            "connect_args": {"check_same_thread": False, "timeout": 30},
+        },
+        CACHE_DEFAULT_TTL=1,
+        STORAGE_BACKEND='filesystem',
+    )
+    db.init_app(app)
+    cache.init_app(app)
+    uploads.init_app(app)
+    metrics.init_app(app)
+    app.register_blueprint(data_bp, url_prefix='/data')
+
+    with app.app_context():
+        db.create_all()
+        for i in range(1, 201):
+            db.session.add(User(id=i, email=f"user{i}@example.com", password_hash="x",
+                                role=UserRole.graduate if i % 2 else UserRole.student))
+        db.session.flush()
+        for i in range(1, 201):
+            model = GraduateProfile if i % 2 else StudentProfile
+            db.session.add(model(user_id=i, full_name=f"User {i}", student_id=str(i), email=f"user{i}@example.com",
+                                 faculty="Engineering" if i % 3 else "Science"))
+        db.session.commit()
+        engine = db.engine
+
+    errors = []
+
+    def worker(n):
+        client = app.test_client()
+        for i in range(args.requests):
+            response = client.get(URLS[(n + i) % len(URLS)])
+            response.get_data()
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    checked_out, size, overflow, capacity = _pool_stats()
+    wait = POOL_CHECKOUT_WAIT._values.get((), [[], 0, 0.0])
+    total = args.threads * args.requests
+    print(f"requests={total} in {elapsed:.1f}s ({total / elapsed:.0f} req/s) errors={len(errors)}")
+    print(f"pool checkouts={wait[1]} mean_wait={wait[2] / max(wait[1], 1) * 1000:.2f}ms"
+          f" timeouts={sum(POOL_TIMEOUTS._values.values())}")
+    print(f"after load: checked_out={checked_out} overflow={overflow} pool_size={size}")
+
+    engine.dispose()
+    os.unlink(db_file.name)
+
+    if checked_out or errors:
+        print("FAIL: connections leaked or requests failed")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# ตรวจ query plan ของ lookup endpoints บน SQLite ที่ seed ข้อมูลไว้
+# จบด้วย exit code 1 ถ้า query ไหนกลับไปเป็น full table scan ของ graduate_profiles
+#
+#   python benchmarks/query_plans.py
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault(
+    'AZURE_STORAGE_CONNECTION_STRING',
+    'DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;'
+    'AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;'
+    'BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;'
+)
+
+from flask import Flask
+from sqlalchemy import event
+from extension import db, cache, table_versions
+from lookups import Resolver
+from models import User, UserRole, GraduateProfile
+from routes.data_routes import data_bp
+
+ENDPOINTS = (
+    '/data/graduates?faculty=Engineering',
+    '/data/graduates-by-company?company=SCB',
+    '/data/graduates-by-career?career=Data%20Scientist',
+    '/data/faculties',
+    '/data/companies',
+    '/data/careers',
+    '/data/graduates/query?faculty=Engineering&company=SCB&limit=50',
+    '/data/graduates/query?company=SCB&company=KBTG&position=Data%20Scientist&limit=50',
+    '/data/graduates/query?major=CS&sort=full_name&limit=50',
+    '/data/graduates/query?employed_from=2024-01-01&employed_to=2024-03-31&sort=-date_of_employment&limit=50',
+)
+
+FACULTIES = ('Engineering', 'Science', 'Business', 'Arts', 'Medicine')
+COMPANIES = ('SCB', 'Agoda', 'LINE MAN Wongnai', 'PTT', 'KBTG', 'Google Thailand')
+MAJORS = ('CS', 'EE', 'Finance', 'Design')
+POSITIONS = ('Software Engineer', 'Data Scientist', 'Business Analyst', 'Product Manager')
+
+
+def seed(rows):
+    db.session.add_all([User(id=i, email=f"user{i}@example.com", password_hash="x", role=UserRole.graduate)
+                        for i in range(1, rows + 1)])
+    db.session.flush()
+    # ใส่ id ของ lookup table (faculty_id, career_company_id, ...) เหมือน add_graduate → endpoint ใช้ index (fk, id) จริง
+    resolver = Resolver(db.session)
+    db.session.add_all([GraduateProfile(**resolver.canonicalize(dict(
+        user_id=i,
+        full_name=f"Graduate {i}",
+        student_id=f"6{i:08d}",
+        email=f"user{i}@example.com",
+        faculty=FACULTIES[i % len(FACULTIES)],
+        major=MAJORS[i % len(MAJORS)],
+        career_status="employed",
+        career_company=COMPANIES[i % len(COMPANIES)],
+        career_position=POSITIONS[i % len(POSITIONS)],
+        date_of_employment=date(2024, 1 + i % 12, 1),
+    ))) for i in range(1, rows + 1)])
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+
+
+def main():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    cache.init_app(app)
+    table_versions.init_app(app)
+    app.register_blueprint(data_bp, url_prefix='/data')
+
+    failures = []
+    with app.app_context():
+        db.create_all()
+        seed(2000)
+
+        statements = []
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith('EXPLAIN'):
+                statements.append((statement, parameters))
+
+        client = app.test_client()
+        for url in ENDPOINTS:
+            statements.clear()
+            cache.clear()
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+
+            for statement, parameters in list(statements):
+                plan = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+                details = [row[-1] for row in plan]
+                full_scan = any(d.startswith('SCAN graduate_profiles') and 'INDEX' not in d for d in details)
+                print(f"{'FULL SCAN' if full_scan else 'ok':<9} {url}")
+                for detail in details:
+                    print(f"          {detail}")
+                if full_scan:
+                    failures.append(url)
+
+    if failures:
+        print(f"\n{len(failures)} endpoint(s) fell back to a full scan of graduate_profiles")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
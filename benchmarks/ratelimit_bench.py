@@ -0,0 +1,84 @@
+# ต้นทุนของการตรวจ rate limit ต่อ request และความถูกต้องเมื่อหลาย worker ใช้ bucket เดียวกัน
+# (fork หลาย process × หลาย thread เหมือน gunicorn gthread แล้วนับจำนวนที่ผ่านของ key เดียวกัน)
+#
+#   python benchmarks/ratelimit_bench.py --processes 4 --threads 4
+#   python benchmarks/ratelimit_bench.py --redis-url redis://localhost:6379/15
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ratelimit import MemoryBuckets, RedisBuckets, Rule, SharedMemoryBuckets  # noqa: E402
+
+
+def worker(buckets, rule, key, operations, threads, results):
+    allowed = [0] * threads
+
+    def run(index):
+        for i in range(operations):
+            if buckets.take(key, rule) == 0:
+                allowed[index] += 1
+            # key อื่น ๆ ปน (เหมือน IP / email ของ client หลายคน)
+            buckets.take(f"other:{os.getpid()}:{index}:{i}", rule)
+
+    pool = [threading.Thread(target=run, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    os.write(results, f"{sum(allowed)}\n".encode())
+
+
+def measure(name, buckets, args, shared=True):
+    rule = Rule.parse(args.rule)
+    key = f"bench:{time.time_ns()}"
+    processes = args.processes if shared else 1
+    read, write = os.pipe()
+
+    start = time.perf_counter()
+    pids = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            worker(buckets, rule, key, args.operations, args.threads, write)
+            os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    elapsed = time.perf_counter() - start
+    os.close(write)
+    with os.fdopen(read) as f:
+        allowed = sum(int(line) for line in f)
+
+    total = processes * args.threads * args.operations * 2
+    print(f"{name:<10}{processes:>10}{total / elapsed:>14.0f}{elapsed / total * 1e6:>10.1f}{allowed:>10}{rule.count:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=2000, help="checks per thread")
+    parser.add_argument('--rule', default='100/hour')
+    parser.add_argument('--redis-url', help="also measure the Redis backend")
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'processes':>10}{'checks/s':>14}{'us/check':>10}{'allowed':>10}{'limit':>10}")
+    # memory: แต่ละ process มี bucket ของตัวเอง → วัดใน process เดียว
+    measure('memory', MemoryBuckets(), args, shared=False)
+
+    with tempfile.TemporaryDirectory() as directory:
+        measure('shared', SharedMemoryBuckets(os.path.join(directory, 'buckets')), args)
+
+    if args.redis_url:
+        import redis
+        measure('redis', RedisBuckets(redis.Redis.from_url(args.redis_url), 'bench:ratelimit:'), args)
+
+
+if __name__ == '__main__':
+    main()
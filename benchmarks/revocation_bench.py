@@ -0,0 +1,124 @@
+# ต้นทุนของการตรวจ token ที่ถูก revoke (token_in_blocklist_loader) ต่อ request
+# - is_revoked() ตรง ๆ เมื่อมี jti ที่ถูก revoke 0 / 10k / 100k รายการ และเวลาโหลดรายการทั้งหมดจาก DB
+# - latency ของ GET /user/check-account-type (ตอบจาก claims ไม่ query) เมื่อเปิด / ปิด REVOCATION_ENABLED
+# - token ที่ logout แล้วต้องได้ 401 (exit 1 ถ้าไม่ใช่)
+#
+#   python benchmarks/revocation_bench.py --sizes 0 10000 100000 --requests 2000
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def per_call_us(func, arg, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(arg)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 10000, 100000])
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    from sqlalchemy import insert
+    from app import create_app
+    from accounts import issue_access_token
+    from extension import db
+    from models import RevokedToken, User, UserRole
+    from revocation import revocation
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    config = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_file.name}",
+        'CACHE_BACKEND': 'memory',
+        'STORAGE_BACKEND': 'filesystem',
+        'RATELIMIT_ENABLED': False,
+        'REVOCATION_SYNC_SECONDS': 3600,  # ไม่ให้ background sync ปนกับตัวเลข
+    }
+    disabled_app = create_app(dict(config, REVOCATION_ENABLED=False))
+    app = create_app(dict(config, REVOCATION_ENABLED=True))
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@example.com', password_hash='x', role=UserRole.graduate)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        token = issue_access_token(user_id, UserRole.graduate, True)
+        revoked_token = issue_access_token(user_id, UserRole.graduate, True)
+
+    # ---------- is_revoked() ----------
+    print(f"{'revoked jtis':>12}{'load ms':>10}{'hit µs':>10}{'miss µs':>10}")
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    inserted = 0
+    with app.test_request_context():
+        for size in sorted(args.sizes):
+            rows = [{'jti': str(uuid.uuid4()), 'expires_at': expires_at} for _ in range(size - inserted)]
+            if rows:
+                db.session.execute(insert(RevokedToken), rows)
+                db.session.commit()
+            inserted = max(inserted, size)
+
+            revocation.clear()
+            start = time.perf_counter()
+            revocation.sync()
+            load_ms = (time.perf_counter() - start) * 1000
+            hit = next(iter(revocation._revoked), 'missing')
+            print(f"{len(revocation):>12}{load_ms:>10.1f}"
+                  f"{per_call_us(revocation.is_revoked, hit, args.calls):>10.3f}"
+                  f"{per_call_us(revocation.is_revoked, str(uuid.uuid4()), args.calls):>10.3f}")
+
+    # ---------- ต่อ request ----------
+    headers = {'Authorization': f"Bearer {token}"}
+
+    def request_us(flask_app):
+        client = flask_app.test_client()
+        for _ in range(100):
+            client.get('/user/check-account-type', headers=headers)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            response = client.get('/user/check-account-type', headers=headers)
+        elapsed = (time.perf_counter() - start) / args.requests * 1e6
+        if response.status_code != 200:
+            print(f"FAIL: /user/check-account-type -> {response.status_code}")
+            sys.exit(1)
+        return elapsed
+
+    off = request_us(disabled_app)
+    on = request_us(app)
+    print(f"\nGET /user/check-account-type with {len(revocation)} revoked jtis ({args.requests} requests)")
+    print(f"  revocation off: {off:8.1f} µs/request")
+    print(f"  revocation on:  {on:8.1f} µs/request  ({on - off:+.1f} µs)")
+
+    # ---------- logout ----------
+    client = app.test_client()
+    revoked_headers = {'Authorization': f"Bearer {revoked_token}"}
+    results = [
+        client.get('/user/check-account-type', headers=revoked_headers).status_code,
+        client.post('/auth/logout', headers=revoked_headers).status_code,
+        client.get('/user/check-account-type', headers=revoked_headers).status_code,
+    ]
+    # worker อื่น: โหลดรายการใหม่จาก DB
+    revocation.clear()
+    with app.app_context():
+        results.append(client.get('/user/check-account-type', headers=revoked_headers).status_code)
+    print(f"\nlogout: before {results[0]}, logout {results[1]}, after {results[2]}, other worker {results[3]}")
+
+    with app.app_context():
+        db.engine.dispose()
+    os.unlink(db_file.name)
+    if results != [200, 200, 401, 401]:
+        print("FAIL: revoked token is still accepted")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+# Benchmark suite: สร้าง app จาก app.py บน SQLite (หรือ DATABASE_URL ที่ตั้งไว้) + blob store แบบ filesystem
+# seed ข้อมูลจำลอง แล้วยิงทุก route พร้อมกันหลาย thread ผ่าน test client (ในหนึ่ง process ไม่ผ่าน network)
+# รายงาน throughput, p50 / p95 / p99 และ memory (RSS) ต่อ scenario และเทียบกับ baseline ที่บันทึกไว้
+#
+#   python benchmarks/run.py --graduates 20000 --students 5000 --save-baseline main
+#   python benchmarks/run.py --graduates 20000 --students 5000 --compare main      # exit 1 ถ้า p95 แย่ลงเกิน threshold
+#   python benchmarks/run.py --only login,graduate_page --requests 500
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+sys.path.insert(0, ROOT)
+
+# 1x1 PNG สำหรับ form ที่แนบรูป
+PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de0000000c4944415408d763f8ffff3f0005fe02fea7d6'
+    'a4f00000000049454e44ae426082'
+)
+
+
+def configure_environment(args, workdir):
+    # ต้องตั้งก่อน import app (Config อ่าน environment ตอน import)
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['STORAGE_BACKEND'] = 'filesystem'
+    os.environ['STORAGE_LOCAL_PATH'] = os.path.join(workdir, 'blobs')
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.bcrypt_rounds)
+    os.environ['HASH_EXECUTOR'] = args.hash_executor
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-that-is-long-enough')
+    os.environ.setdefault('CACHE_BACKEND', 'memory')
+    # ทุก request มาจาก IP เดียวกันและใช้ email ซ้ำ → ปิด rate limit ไม่งั้นวัดได้แต่ 429
+    os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def rss_mb():
+    # RSS ปัจจุบันจาก /proc (Linux) ถ้าไม่มีใช้ peak RSS แทน
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class Scenario:
+
+    def __init__(self, name, make_request, ok=(200,)):
+        self.name = name
+        self.make_request = make_request   # (client, i) → response
+        self.ok = ok
+
+
+def build_scenarios(app, ids, form_users):
+    run = time.time_ns() % 10 ** 9
+    from accounts import issue_access_token
+    from benchmarks.datagen import PASSWORD
+    from models import UserRole
+
+    with app.app_context():
+        graduate_token = issue_access_token(ids['graduate'][0], UserRole.graduate, True)
+        student_token = issue_access_token(ids['student'][0], UserRole.student, True)
+        form_tokens = {kind: [issue_access_token(user_id, UserRole[kind], False) for user_id in users]
+                       for kind, users in form_users.items()}
+
+    def auth(token):
+        return {'Authorization': f"Bearer {token}"}
+
+    def login(client, i):
+        user_id = ids['graduate'][i % len(ids['graduate'])]
+        email = client.application.config['_bench_emails'][user_id]
+        return client.post('/auth/login', json={"email": email, "password": PASSWORD})
+
+    def signup(client, i):
+        return client.post('/auth/signup', json={"email": f"signup{i}.{time.time_ns()}@bench.example.com",
+                                                 "password": PASSWORD})
+
+    def form(kind):
+        def submit(client, i):
+            token = form_tokens[kind][i % len(form_tokens[kind])]
+            data = {
+                'full_name': f"Form {kind} {i}", 'studentId': f"F{kind[0]}{i}-{run}",
+                'faculty': 'วิศวกรรมศาสตร์', 'major': 'วิศวกรรมคอมพิวเตอร์', 'yearOfEnrollment': '2019-06-01',
+                'internshipStatus': 'completed', 'internshipCompany': 'SCB', 'careerStatus': 'employed',
+                'careerCompany': 'SCB', 'careerPosition': 'Software Engineer', 'dateOfEmployment': '2023-07-01',
+                'profileImage': (io.BytesIO(PNG), 'avatar.png', 'image/png'),
+            }
+            return client.post(f"/data/{kind}-form", data=data, headers=auth(token),
+                               content_type='multipart/form-data')
+        return submit
+
+    def get(url, token=None):
+        return lambda client, i: client.get(url, headers=auth(token) if token else {})
+
+    return [
+        Scenario('signup', signup, ok=(201,)),
+        Scenario('login', login),
+        Scenario('current_user', get('/data/current-user', student_token)),
+        Scenario('check_account_type', get('/user/check-account-type', graduate_token)),
+        Scenario('student_page', get('/data/student-data?limit=50')),
+        Scenario('graduate_page', get('/data/graduate-data?limit=50')),
+        Scenario('graduate_full_list', get('/data/graduate-data')),
+        Scenario('graduates_by_faculty', get('/data/graduates?faculty=วิศวกรรมศาสตร์')),
+        Scenario('graduates_by_company', get('/data/graduates-by-company?company=SCB')),
+        Scenario('graduates_by_career', get('/data/graduates-by-career?career=Data%20Scientist')),
+        Scenario('graduates_query', get('/data/graduates/query?faculty=Engineering&company=SCB&company=KBTG'
+                                        '&sort=-date_of_employment&limit=50')),
+        Scenario('search', get('/data/search?q=software%20scb&limit=20')),
+        Scenario('faculties', get('/data/faculties')),
+        Scenario('companies', get('/data/companies')),
+        Scenario('careers', get('/data/careers')),
+        Scenario('graduate_histories', get('/history/graduates?limit=50')),
+        Scenario('my_history', get('/history/me', graduate_token)),
+        Scenario('analytics_employment', get('/analytics/employment?group_by=faculty')),
+        Scenario('analytics_top_employers', get('/analytics/top-employers?group_by=faculty&limit=5')),
+        Scenario('student_form', form('student'), ok=(201,)),
+        Scenario('graduate_form', form('graduate'), ok=(201,)),
+    ]
+
+
+def run_scenario(app, scenario, requests, concurrency):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        client = app.test_client()
+        local = []
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            response = scenario.make_request(client, i)
+            response.get_data()
+            local.append(time.perf_counter() - start)
+            if response.status_code not in scenario.ok:
+                errors.append(response.status_code)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted(set(errors)),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    # คืนค่า list ของ scenario ที่ p95 แย่ลงเกิน threshold
+    regressions = []
+    print(f"\n{'scenario':<26}{'p95 base':>10}{'p95 now':>10}{'change':>9}{'rps base':>10}{'rps now':>10}")
+    for name, now in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if not base:
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<26}{base['p95_ms']:>10}{now['p95_ms']:>10}{change:>+9.0%}"
+              f"{base['throughput_rps']:>10}{now['throughput_rps']:>10}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database-url', help="default: SQLite file ใน temp directory")
+    parser.add_argument('--graduates', type=int, default=5000)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--records', type=int, default=2, help="academic / career records per user")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help="requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--bcrypt-rounds', type=int, default=12)
+    parser.add_argument('--hash-executor', default='process', choices=('process', 'thread', 'inline'))
+    parser.add_argument('--only', help="comma-separated scenario names")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--save-baseline', metavar='NAME', help="save results as benchmarks/baselines/NAME.json")
+    parser.add_argument('--compare', metavar='NAME', help="compare with benchmarks/baselines/NAME.json")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed p95 regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='careertracker-bench-')
+    configure_environment(args, workdir)
+
+    from app import create_app
+    from extension import db, hasher, uploads
+    from models import User
+    from benchmarks.datagen import PASSWORD, seed
+
+    app = create_app()
+    only = set(args.only.split(',')) if args.only else None
+    rss_before = rss_mb()
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        password_hash = hasher.generate_password_hash(PASSWORD)
+        ids = seed(db.session, password_hash, args.students, args.graduates, 0, args.records, args.seed)
+        # user ที่ยังไม่มี profile สำหรับ scenario student_form / graduate_form
+        form_ids = seed(db.session, password_hash, 0, 0, args.requests * 2, 0, args.seed + 1)['unassigned']
+        app.config['_bench_emails'] = dict(
+            db.session.execute(db.select(User.id, User.email).where(User.id.in_(ids['graduate'][:1000]))).all())
+        seed_seconds = time.perf_counter() - start
+
+    form_users = {'student': form_ids[:args.requests], 'graduate': form_ids[args.requests:]}
+    scenarios = build_scenarios(app, ids, form_users)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "database": app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            "graduates": args.graduates,
+            "students": args.students,
+            "records": args.records,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "hash_executor": args.hash_executor,
+            "seed_seconds": round(seed_seconds, 1),
+            "rss_after_seed_mb": round(rss_mb(), 1),
+            "rss_before_seed_mb": round(rss_before, 1),
+        },
+        "scenarios": {},
+    }
+
+    print(f"seeded {args.graduates} graduates / {args.students} students in {seed_seconds:.1f}s\n")
+    print(f"{'scenario':<26}{'req':>6}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rss MB':>9}")
+    for scenario in scenarios:
+        if only and scenario.name not in only:
+            continue
+        result = run_scenario(app, scenario, args.requests, args.concurrency)
+        results["scenarios"][scenario.name] = result
+        print(f"{scenario.name:<26}{result['requests']:>6}{result['errors']:>5}{result['throughput_rps']:>9}"
+              f"{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}{result['rss_mb']:>9}")
+
+    uploads.shutdown(wait=True)
+    hasher.shutdown()
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nbaseline saved to {path}")
+
+    failed = [name for name, result in results["scenarios"].items() if result["errors"]]
+    regressions = []
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    if failed:
+        print(f"\nscenarios with errors: {', '.join(failed)}")
+    if regressions:
+        print(f"\np95 regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Micro-benchmark: jsonify ของ ORM object (แบบเดิม) เทียบกับ Core Row + ProfileSerializer
+#
+#   python benchmarks/serializers_bench.py --rows 20000
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, jsonify
+from extension import db
+from models import User, UserRole, GraduateProfile
+from serializers import graduate_serializer, json_response, orjson
+
+
+def legacy_graduate_list():
+    graduates = GraduateProfile.query.all()
+    result = [{
+        "full_name": grad.full_name,
+        "faculty": grad.faculty,
+        "major": grad.major,
+        "profile_image": grad.profile_image if grad.profile_image else None,
+        "extracurricular_activities": grad.extracurricular_activities,
+        "academic_projects": grad.academic_projects,
+        "internship_status": grad.internship_status,
+        "internship_company": grad.internship_company,
+        "internship_position": grad.internship_position,
+        "internship_duration": grad.internship_duration,
+        "internship_task": grad.internship_task,
+        "internship_experience": grad.internship_experience,
+        "career_status": grad.career_status,
+        "career_company": grad.career_company,
+        "career_position": grad.career_position,
+        "date_of_employment": grad.date_of_employment.isoformat() if grad.date_of_employment else None,
+        "career_task": grad.career_task,
+        "career_experience": grad.career_experience
+    } for grad in graduates]
+    return jsonify(result)
+
+
+def serializer_graduate_list():
+    stmt = graduate_serializer.select().order_by(GraduateProfile.id)
+    return json_response(graduate_serializer.to_list(db.session.execute(stmt)))
+
+
+def seed(rows):
+    users = [User(id=i, email=f"user{i}@example.com", password_hash="x", role=UserRole.graduate)
+             for i in range(1, rows + 1)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([GraduateProfile(
+        user_id=i,
+        full_name=f"สมชาย ใจดี {i}",
+        student_id=f"6{i:08d}",
+        email=f"user{i}@example.com",
+        faculty="Engineering",
+        major="Computer Engineering",
+        extracurricular_activities="ชมรมหุ่นยนต์, robotics club " * 5,
+        academic_projects="Senior project: career tracking platform " * 5,
+        internship_status="completed",
+        internship_company="SCB",
+        internship_position="Software Engineer Intern",
+        internship_duration="3 months",
+        internship_task="Backend development " * 5,
+        internship_experience="ได้เรียนรู้การทำงานจริง " * 5,
+        career_status="employed",
+        career_company="Agoda",
+        career_position="Software Engineer",
+        date_of_employment=date(2024, 6, 1),
+        career_task="Building APIs " * 5,
+        career_experience="Great team " * 5,
+    ) for i in range(1, rows + 1)])
+    db.session.commit()
+
+
+def measure(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        response = fn()
+        response.get_data()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+
+        print(f"rows={args.rows} json backend={'orjson' if orjson else 'json'}")
+        baseline = None
+        for name, fn in (("legacy ORM + jsonify", legacy_graduate_list),
+                         ("Core Row + serializer", serializer_graduate_list)):
+            rate, best = measure(fn, args.rows, args.repeat)
+            baseline = baseline or rate
+            print(f"{name:<24} {rate:>12,.0f} rows/s  {best * 1000:>8.1f} ms  x{rate / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# เทียบ /data/graduate-data (JSON) กับ snapshot Parquet / Arrow: ขนาดไฟล์และเวลาโหลดเข้า memory
+#
+#   python benchmarks/snapshot_size.py --graduates 50000
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--graduates', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='careertracker-snapshot-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['STORAGE_BACKEND'] = 'filesystem'
+    os.environ['STORAGE_LOCAL_PATH'] = os.path.join(workdir, 'blobs')
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from app import create_app
+    from extension import db
+    from benchmarks.datagen import seed
+    from snapshot import write_snapshot
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed(db.session, 'x', 0, args.graduates, 0, 0, args.seed)
+
+        body = app.test_client().get('/data/graduate-data', headers={'Accept-Encoding': 'identity'}).get_data()
+        _, json_ms = timed(lambda: json.loads(body))
+        print(f"{'format':<16}{'bytes':>12}{'load ms':>10}")
+        print(f"{'json':<16}{len(body):>12}{json_ms:>10.1f}")
+        print(f"{'json (gzip)':<16}{len(gzip.compress(body)):>12}{'':>10}")
+
+        for fmt in ('parquet', 'arrow'):
+            directory = os.path.join(workdir, fmt)
+            manifest = write_snapshot(directory, fmt)
+            path = os.path.join(directory, manifest['tables']['graduate_profiles']['parts'][0]['file'])
+            if fmt == 'parquet':
+                table, load_ms = timed(lambda: pq.read_table(path, memory_map=True))
+            else:
+                table, load_ms = timed(lambda: pa.ipc.open_file(pa.memory_map(path)).read_all())
+            assert table.num_rows == args.graduates
+            print(f"{fmt:<16}{os.path.getsize(path):>12}{load_ms:>10.1f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# Startup benchmark: เวลาที่ worker ใหม่ใช้ก่อนพร้อมรับ request (gunicorn boot / autoscale cold start)
+# วัดใน process ใหม่ทุกครั้ง: import app → create_app() → request แรก แล้วแสดง package ที่ใช้เวลา import มากสุดจาก -X importtime
+#
+#   python benchmarks/startup.py --runs 10
+#   python benchmarks/startup.py --top 30
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# รันใน process ใหม่ พิมพ์เวลาแต่ละช่วง (วินาที) เป็น JSON บรรทัดสุดท้าย
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get('/data/faculties')
+assert response.status_code == 200, response.status_code
+first = time.perf_counter()
+print(json.dumps({"import": imported - start, "create_app": created - imported, "first_request": first - created,
+                  "modules": len(sys.modules)}))
+'''
+
+IMPORTTIME_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_probe(env, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE, ROOT]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def interpreter_seconds(env):
+    # เวลาเปิด python เปล่า ๆ (ส่วนที่ลดไม่ได้จากฝั่ง app)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def import_breakdown(stderr, top):
+    # self time รวมต่อ top-level package และ cumulative time ของ module ชั้นบนสุด + module ที่ถูก import โดยตรงจากชั้นนั้น
+    packages = Counter()
+    direct = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        packages[module.split('.')[0]] += int(self_us)
+        if len(indent) <= 3:
+            direct.append((int(cumulative_us), module))
+    direct.sort(reverse=True)
+    return packages.most_common(top), direct[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--database-url', help="default: SQLite file ใน temp directory")
+    parser.add_argument('--output', help="write results JSON here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='careertracker-startup-')
+    env = dict(os.environ)
+    env.setdefault('STORAGE_BACKEND', 'filesystem')
+    env['STORAGE_LOCAL_PATH'] = os.path.join(workdir, 'blobs')
+    env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+
+    # สร้างตารางครั้งเดียวให้ request แรกตอบ 200 ได้
+    subprocess.run([sys.executable, '-c', (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from app import create_app\nfrom extension import db\n"
+        "app = create_app()\nwith app.app_context(): db.create_all()"
+    ), ROOT], env=env, check=True)
+
+    samples = [run_probe(env)[0] for _ in range(args.runs)]
+    interpreter = statistics.median(interpreter_seconds(env) for _ in range(args.runs))
+    _, stderr = run_probe(env, importtime=True)
+    packages, direct = import_breakdown(stderr, args.top)
+
+    phases = ('import', 'create_app', 'first_request')
+    results = {
+        "runs": args.runs,
+        "python": sys.version.split()[0],
+        "interpreter_ms": round(interpreter * 1000, 1),
+        "modules": samples[-1]["modules"],
+        **{f"{phase}_ms": round(statistics.median(s[phase] for s in samples) * 1000, 1) for phase in phases},
+        "total_ms": round(statistics.median(sum(s[phase] for phase in phases) for s in samples) * 1000, 1),
+        "packages_self_ms": {name: round(us / 1000, 1) for name, us in packages},
+    }
+
+    print(f"interpreter start   {results['interpreter_ms']:>8} ms")
+    for phase in phases:
+        print(f"{phase:<20}{results[f'{phase}_ms']:>8} ms")
+    print(f"{'total':<20}{results['total_ms']:>8} ms   ({results['modules']} modules loaded)")
+
+    print(f"\n{'package (self time)':<32}{'ms':>8}")
+    for name, us in packages:
+        print(f"{name:<32}{us / 1000:>8.1f}")
+    print(f"\n{'top-level import (cumulative)':<32}{'ms':>8}")
+    for us, module in direct:
+        print(f"{module:<32}{us / 1000:>8.1f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import csv
+import io
+import json
+import sys
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DBAPIError
+
+from extension import db
+import lookups
+from models import User, UserRole, StudentProfile, GraduateProfile
+from profiles import student_values, graduate_values
+
+DEFAULT_BATCH_SIZE = 500
+# SQL Server รับ parameter ได้ไม่เกิน 2100 ตัวต่อ statement (ใช้กับ IN (...) ของ email)
+MAX_BATCH_SIZE = 2000
+
+PROFILE_TYPES = {
+    'student': (StudentProfile, student_values, UserRole.student),
+    'graduate': (GraduateProfile, graduate_values, UserRole.graduate),
+}
+
+REQUIRED_FIELDS = ('email', 'full_name', 'studentId')
+
+# key ที่ student_values / graduate_values อ่าน (ทุกคอลัมน์เป็น string / วันที่ในรูป string)
+TEXT_FIELDS = REQUIRED_FIELDS + (
+    'gender', 'dateOfBirth', 'phoneNumber', 'faculty', 'major', 'yearOfEnrollment', 'currentAcademicYear',
+    'extracurricularActivities', 'academicProjects',
+    'internshipStatus', 'internshipCompany', 'internshipPosition', 'internshipDuration', 'internshipTask',
+    'internshipExperience',
+    'careerStatus', 'careerCompany', 'careerPosition', 'dateOfEmployment', 'careerTask', 'careerExperience',
+)
+
+
+def detect_format(filename, content_type=None):
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or content_type == 'application/x-ndjson':
+        return 'ndjson'
+    return 'csv'
+
+
+def read_rows(stream, fmt):
+    # อ่านทีละแถวจาก stream (ไม่โหลดทั้งไฟล์เข้า memory)
+    # yield (เลขแถว, dict ของข้อมูล, error message หรือ None)
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for data in reader:
+            yield reader.line_num, data, None
+    elif fmt == 'ndjson':
+        for line_no, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield line_no, None, "Invalid JSON"
+                continue
+            if not isinstance(data, dict):
+                yield line_no, None, "Each line must be a JSON object"
+                continue
+            yield line_no, data, None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _coerce(data):
+    # NDJSON ส่งตัวเลขมาได้ (เช่น "studentId": 6301) → แปลงเป็น string; ชนิดอื่น (list, dict, bool, ทศนิยม) เป็น error ของแถว
+    data = dict(data)
+    for field in TEXT_FIELDS:
+        value = data.get(field)
+        if type(value) is int:
+            data[field] = str(value)
+        elif value is not None and not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+    return data
+
+
+def _validate(data, to_values):
+    # ใช้กฎเดียวกับ add_student / add_graduate (วันที่, internship / career status)
+    # คืนค่า (error, email, ค่าคอลัมน์)
+    try:
+        data = _coerce(data)
+    except ValueError as e:
+        return str(e), None, None
+    missing = [field for field in REQUIRED_FIELDS if not (data.get(field) or '').strip()]
+    if missing:
+        return f"Missing required field(s): {', '.join(missing)}", None, None
+    try:
+        return None, data['email'].strip().lower(), to_values(data)
+    except ValueError as e:
+        return str(e), None, None
+
+
+def _constraint_message(error):
+    orig = getattr(error, 'orig', None) or error
+    return f"Database constraint violated: {str(orig).splitlines()[0]}"
+
+
+def _canonicalize(model, rows):
+    # ชื่อบริษัท / ตำแหน่ง / คณะ / สาขา → ชื่อหลัก + id ของ lookup table (ชื่อใหม่ที่ซ้ำกันใน batch เพิ่มแถวเดียว)
+    if model is GraduateProfile:
+        resolver = lookups.Resolver(db.session)
+        for _, values in rows:
+            resolver.canonicalize(values)
+
+
+def _insert_batch(model, role, batch, report):
+    emails = {email for _, email, _ in batch}
+    users = dict(db.session.execute(select(User.email, User.id).where(User.email.in_(emails))).all())
+    existing = set(db.session.scalars(select(model.user_id).where(model.user_id.in_(list(users.values())))))
+
+    rows = []
+    for row_no, email, values in batch:
+        user_id = users.get(email)
+        if user_id is None:
+            report["errors"].append({"row": row_no, "message": f"User not found for email {email}"})
+        elif user_id in existing:
+            report["errors"].append({"row": row_no, "message": f"Profile already exists for email {email}"})
+        else:
+            existing.add(user_id)
+            rows.append((row_no, dict(values, user_id=user_id, email=email, profile_image=None)))
+
+    if not rows:
+        return
+
+    # ✅ insert ทั้ง batch ด้วย executemany ใน transaction เดียว
+    _canonicalize(model, rows)
+    try:
+        db.session.execute(insert(model), [values for _, values in rows])
+        inserted = rows
+    except DBAPIError:
+        # มีบางแถวผิด constraint → rollback แล้วลองทีละแถวใน savepoint เพื่อหาแถวที่มีปัญหา
+        # (แถวใหม่ของ lookup table หายไปกับ rollback ด้วย → resolve ใหม่)
+        db.session.rollback()
+        _canonicalize(model, rows)
+        inserted = []
+        for row_no, values in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(model), [values])
+                inserted.append((row_no, values))
+            except DBAPIError as e:
+                report["errors"].append({"row": row_no, "message": _constraint_message(e)})
+
+    if inserted:
+        user_ids = [values["user_id"] for _, values in inserted]
+        db.session.execute(
+            update(User)
+            .where(User.id.in_(user_ids), User.role == UserRole.unassigned)
+            .values(role=role)
+        )
+    db.session.commit()
+    report["inserted"] += len(inserted)
+
+
+def import_profiles(kind, rows, batch_size=DEFAULT_BATCH_SIZE):
+    model, to_values, role = PROFILE_TYPES[kind]
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    report = {"processed": 0, "inserted": 0, "failed": 0, "errors": []}
+
+    batch = []
+    for row_no, data, error in rows:
+        report["processed"] += 1
+        if error is None:
+            error, email, values = _validate(data, to_values)
+        if error:
+            report["errors"].append({"row": row_no, "message": error})
+            continue
+
+        batch.append((row_no, email, values))
+        if len(batch) >= batch_size:
+            _insert_batch(model, role, batch, report)
+            batch = []
+
+    if batch:
+        _insert_batch(model, role, batch, report)
+
+    report["errors"].sort(key=lambda error: error["row"])
+    report["failed"] = len(report["errors"])
+
+    return report
+
+
+@click.command('import-profiles')
+@click.argument('kind', type=click.Choice(sorted(PROFILE_TYPES)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help="Default: from file extension")
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True)
+@with_appcontext
+def import_profiles_command(kind, path, fmt, batch_size):
+    """Bulk import student/graduate profiles from a CSV or NDJSON file."""
+    with open(path, 'rb') as f:
+        report = import_profiles(kind, read_rows(f, fmt or detect_format(path)), batch_size)
+
+    for error in report["errors"]:
+        click.echo(json.dumps(error, ensure_ascii=False), file=sys.stderr)
+    click.echo(f"processed={report['processed']} inserted={report['inserted']} failed={report['failed']}")
@@ -0,0 +1,116 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    # TTL + LRU cache ภายใน process (แต่ละ gunicorn worker มีของตัวเอง)
+
+    def __init__(self, max_entries=1024, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    # ใช้ได้กับ client ที่มี get/set/delete แบบ redis-py (รวมถึง fake สำหรับทดสอบ)
+    # แชร์ข้อมูลระหว่าง worker ทุกตัว
+
+    def __init__(self, client, prefix='careertracker:', default_ttl=300):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class Cache:
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+
+        if backend == 'redis':
+            client = app.config.get('CACHE_REDIS_CLIENT')
+            if client is None:
+                import redis
+                client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+            self.backend = RedisCache(client, app.config.get('CACHE_KEY_PREFIX', 'careertracker:'), ttl)
+        elif backend == 'memory':
+            self.backend = MemoryCache(app.config.get('CACHE_MAX_ENTRIES', 1024), ttl)
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+        app.extensions['cache'] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, loader, ttl=None):
+        # read-through: ถ้าไม่มีใน cache ให้เรียก loader แล้วเก็บผลไว้
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
@@ -16,14 +16,113 @@ class Config:
     AZURE_SQL_USER = os.getenv('AZURE_SQL_USER', 'your_username')
     AZURE_STORAGE_CONNECTION_STRING= os.getenv('AZURE_STORAGE_CONNECTION_STRING', 'your_connection_string')
 
+    # ที่เก็บรูปโปรไฟล์: "azure" หรือ "filesystem" (สำหรับ development / ทดสอบ)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'azure')
+    STORAGE_CONTAINER = os.getenv('STORAGE_CONTAINER', 'profilepic')
+    STORAGE_LOCAL_PATH = os.getenv('STORAGE_LOCAL_PATH')  # default: instance/blobs
+    STORAGE_LOCAL_URL = os.getenv('STORAGE_LOCAL_URL', '/data/local-blob')
+    UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', '2'))
+
+    # อายุของ upload token (SAS) และ URL รูปที่ sign แล้วใน listing (วินาที)
+    IMAGE_UPLOAD_URL_TTL = int(os.getenv('IMAGE_UPLOAD_URL_TTL', '600'))
+    IMAGE_URL_TTL = int(os.getenv('IMAGE_URL_TTL', '3600'))
+    IMAGE_CDN_BASE_URL = os.getenv('IMAGE_CDN_BASE_URL')  # เช่น https://cdn.example.com/profilepic
+
     # Encode password หากมีอักขระพิเศษ
     encoded_password = quote_plus(AZURE_SQL_PASSWORD)
 
     # ตั้งค่าการเชื่อมต่อกับ Azure SQL โดยใช้ connection string ของ ODBC
-    SQLALCHEMY_DATABASE_URI = (
+    # (DATABASE_URL ใช้แทนได้ เช่น sqlite:///bench.db สำหรับ benchmark / development)
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') or (
         f"mssql+pyodbc://{AZURE_SQL_USER}:{encoded_password}@{AZURE_SQL_SERVER}:{AZURE_SQL_PORT}/{AZURE_SQL_DATABASE}"
         f"?driver=ODBC+Driver+18+for+SQL+Server&Encrypt=yes&TrustServerCertificate=no&Connection+Timeout=30"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Read replica: ตั้ง SQLALCHEMY_REPLICA_URI เอง หรือใช้ read scale-out ของ Azure SQL
+    # (connection เดิม + ApplicationIntent=ReadOnly) ด้วย AZURE_SQL_READ_SCALE_OUT=true
+    SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+    if not SQLALCHEMY_REPLICA_URI and os.getenv('AZURE_SQL_READ_SCALE_OUT', 'false').lower() == 'true':
+        SQLALCHEMY_REPLICA_URI = SQLALCHEMY_DATABASE_URI + "&ApplicationIntent=ReadOnly"
+    SQLALCHEMY_BINDS = {"replica": SQLALCHEMY_REPLICA_URI} if SQLALCHEMY_REPLICA_URI else {}
+    REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', '30'))
+    READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '0'))  # 0 = ปิด
+
+    # Connection pool: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    # DB_POOL_PRE_PING, DB_ISOLATION_LEVEL, DB_FAST_EXECUTEMANY (ดู db_pool.engine_options)
+    # None = create_app สร้างจาก SQLALCHEMY_DATABASE_URI สุดท้าย (เช่น URI ที่ test / CLI ส่งมาเอง)
+    SQLALCHEMY_ENGINE_OPTIONS = None
+    DB_LOCK_TIMEOUT_MS = int(os.getenv('DB_LOCK_TIMEOUT_MS', '0'))  # 0 = ไม่ตั้ง
+
+    # ASGI (uvicorn asgi:app): async view ใช้ driver แบบ async (default แปลงจาก SQLALCHEMY_DATABASE_URI
+    # เช่น mssql+pyodbc → mssql+aioodbc) ส่วน route ที่ยังเป็น sync รันใน thread pool ขนาด ASGI_SYNC_THREADS
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    ASGI_SYNC_THREADS = int(os.getenv('ASGI_SYNC_THREADS', '16'))
+
+    # /metrics (Prometheus) ถ้าตั้ง token ไว้ต้องส่ง Authorization: Bearer <token>
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # รวมค่าของทุก worker ผ่านไฟล์ใน METRICS_DIR (default: /dev/shm/careertracker-metrics-<uid>)
+    METRICS_MULTIPROCESS = os.getenv('METRICS_MULTIPROCESS', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+
+    # Password hashing: cost ของ bcrypt และ worker pool ที่ใช้ hash
+    # HASH_EXECUTOR: "process" (default), "thread" หรือ "inline"
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    HASH_EXECUTOR = os.getenv('HASH_EXECUTOR', 'process')
+    HASH_WORKERS = int(os.getenv('HASH_WORKERS', '0')) or None  # 0 = จำนวน CPU core
+    HASH_MAX_PENDING = int(os.getenv('HASH_MAX_PENDING', '0')) or None  # 0 = HASH_WORKERS * 4
+    HASH_TIMEOUT = float(os.getenv('HASH_TIMEOUT', '10'))
+
+    # Rate limit ของ /auth/login และ /auth/signup: token bucket ต่อ IP / ต่อ email ("30/minute", "10/15minute", "off")
+    # และจำนวน request ที่ทำพร้อมกันได้ต่อ worker (0 = ไม่จำกัด)
+    # RATELIMIT_BACKEND: "shared" (shared memory ของทุก worker ในเครื่อง), "redis" (ทุกเครื่อง) หรือ "memory" (ต่อ worker)
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATELIMIT_BACKEND = os.getenv('RATELIMIT_BACKEND', 'shared')
+    RATELIMIT_REDIS_URL = os.getenv('RATELIMIT_REDIS_URL')  # default: CACHE_REDIS_URL
+    RATELIMIT_SHM_PATH = os.getenv('RATELIMIT_SHM_PATH')  # default: /dev/shm/careertracker-ratelimit-<uid>
+    RATELIMIT_SHM_SLOTS = int(os.getenv('RATELIMIT_SHM_SLOTS', '65536'))
+    # จำนวน reverse proxy หน้า app (App Service = 1) → ใช้ IP จาก X-Forwarded-For แทน IP ของ proxy
+    RATELIMIT_TRUSTED_PROXIES = int(os.getenv('RATELIMIT_TRUSTED_PROXIES', '0'))
+    RATELIMIT_LOGIN_PER_IP = os.getenv('RATELIMIT_LOGIN_PER_IP', '30/minute')
+    RATELIMIT_LOGIN_PER_EMAIL = os.getenv('RATELIMIT_LOGIN_PER_EMAIL', '10/15minute')
+    RATELIMIT_LOGIN_CONCURRENCY = int(os.getenv('RATELIMIT_LOGIN_CONCURRENCY', '8'))
+    RATELIMIT_SIGNUP_PER_IP = os.getenv('RATELIMIT_SIGNUP_PER_IP', '10/hour')
+    RATELIMIT_SIGNUP_PER_EMAIL = os.getenv('RATELIMIT_SIGNUP_PER_EMAIL', '3/hour')
+    RATELIMIT_SIGNUP_CONCURRENCY = int(os.getenv('RATELIMIT_SIGNUP_CONCURRENCY', '4'))
+
+    # Logout / revoke JWT: ทุก worker เก็บ jti ที่ถูก revoke ไว้ใน memory และดึงรายการใหม่จาก DB ทุก REVOCATION_SYNC_SECONDS
+    # (logout จาก worker หนึ่งมีผลกับ worker อื่นภายในช่วงนี้)
+    REVOCATION_ENABLED = os.getenv('REVOCATION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    REVOCATION_SYNC_SECONDS = float(os.getenv('REVOCATION_SYNC_SECONDS', '1'))
+
+    # Cache สำหรับ dropdown lists (faculties / companies / careers)
+    # CACHE_BACKEND: "memory" (ต่อ worker) หรือ "redis" (แชร์ทุก worker)
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', '300'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+    # CACHE_BACKEND=memory: version ของตาราง (ETag) ที่อ่านจาก DB ถูกจำไว้ใน worker กี่วินาที (0 = อ่านทุก request)
+    TABLE_VERSION_TTL = float(os.getenv('TABLE_VERSION_TTL', '1'))
+
+    # Instrumentation: log request ที่ช้ากว่า SLOW_REQUEST_MS (0 = ปิด) พร้อม SQL ที่รัน
+    # และเตือน N+1 เมื่อ statement เดียวกันรันซ้ำเกิน N_PLUS_ONE_THRESHOLD ครั้งใน request เดียว
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '0'))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '10'))
+
+    # บีบอัด response ที่ใหญ่กว่า COMPRESS_MIN_SIZE bytes (brotli ถ้าติดตั้ง package brotli ไว้, ไม่งั้น gzip)
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+
+    # /analytics: ตารางสรุปถูกสร้างใหม่จาก DB อย่างน้อยทุก ANALYTICS_TTL วินาที
+    ANALYTICS_TTL = int(os.getenv('ANALYTICS_TTL', '3600'))
+
+    # /data/search: ดึง profile ใหม่เข้า index ทุกกี่วินาที
+    SEARCH_REFRESH_SECONDS = int(os.getenv('SEARCH_REFRESH_SECONDS', '30'))
 
+    # Snapshot Parquet / Arrow สำหรับงานวิเคราะห์ offline (flask export-snapshot, /data/snapshots)
+    # บน App Service ควรชี้ไปที่ /home/... ซึ่งทุก instance เห็นร่วมกัน
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR')  # default: instance/snapshots
+    SNAPSHOT_FORMAT = os.getenv('SNAPSHOT_FORMAT', 'parquet')  # "parquet" หรือ "arrow"
+    SNAPSHOT_MAX_PARTS = int(os.getenv('SNAPSHOT_MAX_PARTS', '24'))
@@ -0,0 +1,115 @@
+import os
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from metrics import Counter, Gauge, Histogram
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled DB connection', buckets=POOL_WAIT_BUCKETS)
+POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Connections checked out of the pool')
+POOL_TIMEOUTS = Counter('db_pool_timeouts_total', 'Checkouts that failed with a pool timeout')
+POOL_CONNECTS = Counter('db_pool_connects_total', 'New DBAPI connections opened by the pool')
+
+_pools = weakref.WeakSet()
+
+
+def _pool_stats():
+    checked_out = size = overflow = capacity = 0
+    for pool in list(_pools):
+        checked_out += pool.checkedout()
+        size += pool.size()
+        overflow += max(pool.overflow(), 0)
+        capacity += pool.size() + max(pool._max_overflow, 0)
+    return checked_out, size, overflow, capacity
+
+
+Gauge('db_pool_checked_out', 'Connections currently checked out',
+      function=lambda: {(): _pool_stats()[0]})
+Gauge('db_pool_size', 'Configured pool size',
+      function=lambda: {(): _pool_stats()[1]})
+Gauge('db_pool_overflow', 'Overflow connections currently open',
+      function=lambda: {(): _pool_stats()[2]})
+Gauge('db_pool_utilization', 'Checked out connections / (pool_size + max_overflow)',
+      function=lambda: {(): (lambda s: s[0] / s[3] if s[3] else 0)(_pool_stats())})
+
+
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool ที่วัดเวลารอ connection และนับ checkout / timeout
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools.add(self)
+
+    def _create_connection(self):
+        POOL_CONNECTS.inc()
+        return super()._create_connection()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+            POOL_CHECKOUTS.inc()
+            return connection
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def engine_options(uri, env):
+    # สร้าง SQLALCHEMY_ENGINE_OPTIONS จาก environment variables
+    if uri.startswith('sqlite'):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(env.get('DB_POOL_SIZE', '10')),
+        "max_overflow": int(env.get('DB_MAX_OVERFLOW', '10')),
+        "pool_timeout": float(env.get('DB_POOL_TIMEOUT', '10')),
+        # Azure SQL ตัด connection ที่ idle ~30 นาที → recycle ก่อนหน้านั้น
+        "pool_recycle": int(env.get('DB_POOL_RECYCLE', '1500')),
+        "pool_pre_ping": env.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        # READ COMMITTED + READ_COMMITTED_SNAPSHOT ON ที่ DB → read ไม่ block write
+        "isolation_level": env.get('DB_ISOLATION_LEVEL', 'READ COMMITTED'),
+    }
+
+    if uri.startswith('mssql+pyodbc'):
+        # pyodbc: ส่ง executemany เป็น array ครั้งเดียวแทนทีละแถว (ใช้กับ bulk import)
+        options["fast_executemany"] = env.get('DB_FAST_EXECUTEMANY', 'true').lower() in ('1', 'true', 'yes')
+
+    return options
+
+
+def configure_connections(engine, lock_timeout_ms=None):
+    # ตั้งค่าระดับ connection ทุกครั้งที่ pool เปิด connection ใหม่
+    if not lock_timeout_ms or engine.dialect.name != 'mssql':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_lock_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET LOCK_TIMEOUT {int(lock_timeout_ms)}")
+        cursor.close()
+
+
+def dispose_after_fork(engines):
+    # gunicorn --preload: engine ถูกสร้างใน master แล้ว fork เป็น worker
+    # ให้ worker แต่ละตัวเริ่ม pool ใหม่ของตัวเอง โดยไม่ปิด connection ที่ยังเป็นของ master (close=False)
+    if not hasattr(os, 'register_at_fork'):
+        return
+    refs = [weakref.ref(engine) for engine in engines]
+
+    def reset_pools():
+        for ref in refs:
+            engine = ref()
+            if engine is not None:
+                engine.dispose(close=False)
+
+    os.register_at_fork(after_in_child=reset_pools)
@@ -0,0 +1,130 @@
+import logging
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+RYW_COOKIE = 'db_ryw'
+
+
+class RoutingSession(Session):
+    # ส่ง SELECT ไปที่ replica เมื่อ route ถูกทำเครื่องหมาย @read_only
+    # การเขียน (flush / INSERT / UPDATE / DELETE) ไปที่ primary เสมอ
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_app_context() and g.get('db_use_replica')):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                g.db_replica_used = True
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+
+    def __init__(self, app=None):
+        self.retry_seconds = 30
+        self.ryw_seconds = 0
+        self._down_until = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.retry_seconds = app.config.get('REPLICA_RETRY_SECONDS', self.retry_seconds)
+        # read-your-writes: หลังเขียนข้อมูล request ถัด ๆ ไปของ client นี้จะอ่านจาก primary
+        # เป็นเวลา READ_YOUR_WRITES_SECONDS วินาที (0 = ปิด)
+        self.ryw_seconds = app.config.get('READ_YOUR_WRITES_SECONDS', self.ryw_seconds)
+        app.extensions['replica_router'] = self
+
+        if self.ryw_seconds:
+            app.after_request(self._set_ryw_cookie)
+
+        # error ใด ๆ จาก replica (ล่ม, schema ตามไม่ทัน) → ปิด replica ชั่วคราวและให้ route ลองใหม่ที่ primary
+        db = app.extensions['sqlalchemy']
+        with app.app_context():
+            engine = db.engines.get(REPLICA_BIND)
+        if engine is not None:
+            event.listen(engine, 'handle_error', self._on_replica_error)
+
+    def _on_replica_error(self, context):
+        self.mark_down()
+        if has_app_context():
+            g.db_replica_failed = True
+
+    @property
+    def enabled(self):
+        return REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+
+    def available(self):
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def mark_down(self):
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def in_ryw_window(self):
+        if not self.ryw_seconds:
+            return False
+        try:
+            return float(request.cookies.get(RYW_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def _set_ryw_cookie(self, response):
+        if g.get('db_wrote'):
+            until = time.time() + self.ryw_seconds
+            response.set_cookie(RYW_COOKIE, str(int(until) + 1), max_age=self.ryw_seconds,
+                                httponly=True, secure=True, samesite='None')
+        return response
+
+
+def track_writes(session_class):
+    # จำไว้ใน g ว่า request นี้มีการเขียนข้อมูล (ใช้กับ read-your-writes)
+    @event.listens_for(session_class, 'after_flush')
+    def after_flush(session, flush_context):
+        if has_app_context():
+            g.db_wrote = True
+
+    @event.listens_for(session_class, 'do_orm_execute')
+    def do_orm_execute(orm_execute_state):
+        if has_app_context() and (orm_execute_state.is_insert or orm_execute_state.is_update
+                                  or orm_execute_state.is_delete):
+            g.db_wrote = True
+
+
+track_writes(RoutingSession)
+
+
+def read_only(view):
+    # route ที่อ่านอย่างเดียว → ใช้ replica, ถ้า replica ล่มให้ fallback ไป primary
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get('replica_router')
+        if router is None or not router.available() or router.in_ryw_window():
+            return view(*args, **kwargs)
+
+        g.db_use_replica = True
+        try:
+            response = view(*args, **kwargs)
+        except DBAPIError:
+            if not g.get('db_replica_failed'):
+                raise
+            response = None
+
+        # บาง route จับ exception แล้วตอบ 500 เอง จึงเช็คจาก flag แทนการดู exception อย่างเดียว
+        if g.get('db_replica_failed'):
+            logger.warning("Read replica failed, falling back to primary")
+            current_app.extensions['sqlalchemy'].session.rollback()
+            g.db_use_replica = False
+            g.db_replica_failed = False
+            response = view(*args, **kwargs)
+        return response
+
+    return wrapper
@@ -1,8 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from flask_migrate import Migrate
+from async_db import AsyncDatabase
+from cache import Cache
+from db_routing import ReplicaRouter, RoutingSession
+from hashing import PasswordHasher
+from http_cache import Compressor, TableVersions
+from instrumentation import Instrumentation
+from ratelimit import RateLimiter
+from search import SearchIndex
+from storage import ImageUploads
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+async_db = AsyncDatabase()
 cors = CORS()
-migrate = Migrate()
+cache = Cache()
+table_versions = TableVersions(cache)
+compressor = Compressor()
+hasher = PasswordHasher()
+rate_limiter = RateLimiter()
+uploads = ImageUploads()
+replica_router = ReplicaRouter()
+instrumentation = Instrumentation()
+search_index = SearchIndex()
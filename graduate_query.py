@@ -0,0 +1,220 @@
+import base64
+import json
+from datetime import date
+from functools import lru_cache
+
+from sqlalchemy import and_, bindparam, or_
+
+import lookups
+from models import GraduateProfile
+from serializers import graduate_serializer
+
+# /data/graduates/query: รวม filter หลายคอลัมน์ไว้ใน query เดียว พร้อม sort, เลือก field และ keyset pagination
+#
+#   ?faculty=Engineering&company=SCB&company=KBTG      (ส่งซ้ำ = IN)
+#   &employed_from=2023-01-01&employed_to=2023-12-31
+#   &sort=-date_of_employment&fields=full_name,career_company&limit=50&after=<cursor>
+#
+# statement ถูกสร้างครั้งเดียวต่อ "รูปแบบ" ของ query (filter ไหน, เท่ากับหรือ IN, sort, fields) โดยค่าจริงเป็น
+# bind parameter ทั้งหมด → SQLAlchemy ไม่ต้องสร้าง statement ใหม่ และ SQL Server ใช้ execution plan เดิมซ้ำได้
+#
+# faculty / major / company / position / internship_company เทียบด้วย id ของ lookup table (ดู lookups.py)
+# → ชื่อที่สะกดต่างกันหรือเป็น alias ได้ผลเดียวกัน
+
+EQUALITY_FILTERS = {
+    'faculty': GraduateProfile.faculty_id,
+    'major': GraduateProfile.major_id,
+    'company': GraduateProfile.career_company_id,
+    'position': GraduateProfile.career_position_id,
+    'career_status': GraduateProfile.career_status,
+    'internship_status': GraduateProfile.internship_status,
+    'internship_company': GraduateProfile.internship_company_id,
+}
+
+# filter ที่ต้องแปลงชื่อเป็น id ก่อน → kind ของ lookup table
+LOOKUP_FILTERS = {
+    'faculty': 'faculty',
+    'major': 'major',
+    'company': 'company',
+    'position': 'position',
+    'internship_company': 'company',
+}
+
+# id ที่ไม่มีจริง (IDENTITY เริ่มที่ 1) ใช้แทนชื่อที่ไม่มีใน lookup table → ได้ผลว่างโดยไม่ต้องเปลี่ยนรูปแบบ statement
+MISSING_ID = 0
+
+RANGE_FILTERS = {
+    'employed': GraduateProfile.date_of_employment,
+    'enrolled': GraduateProfile.year_of_enrollment,
+}
+
+SORT_COLUMNS = {
+    'id': GraduateProfile.id,
+    'full_name': GraduateProfile.full_name,
+    'faculty': GraduateProfile.faculty,
+    'major': GraduateProfile.major,
+    'career_company': GraduateProfile.career_company,
+    'career_position': GraduateProfile.career_position,
+    'date_of_employment': GraduateProfile.date_of_employment,
+}
+
+MAX_FILTER_VALUES = 50
+STATEMENT_CACHE_SIZE = 256
+
+
+class GraduateQuery:
+
+    def __init__(self, equals, ranges, sort, descending, fields, cursor):
+        self.equals = equals          # {ชื่อ filter: [ค่า]}
+        self.ranges = ranges          # {'employed_from': date, ...}
+        self.sort = sort
+        self.descending = descending
+        self.fields = fields          # tuple ของ key ใน graduate_serializer
+        self.cursor = cursor          # (ค่าของคอลัมน์ sort, id) ของแถวสุดท้ายในหน้าก่อน หรือ None
+
+    @property
+    def shape(self):
+        # key ของ statement cache: รูปแบบของ query โดยไม่รวมค่า
+        return (
+            tuple(sorted((name, len(values) > 1) for name, values in self.equals.items())),
+            tuple(sorted(self.ranges)),
+            self.sort,
+            self.descending,
+            self.fields,
+            self.cursor is not None,
+            self.cursor is not None and self.cursor[0] is None,
+        )
+
+    def resolve_lookups(self, session):
+        # แปลงค่าของ LOOKUP_FILTERS จากชื่อเป็น id (เรียกก่อนใช้ shape / params)
+        for name, kind in LOOKUP_FILTERS.items():
+            if name in self.equals:
+                self.equals[name] = lookups.find_all(session, kind, self.equals[name]) or [MISSING_ID]
+
+    @property
+    def params(self):
+        params = {}
+        for name, values in self.equals.items():
+            params[name] = values if len(values) > 1 else values[0]
+        params.update(self.ranges)
+        if self.cursor is not None:
+            params['cursor_value'], params['cursor_id'] = self.cursor
+        return params
+
+    @property
+    def serializer(self):
+        return field_serializer(self.fields)
+
+    def encode_cursor(self, row):
+        value = row[-1] if self.sort != 'id' else None
+        if isinstance(value, date):
+            value = value.isoformat()
+        raw = json.dumps([value, row[0]], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date format for {name}")
+
+
+def _decode_cursor(token, sort):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, last_id = json.loads(raw)
+        last_id = int(last_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if sort == 'id':
+        return None, last_id
+    if value is not None and sort == 'date_of_employment':
+        value = _parse_date(value, 'cursor')
+    return value, last_id
+
+
+def parse_query_args(args):
+    # แปลง request.args เป็น GraduateQuery (ValueError ถ้าค่าไม่ถูกต้อง)
+    equals = {}
+    for name in EQUALITY_FILTERS:
+        # ไม่แยกด้วย ',' เพราะชื่อบริษัทมี ',' ได้ (เช่น "Co., Ltd.") → หลายค่าใช้ส่ง parameter ซ้ำ
+        values = [value for value in args.getlist(name) if value.strip()]
+        if len(values) > MAX_FILTER_VALUES:
+            raise ValueError(f"Too many values for {name} (max {MAX_FILTER_VALUES})")
+        if values:
+            equals[name] = list(dict.fromkeys(value.strip() for value in values))
+
+    ranges = {}
+    for name in RANGE_FILTERS:
+        for suffix in ('from', 'to'):
+            key = f"{name}_{suffix}"
+            if args.get(key):
+                ranges[key] = _parse_date(args[key], key)
+
+    sort = args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+
+    fields = graduate_serializer.keys
+    if args.get('fields'):
+        fields = tuple(dict.fromkeys(field.strip() for field in args['fields'].split(',') if field.strip()))
+        unknown = [field for field in fields if field not in graduate_serializer.keys]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    cursor = _decode_cursor(args['after'], sort) if args.get('after') else None
+    return GraduateQuery(equals, ranges, sort, descending, fields, cursor)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def field_serializer(fields):
+    return graduate_serializer.only(fields)
+
+
+def _keyset_condition(column, descending, value_is_null):
+    # แถวที่อยู่ "หลัง" (ค่า, id) ของ cursor ตามลำดับ ORDER BY column, id
+    # ทั้ง SQL Server และ SQLite เรียง NULL ไว้ก่อนค่าอื่นเมื่อ ASC (และไว้ท้ายเมื่อ DESC)
+    value = bindparam('cursor_value')
+    last_id = bindparam('cursor_id')
+    id_column = GraduateProfile.id
+    if not descending:
+        if value_is_null:
+            return or_(column.is_not(None), and_(column.is_(None), id_column > last_id))
+        return or_(column > value, and_(column == value, id_column > last_id))
+    if value_is_null:
+        return and_(column.is_(None), id_column < last_id)
+    return or_(column < value, column.is_(None), and_(column == value, id_column < last_id))
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def build_statement(shape):
+    equals, ranges, sort, descending, fields, has_cursor, cursor_is_null = shape
+    sort_column = SORT_COLUMNS[sort]
+
+    stmt = field_serializer(fields).select()
+    if sort != 'id':
+        # ต่อท้ายคอลัมน์ sort ไว้เสมอ ใช้สร้าง cursor ของหน้าถัดไป
+        stmt = stmt.add_columns(sort_column.label('sort_value'))
+
+    for name, many in equals:
+        column = EQUALITY_FILTERS[name]
+        stmt = stmt.where(column.in_(bindparam(name, expanding=True)) if many else column == bindparam(name))
+
+    for key in ranges:
+        name, suffix = key.rsplit('_', 1)
+        column = RANGE_FILTERS[name]
+        stmt = stmt.where(column >= bindparam(key) if suffix == 'from' else column <= bindparam(key))
+
+    if has_cursor:
+        if sort == 'id':
+            condition = GraduateProfile.id < bindparam('cursor_id') if descending \
+                else GraduateProfile.id > bindparam('cursor_id')
+        else:
+            condition = _keyset_condition(sort_column, descending, cursor_is_null)
+        stmt = stmt.where(condition)
+
+    order = [sort_column, GraduateProfile.id] if sort != 'id' else [GraduateProfile.id]
+    return stmt.order_by(*(column.desc() if descending else column.asc() for column in order))
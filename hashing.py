@@ -0,0 +1,110 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+from instrumentation import PASSWORD_HASH_DURATION, timed
+
+
+class HashingBusy(Exception):
+    # คิวของ hashing pool เต็ม → route ควรตอบ 503 ทันที
+    pass
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password_hash, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        # hash ที่ไม่ใช่ bcrypt (เช่น account ที่ยังตั้งรหัสผ่านไม่ได้)
+        return False
+
+
+def hash_rounds(password_hash):
+    # "$2b$12$..." → 12
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    # รัน bcrypt ใน worker pool แยกจาก request thread
+    # HASH_EXECUTOR: "process" (default), "thread" หรือ "inline"
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.mode = 'process'
+        self.workers = os.cpu_count() or 1
+        self.max_pending = self.workers * 4
+        self.timeout = 10
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.mode = app.config.get('HASH_EXECUTOR', self.mode)
+        self.workers = app.config.get('HASH_WORKERS') or self.workers
+        self.max_pending = app.config.get('HASH_MAX_PENDING') or self.workers * 4
+        self.timeout = app.config.get('HASH_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions['hasher'] = self
+
+    def _get_executor(self):
+        # สร้าง pool ครั้งแรกที่ใช้งานใน process นี้ (หลัง gunicorn fork แล้ว)
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    if self.mode == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+                    self._pid = pid
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.mode == 'inline':
+            return fn(*args)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # คืน slot เมื่องานเสร็จจริง (รวมถึงถูก cancel) ไม่ใช่ตอน timeout ที่งานยังรันอยู่ใน pool
+        # → งานที่ค้างยังนับรวมใน max_pending จนกว่าจะจบ
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy()
+
+    def generate_password_hash(self, password):
+        with timed(PASSWORD_HASH_DURATION, 'bcrypt', operation='hash'):
+            return self._run(_hash_password, password, self.rounds)
+
+    def check_password_hash(self, password_hash, password):
+        with timed(PASSWORD_HASH_DURATION, 'bcrypt', operation='check'):
+            return self._run(_check_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,161 @@
+from sqlalchemy import delete, insert, update
+
+from models import AcademicRecord, CareerRecord
+from profiles import parse_date
+
+# ประวัติการศึกษา (academic_records) และการทำงาน (career_records) หลายรายการต่อ user
+# แปลง / ตรวจ JSON ของ /history (key แบบ snake_case เหมือนชื่อคอลัมน์) และแทนที่ timeline ทั้งก้อนใน request เดียว
+
+# จำนวนรายการสูงสุดต่อ timeline (กัน request เดียวสร้างแถวจำนวนมาก)
+MAX_RECORDS = 50
+
+
+def _text(data, field, length, required=False):
+    value = data.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    value = (value or '').strip()
+    if required and not value:
+        raise ValueError(f"{field} is required")
+    if len(value) > length:
+        raise ValueError(f"{field} must be at most {length} characters")
+    return value or None
+
+
+def _dates(data):
+    for field in ('start_date', 'end_date'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise ValueError(f"Invalid date format for {field}")
+    start_date = parse_date(data, 'start_date')
+    end_date = parse_date(data, 'end_date')
+    if start_date and end_date and end_date < start_date:
+        raise ValueError("end_date must not be before start_date")
+    return dict(start_date=start_date, end_date=end_date)
+
+
+def _gpa(data):
+    value = data.get('gpa')
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        gpa = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("gpa must be a number")
+    if not 0 <= gpa <= 4:
+        raise ValueError("gpa must be between 0 and 4")
+    return gpa
+
+
+def academic_record_values(data):
+    return dict(
+        degree=_text(data, 'degree', 100),
+        institution=_text(data, 'institution', 255),
+        major=_text(data, 'major', 100),
+        gpa=_gpa(data),
+        **_dates(data),
+    )
+
+
+def career_record_values(data):
+    return dict(
+        company=_text(data, 'company', 100, required=True),
+        position=_text(data, 'position', 100),
+        **_dates(data),
+    )
+
+
+# ชื่อ relationship บน User → (model, ตัวแปลงค่า, field ที่ส่งกลับ)
+RECORD_TYPES = {
+    'academic_records': (AcademicRecord, academic_record_values,
+                         ('record_id', 'degree', 'institution', 'major', 'gpa', 'start_date', 'end_date')),
+    'career_records': (CareerRecord, career_record_values,
+                       ('record_id', 'company', 'position', 'start_date', 'end_date')),
+}
+
+
+def record_to_dict(kind, record):
+    result = {}
+    for field in RECORD_TYPES[kind][2]:
+        value = getattr(record, field)
+        result[field] = value.isoformat() if field.endswith('_date') and value is not None else value
+    return result
+
+
+def timeline_to_dict(user):
+    return {kind: [record_to_dict(kind, record) for record in getattr(user, kind)] for kind in RECORD_TYPES}
+
+
+def parse_timeline(payload):
+    # {"academic_records": [...], "career_records": [...]} → {kind: [(record_id หรือ None, values)]}
+    # ส่งมาเฉพาะ timeline ที่ต้องการแทนที่ก็ได้ (ValueError ถ้าข้อมูลไม่ถูกต้อง)
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+
+    timeline = {}
+    for kind, (_, to_values, _) in RECORD_TYPES.items():
+        if kind not in payload:
+            continue
+        items = payload[kind]
+        if not isinstance(items, list):
+            raise ValueError(f"{kind} must be a list")
+        if len(items) > MAX_RECORDS:
+            raise ValueError(f"Too many {kind} (max {MAX_RECORDS})")
+
+        parsed = []
+        seen = set()
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise ValueError(f"{kind}[{index}] must be an object")
+            record_id = item.get('record_id')
+            if record_id is not None:
+                if not isinstance(record_id, int) or isinstance(record_id, bool):
+                    raise ValueError(f"{kind}[{index}].record_id must be an integer")
+                if record_id in seen:
+                    raise ValueError(f"{kind}[{index}].record_id is duplicated")
+                seen.add(record_id)
+            try:
+                parsed.append((record_id, to_values(item)))
+            except ValueError as e:
+                raise ValueError(f"{kind}[{index}]: {e}")
+        timeline[kind] = parsed
+
+    if not timeline:
+        raise ValueError(f"At least one of {', '.join(RECORD_TYPES)} is required")
+    return timeline
+
+
+def apply_timeline(session, user, timeline):
+    # แทนที่ timeline ของ user (ต้องโหลด collection มาแล้ว เช่น selectinload)
+    # รายการที่มี record_id → แก้แถวเดิม, ไม่มี → เพิ่มใหม่, แถวเดิมที่ไม่อยู่ใน list → ลบ
+    # ตรวจ record_id ทั้งหมดก่อนแก้อะไร (ValueError ถ้าไม่ใช่ของ user นี้)
+    for kind, items in timeline.items():
+        existing = {record.record_id for record in getattr(user, kind)}
+        for record_id, _ in items:
+            if record_id is not None and record_id not in existing:
+                raise ValueError(f"{kind}: record {record_id} not found")
+
+    # DELETE / UPDATE / INSERT อย่างละหนึ่ง statement (executemany) ต่อ timeline ไม่ว่าจะมีกี่รายการ
+    # (flush ของ ORM จะ INSERT ทีละแถวเพื่อเอา record_id กลับมา)
+    for kind, items in timeline.items():
+        model = RECORD_TYPES[kind][0]
+        records = getattr(user, kind)
+        kept = {record_id for record_id, _ in items if record_id is not None}
+
+        # ไม่ sync object ใน session ทีละตัว → expire ทั้ง timeline ด้านล่างแทน
+        options = {'synchronize_session': False}
+        removed = [record.record_id for record in records if record.record_id not in kept]
+        if removed:
+            session.execute(delete(model).where(model.record_id.in_(removed)), execution_options=options)
+        updates = [dict(values, record_id=record_id) for record_id, values in items if record_id is not None]
+        if updates:
+            session.execute(update(model), updates, execution_options=options)
+        inserts = [dict(values, user_id=user.id) for record_id, values in items if record_id is None]
+        if inserts:
+            session.execute(insert(model), inserts)
+
+        # โหลด timeline ใหม่ (หนึ่ง query) ตอนถูกอ่านครั้งถัดไป
+        for record in records:
+            session.expire(record)
+        session.expire(user, [kind])
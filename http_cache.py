@@ -0,0 +1,303 @@
+import asyncio
+import gzip
+import hashlib
+import inspect
+import os
+import time
+from functools import wraps
+
+from flask import current_app, g, request
+from sqlalchemy import BigInteger, String, column, event, insert, select, table, update
+from sqlalchemy.exc import IntegrityError
+
+from cache import MemoryCache, RedisCache
+
+# brotli บีบได้เล็กกว่า gzip สำหรับ JSON ถ้าไม่ได้ติดตั้งจะใช้ gzip อย่างเดียว
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+ENCODING_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+# ไม่เก็บผลที่บีบแล้วของ response ที่ใหญ่เกินนี้ (เช่น /graduate-data ทั้งตาราง)
+MAX_CACHED_BODY = 1024 * 1024
+
+# ตาราง table_versions (models.TableVersion) ใช้เมื่อ cache ไม่ได้แชร์ระหว่าง worker
+VERSIONS = table('table_versions', column('table_name', String), column('version', BigInteger))
+
+# ตารางที่มีคนใช้ version (ตาราง tables ของ cache_policy, lookup table) → bump เฉพาะตารางเหล่านี้
+# commit ที่เขียนแค่ตารางอื่น (เช่น users ตอน login / signup) ไม่ต้อง UPDATE table_versions
+TRACKED_TABLES = set()
+
+
+def track_tables(*tables):
+    TRACKED_TABLES.update(tables)
+
+
+class TableVersions:
+    # version ของแต่ละตาราง เปลี่ยนค่าทุกครั้งที่ transaction ที่เขียนตารางนั้น commit
+    # → ใช้เป็น ETag / version ของ cache ใน memory โดยไม่ต้องรัน query ของ view หรือ hash body
+    # - CACHE_BACKEND=redis: เก็บใน Redis (แชร์ทุก worker) bump หลัง commit; ถ้าหายจาก cache จะสุ่มค่าใหม่
+    #   ซึ่งแค่ทำให้ client โหลดใหม่หนึ่งครั้ง
+    # - memory (cache ต่อ worker): worker อื่นไม่เห็นการ bump ใน memory → เก็บเป็นตัวนับในตาราง table_versions แทน
+    #   UPDATE ใน transaction เดียวกับข้อมูล (ก่อน commit) และอ่านจาก primary แล้วจำไว้ใน worker TABLE_VERSION_TTL วินาที
+    #   → ไม่ต้องไป primary ทุก request; commit ของ worker นี้ล้างค่าที่จำไว้ทันที ของ worker อื่นเห็นภายใน TTL
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.shared = False
+        self.ttl = 1.0
+        self._local = None
+
+    def init_app(self, app):
+        # เรียกหลัง cache.init_app
+        app.extensions['table_versions'] = self
+        self.shared = isinstance(self.cache.backend, RedisCache)
+        self.ttl = app.config.get('TABLE_VERSION_TTL', self.ttl)
+        self._local = MemoryCache(max_entries=256, default_ttl=self.ttl) if self.ttl else None
+        self.watch(app.extensions['sqlalchemy'].session.session_factory.class_)
+
+    def watch(self, session_class):
+        # ฟัง commit ของ session class นี้ (session ของ Flask-SQLAlchemy และ session ที่อยู่ใต้ AsyncSession)
+        for name, listener in (('after_flush', self._after_flush), ('do_orm_execute', self._do_orm_execute),
+                               ('before_commit', self._before_commit), ('after_commit', self._after_commit),
+                               ('after_rollback', self._after_rollback)):
+            if not event.contains(session_class, name, listener):
+                event.listen(session_class, name, listener)
+
+    def _key(self, table):
+        return f"table-version:{table}"
+
+    def get(self, *tables, session=None):
+        # session: อ่านผ่าน session นี้ (เช่น session ที่อยู่ใต้ AsyncSession ใน run_sync) แทน connection ใหม่ของ primary
+        if not self.shared:
+            versions = [self._local.get(table) for table in tables] if self._local is not None else [None]
+            if None not in versions:
+                return versions
+            stmt = select(VERSIONS.c.table_name, VERSIONS.c.version).where(VERSIONS.c.table_name.in_(tables))
+            if session is not None:
+                rows = dict(session.execute(stmt).all())
+            else:
+                with current_app.extensions['sqlalchemy'].engine.connect() as conn:
+                    rows = dict(conn.execute(stmt).all())
+            versions = [str(rows.get(table, 0)) for table in tables]
+            if self._local is not None:
+                for table, version in zip(tables, versions):
+                    self._local.set(table, version)
+            return versions
+
+        versions = []
+        for table in tables:
+            version = self.cache.get(self._key(table))
+            if version is None:
+                version = self.bump(table)[table]
+            versions.append(version)
+        return versions
+
+    def bump(self, *tables):
+        versions = {table: os.urandom(8).hex() for table in tables}
+        for table, version in versions.items():
+            self.cache.set(self._key(table), version, 0)
+        return versions
+
+    def touch(self, session, *names):
+        # bump version ของชื่อเหล่านี้ตอน session commit ด้วย (เช่น marker ที่ไม่ใช่ตารางที่ถูกเขียน)
+        session.info.setdefault('touched_tables', set()).update(names)
+
+    def _bump_rows(self, connection, tables):
+        # +1 ให้แถวของตารางที่เขียน (เพิ่มแถวถ้ายังไม่มี เช่น DB ที่สร้างด้วย create_all)
+        names = VERSIONS.c.table_name.in_(tables)
+        result = connection.execute(update(VERSIONS).where(names).values(version=VERSIONS.c.version + 1))
+        if result.rowcount == len(tables):
+            return
+        existing = set(connection.execute(select(VERSIONS.c.table_name).where(names)).scalars())
+        for table in sorted(set(tables) - existing):
+            try:
+                with connection.begin_nested():
+                    connection.execute(insert(VERSIONS).values(table_name=table, version=1))
+            except IntegrityError:
+                # transaction อื่นเพิ่มแถวไปพร้อมกัน
+                connection.execute(update(VERSIONS).where(VERSIONS.c.table_name == table)
+                                   .values(version=VERSIONS.c.version + 1))
+
+    # ---------- session events ----------
+
+    def _after_flush(self, session, flush_context):
+        touched = session.info.setdefault('touched_tables', set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            table = getattr(obj, '__tablename__', None)
+            if table:
+                touched.add(table)
+
+    def _do_orm_execute(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            table = getattr(orm_execute_state.statement, 'table', None)
+            if table is not None:
+                orm_execute_state.session.info.setdefault('touched_tables', set()).add(table.name)
+
+    def _before_commit(self, session):
+        if self.shared:
+            return
+        # flush ก่อนเพื่อให้รู้ตารางที่เขียนครบ แล้ว bump ใน transaction เดียวกัน (ถือ lock ของแถว version แค่ช่วง commit)
+        session.flush()
+        touched = session.info.get('touched_tables', set()) & TRACKED_TABLES
+        if touched:
+            self._bump_rows(session.connection(), sorted(touched))
+
+    def _after_commit(self, session):
+        touched = session.info.pop('touched_tables', set()) & TRACKED_TABLES
+        if not touched:
+            return
+        if self.shared:
+            self.bump(*touched)
+        elif self._local is not None:
+            # worker นี้เห็นการเขียนของตัวเองทันที
+            self._local.delete(*touched)
+
+    def _after_rollback(self, session):
+        session.info.pop('touched_tables', None)
+
+
+def _etag_candidates(etag):
+    return [etag] + [etag + suffix for suffix in ENCODING_SUFFIXES.values()]
+
+
+def cache_policy(tables=(), max_age=0, private=False, images=False):
+    # Cache-Control + ETag ของ route
+    # - tables: ETag คำนวณจาก version ของตารางเหล่านี้ + URL → If-None-Match ตรงกันตอบ 304 โดยไม่เรียก view
+    # - max_age: client ใช้ของเดิมได้กี่วินาทีโดยไม่ต้องถาม (0 = ถามทุกครั้งด้วย If-None-Match)
+    # - images: response มี signed URL ของรูป → เปลี่ยน ETag ทุกครึ่งหนึ่งของ IMAGE_URL_TTL ไม่ให้ URL หมดอายุค้างที่ client
+    # ต้องวางไว้เหนือ @read_only เพื่อให้ 304 ไม่ต้องแตะ DB
+    track_tables(*tables)
+
+    def decorator(view):
+        def precheck():
+            # คืนค่า (etag, response 304 หรือ None)
+            etag = None
+            versions = current_app.extensions.get('table_versions')
+            if tables and versions is not None:
+                # cached_json ใช้ version ชุดเดียวกันเป็น key ของ body → body ตรงกับ ETag เสมอ
+                g.table_versions = '|'.join(versions.get(*tables))
+                parts = [request.full_path, request.headers.get('Accept', ''), g.table_versions]
+                if images:
+                    period = max(current_app.config.get('IMAGE_URL_TTL', 3600) // 2, 1)
+                    parts.append(str(int(time.time() // period)))
+                etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+                matched = next((c for c in _etag_candidates(etag) if request.if_none_match.contains(c)), None)
+                if matched:
+                    response = current_app.response_class(status=304)
+                    _apply_policy(response, matched, max_age, private)
+                    return etag, response
+            return etag, None
+
+        def finish(rv, etag):
+            response = current_app.make_response(rv)
+            if response.status_code == 200:
+                _apply_policy(response, etag, max_age, private)
+            return response
+
+        if inspect.iscoroutinefunction(view):
+            # async view (routes/async_views.py)
+            @wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                versions = current_app.extensions.get('table_versions')
+                if tables and versions is not None and not versions.shared:
+                    # version อ่านจาก DB แบบ sync → รันใน thread ไม่ให้ event loop รอ
+                    etag, not_modified = await asyncio.to_thread(precheck)
+                else:
+                    etag, not_modified = precheck()
+                if not_modified is not None:
+                    return not_modified
+                return finish(await view(*args, **kwargs), etag)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, not_modified = precheck()
+            if not_modified is not None:
+                return not_modified
+            return finish(view(*args, **kwargs), etag)
+
+        return wrapper
+
+    return decorator
+
+
+def _apply_policy(response, etag, max_age, private):
+    if etag and not response.is_streamed:
+        response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+
+
+class Compressor:
+    # บีบอัด response (brotli ถ้า client รับได้และติดตั้งไว้, ไม่งั้น gzip) เมื่อใหญ่กว่า COMPRESS_MIN_SIZE
+    # ผลที่บีบแล้วเก็บไว้ตาม ETag + encoding → response เดิมซ้ำ ๆ บีบครั้งเดียว
+
+    def __init__(self, app=None):
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 5
+        self._compressed = MemoryCache(max_entries=256, default_ttl=0)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        app.extensions['compressor'] = self
+        app.after_request(self.after_request)
+
+    def _choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def after_request(self, response):
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose_encoding()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        key = f"{etag}:{encoding}" if etag else None
+        compressed = self._compressed.get(key) if key else None
+        if compressed is None:
+            compressed = self._compress(data, encoding)
+            if key and len(compressed) <= MAX_CACHED_BODY:
+                self._compressed.set(key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # ETag แบบ strong ต้องต่างกันตาม encoding
+            response.set_etag(etag + ENCODING_SUFFIXES[encoding], weak)
+        return response
@@ -0,0 +1,177 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import Counter, Histogram
+
+# วัดผลต่อ request: latency, จำนวน / เวลา SQL, จำนวน ORM object ที่โหลด, เวลา bcrypt และ blob I/O
+# ค่าสะสมต่อ endpoint ออกที่ /metrics, request ที่ช้ากว่า SLOW_REQUEST_MS จะถูก log พร้อม SQL ที่รัน
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('careertracker.slow_requests')
+
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint', ('endpoint', 'method', 'status'))
+REQUEST_SQL_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request', ('endpoint',), buckets=COUNT_BUCKETS)
+REQUEST_SQL_DURATION = Histogram(
+    'http_request_sql_duration_seconds', 'Total SQL time per request', ('endpoint',))
+REQUEST_ORM_OBJECTS = Histogram(
+    'http_request_orm_objects_loaded', 'ORM objects hydrated per request', ('endpoint',), buckets=COUNT_BUCKETS)
+SQL_DURATION = Histogram('db_statement_duration_seconds', 'SQL statement execution time')
+N_PLUS_ONE = Counter(
+    'http_request_n_plus_one_total', 'Requests that ran the same SQL statement repeatedly', ('endpoint',))
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds', 'bcrypt hash / check time including queueing', ('operation',))
+BLOB_DURATION = Histogram('blob_operation_duration_seconds', 'Blob storage I/O time', ('operation',))
+
+MAX_LOGGED_STATEMENTS = 50
+MAX_STATEMENT_LENGTH = 1000
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.orm_objects = 0
+        self.statement_counts = {}
+        self.statements = []       # (sql, วินาที) สำหรับ slow log
+        self.phases = {}           # เวลาสะสมของ bcrypt / blob ใน request นี้
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+def current_stats():
+    if has_request_context():
+        return g.get('request_stats')
+    return None
+
+
+@contextmanager
+def timed(histogram, phase, **labels):
+    # จับเวลาช่วงหนึ่ง → histogram และบวกเข้าเวลาของ request ปัจจุบัน (ถ้ามี)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        stats = current_stats()
+        if stats is not None:
+            stats.add_phase(phase, elapsed)
+
+
+# ---------- SQLAlchemy events ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    SQL_DURATION.observe(elapsed)
+
+    stats = current_stats()
+    if stats is None:
+        return
+    stats.sql_count += 1
+    stats.sql_time += elapsed
+    stats.statement_counts[statement] = stats.statement_counts.get(statement, 0) + 1
+    if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+        stats.statements.append((statement, elapsed))
+
+
+def _handle_error(context):
+    # statement ที่ error จะไม่ถึง after_cursor_execute → ทิ้งเวลาเริ่มที่ค้างไว้
+    starts = context.connection.info.get('query_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _on_load(target, context):
+    stats = current_stats()
+    if stats is not None:
+        stats.orm_objects += 1
+
+
+class Instrumentation:
+
+    def __init__(self, app=None):
+        self.slow_request_ms = 0
+        self.n_plus_one_threshold = 10
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', self.slow_request_ms)
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+        app.extensions['instrumentation'] = self
+
+        # ฟังที่ class Engine → ครอบคลุมทุก engine (primary, replica) รวมถึงที่สร้างทีหลัง
+        for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                               ('after_cursor_execute', _after_cursor_execute),
+                               ('handle_error', _handle_error)):
+            if not event.contains(Engine, name, listener):
+                event.listen(Engine, name, listener)
+
+        model = app.extensions['sqlalchemy'].Model
+        if not event.contains(model, 'load', _on_load):
+            event.listen(model, 'load', _on_load, propagate=True)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g.request_stats = RequestStats()
+
+    def _after_request(self, response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats.start
+        # ใช้ชื่อ endpoint (ไม่ใช่ path) เพื่อไม่ให้ label มีค่าไม่จำกัด
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_DURATION.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_SQL_STATEMENTS.observe(stats.sql_count, endpoint=endpoint)
+        REQUEST_SQL_DURATION.observe(stats.sql_time, endpoint=endpoint)
+        REQUEST_ORM_OBJECTS.observe(stats.orm_objects, endpoint=endpoint)
+
+        repeated = {sql: count for sql, count in stats.statement_counts.items() if count >= self.n_plus_one_threshold}
+        if repeated:
+            N_PLUS_ONE.inc(endpoint=endpoint)
+            sql, count = max(repeated.items(), key=lambda item: item[1])
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", endpoint, count,
+                           sql[:MAX_STATEMENT_LENGTH])
+
+        if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+            slow_logger.warning(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "sql_count": stats.sql_count,
+                "sql_ms": round(stats.sql_time * 1000, 1),
+                "orm_objects": stats.orm_objects,
+                **{f"{phase}_ms": round(seconds * 1000, 1) for phase, seconds in stats.phases.items()},
+                "statements": [
+                    {"sql": sql[:MAX_STATEMENT_LENGTH], "ms": round(seconds * 1000, 2)}
+                    for sql, seconds in stats.statements
+                ],
+            }, ensure_ascii=False))
+
+        return response
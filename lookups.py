@@ -0,0 +1,241 @@
+import threading
+import unicodedata
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import exists, literal, null, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+
+from extension import db, table_versions
+from http_cache import track_tables
+from models import Company, Position, Faculty, Major, LookupAlias, GraduateProfile
+from search import REBUILD_MARKER
+from snapshot import mark_stale, snapshot_dir
+
+# ตารางชื่อหลัก (dictionary encoding) ของบริษัท / ตำแหน่ง / คณะ / สาขาของ graduate
+#
+# ชื่อที่กรอกมาถูก normalize เป็น key (NFKC, ไม่สนตัวพิมพ์ / ช่องว่าง / เครื่องหมาย, ตัด "บริษัท ... จำกัด (มหาชน)",
+# "Co., Ltd." ของชื่อบริษัท) แล้วหาใน lookup table + lookup_aliases → "SCB", "scb " และ "Siam Commercial Bank"
+# (ถ้าเพิ่ม alias ไว้ด้วย `flask add-lookup-alias`) ได้ id เดียวกัน และเก็บชื่อหลักลงคอลัมน์ชื่อของ profile
+#
+# key → id ของแต่ละ kind ถูกโหลดทั้งตารางเก็บไว้ใน memory ของ worker (ตารางเล็ก) และโหลดใหม่เมื่อ version ของตาราง
+# (TableVersions, เปลี่ยนทุกครั้งที่มี commit) เปลี่ยน → filter แปลงชื่อเป็น id ได้โดยไม่ต้อง query
+# ชื่อที่ไม่มีใน map จะถูกหาใน DB อีกครั้งเสมอ (ไม่ตอบว่า "ไม่มี" จาก map ที่อาจยังไม่ได้โหลดใหม่)
+
+KINDS = {
+    'company': Company,
+    'position': Position,
+    'faculty': Faculty,
+    'major': Major,
+}
+
+# _entries โหลด map ใหม่ตาม version ของตารางเหล่านี้
+track_tables(*(model.__tablename__ for model in KINDS.values()), LookupAlias.__tablename__)
+
+# คอลัมน์ชื่อใน GraduateProfile → (kind, คอลัมน์ id) เรียงตามลำดับที่ resolve (ชื่อแรกที่พบเป็นชื่อหลัก → career ก่อน internship)
+PROFILE_FIELDS = {
+    'faculty': ('faculty', 'faculty_id'),
+    'major': ('major', 'major_id'),
+    'career_company': ('company', 'career_company_id'),
+    'career_position': ('position', 'career_position_id'),
+    'internship_company': ('company', 'internship_company_id'),
+    'internship_position': ('position', 'internship_position_id'),
+}
+
+# คำบอกประเภทบริษัทที่ตัดออกจาก key (หัว / ท้ายชื่อเท่านั้น) เทียบหลัง NFKC (สระอำใน "จำกัด" ถูกแยกเป็นนิคหิต + สระอา)
+COMPANY_PREFIXES = frozenset(unicodedata.normalize('NFKC', word) for word in ('บริษัท', 'บจก', 'บมจ', 'หจก'))
+COMPANY_SUFFIXES = frozenset(unicodedata.normalize('NFKC', word) for word in (
+    'จำกัด', 'มหาชน', 'co', 'company', 'ltd', 'limited', 'inc', 'corp', 'corporation', 'pcl', 'plc', 'public'))
+
+KEY_LENGTH = 100
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+
+def clean(value):
+    # ชื่อที่ใช้แสดง: ตัดช่องว่างหัวท้าย / ช่องว่างซ้ำ
+    return ' '.join(value.split())[:KEY_LENGTH] if value else ''
+
+
+def normalize(kind, value):
+    # key สำหรับเทียบชื่อ ("" ถ้าไม่มีตัวอักษรเลย)
+    text = unicodedata.normalize('NFKC', value or '').casefold()
+    # เครื่องหมาย / สัญลักษณ์ / ช่องว่าง → แบ่งคำ (สระ / วรรณยุกต์ไทยเป็น Mn ไม่ถูกตัด)
+    words = ''.join(' ' if unicodedata.category(char)[0] in 'PSZC' else char for char in text).split()
+    if kind == 'company':
+        while len(words) > 1 and words[0] in COMPANY_PREFIXES:
+            words.pop(0)
+        while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+            words.pop()
+    return ' '.join(words)[:KEY_LENGTH]
+
+
+def _entries(session, kind):
+    # (version, {key: id}, {id: ชื่อหลัก}) ของ kind นี้ โหลดใหม่เมื่อตารางถูกแก้
+    model = KINDS[kind]
+    # อ่าน version ก่อนโหลด: ถ้ามี commit ระหว่างโหลด version จะเปลี่ยนอีกรอบแล้วโหลดใหม่ครั้งถัดไป
+    version = tuple(table_versions.get(model.__tablename__, LookupAlias.__tablename__, session=session))
+    entries = _loaded.get(kind)
+    if entries is not None and entries[0] == version:
+        return entries
+
+    with _load_lock:
+        entries = _loaded.get(kind)
+        if entries is not None and entries[0] == version:
+            return entries
+        ids, names = {}, {}
+        for lookup_id, name, key in session.execute(select(model.id, model.name, model.name_key)):
+            ids[key] = lookup_id
+            names[lookup_id] = name
+        aliases = select(LookupAlias.alias_key, LookupAlias.target_id).where(LookupAlias.kind == kind)
+        for key, target_id in session.execute(aliases):
+            if target_id in names:
+                ids[key] = target_id
+        entries = _loaded[kind] = (version, ids, names)
+        return entries
+
+
+def _find_key(session, kind, key, entries, remember=True):
+    # (id, ชื่อหลัก) หรือ None; ไม่มีใน memory → ถาม DB (แถวอาจเพิ่งถูกเพิ่มโดย worker อื่น)
+    # remember: เติมลง map ของ worker (ห้ามใช้ใน transaction ที่อาจเห็นแถวที่ยังไม่ commit)
+    _, ids, names = entries
+    lookup_id = ids.get(key)
+    if lookup_id is not None:
+        return lookup_id, names[lookup_id]
+
+    model = KINDS[kind]
+    # seek ด้วย primary key ของ lookup_aliases และ unique name_key (alias มาก่อน เหมือน _entries)
+    by_alias = (
+        select(model.id, model.name, literal(0).label('priority'))
+        .join(LookupAlias, LookupAlias.target_id == model.id)
+        .where(LookupAlias.kind == kind, LookupAlias.alias_key == key)
+    )
+    by_name = select(model.id, model.name, literal(1).label('priority')).where(model.name_key == key)
+    row = session.execute(union_all(by_alias, by_name).order_by('priority').limit(1)).first()
+    if row is None:
+        return None
+    if remember:
+        with _load_lock:
+            names[row.id] = row.name
+            ids[key] = row.id
+    return row[0], row[1]
+
+
+def find(session, kind, value):
+    # id ของชื่อนี้ หรือ None ถ้ายังไม่มีใน lookup table (ไม่เพิ่มแถวใหม่)
+    key = normalize(kind, value)
+    found = _find_key(session, kind, key, _entries(session, kind)) if key else None
+    return found[0] if found else None
+
+
+def find_all(session, kind, values):
+    entries = _entries(session, kind)
+    keys = dict.fromkeys(key for key in (normalize(kind, value) for value in values) if key)
+    found = (_find_key(session, kind, key, entries) for key in keys)
+    return list(dict.fromkeys(row[0] for row in found if row))
+
+
+def _create(session, kind, name, key):
+    model = KINDS[kind]
+    try:
+        # savepoint: ถ้า request อื่นเพิ่มชื่อเดียวกันไปพร้อมกัน (unique name_key) จะย้อนแค่ insert นี้
+        with session.begin_nested():
+            row = model(name=name, name_key=key)
+            session.add(row)
+        return row.id, name
+    except IntegrityError:
+        return tuple(session.execute(select(model.id, model.name).where(model.name_key == key)).one())
+
+
+class Resolver:
+    # แปลงชื่อเป็น (id, ชื่อหลัก) ภายใน transaction เดียว (เช่นหนึ่ง batch ของ bulk import)
+    # อ่าน version / cache ครั้งเดียวต่อ kind และจำผลของแต่ละชื่อ (รวมแถวที่เพิ่มใน transaction นี้ซึ่งยังไม่ commit)
+
+    def __init__(self, session):
+        self.session = session
+        self.entries = {}
+        self.resolved = {}
+
+    def resolve(self, kind, value):
+        # เพิ่มแถวใหม่ถ้ายังไม่มี (ชื่อแรกที่พบเป็นชื่อหลัก)
+        name = clean(value)
+        key = normalize(kind, name)
+        if not key:
+            return None, value
+
+        if (kind, key) not in self.resolved:
+            if kind not in self.entries:
+                self.entries[kind] = _entries(self.session, kind)
+            found = _find_key(self.session, kind, key, self.entries[kind], remember=False)
+            self.resolved[(kind, key)] = found or _create(self.session, kind, name, key)
+        return self.resolved[(kind, key)]
+
+    def canonicalize(self, values):
+        # แทนชื่อใน values (จาก graduate_values) ด้วยชื่อหลัก และใส่ id ของ lookup table (แก้ values ในที่)
+        for field, (kind, id_field) in PROFILE_FIELDS.items():
+            if field in values:
+                values[id_field], values[field] = self.resolve(kind, values[field])
+        return values
+
+
+def canonicalize(session, values):
+    return Resolver(session).canonicalize(values)
+
+
+def used_names(kind, column, include_null=False):
+    # ชื่อหลักที่มี graduate ใช้อยู่: วนตาม lookup table (เล็ก) แล้ว seek index (column, id) ของ graduate_profiles
+    # แทน SELECT DISTINCT ทั้งตาราง
+    model = KINDS[kind]
+    stmt = select(model.name).where(exists().where(column == model.id)).order_by(model.name)
+    if include_null:
+        # เหมือน SELECT DISTINCT เดิม: มี NULL ถ้ามี graduate ที่ไม่ได้กรอก
+        stmt = union_all(stmt.order_by(None), select(null()).where(exists().where(column.is_(None))))
+    return stmt
+
+
+@click.command('add-lookup-alias')
+@click.argument('kind', type=click.Choice(sorted(KINDS)))
+@click.argument('alias')
+@click.argument('target')
+@with_appcontext
+def add_lookup_alias_command(kind, alias, target):
+    """Map ALIAS to the existing TARGET name and merge profiles that used ALIAS."""
+    session = db.session
+    model = KINDS[kind]
+    target_id = find(session, kind, target)
+    if target_id is None:
+        raise click.ClickException(f"{kind} {target!r} not found")
+    alias_key = normalize(kind, alias)
+    if not alias_key:
+        raise click.ClickException("alias is empty")
+
+    # ถ้า alias เคยถูกเพิ่มเป็นแถวของตัวเอง → ย้าย profile ไปที่ target แล้วลบแถวเดิม
+    old_id = find(session, kind, alias)
+    merged = 0
+    if old_id is not None and old_id != target_id:
+        target_name = session.get(model, target_id).name
+        for field, (field_kind, id_field) in PROFILE_FIELDS.items():
+            if field_kind != kind:
+                continue
+            id_column = getattr(GraduateProfile, id_field)
+            result = session.execute(
+                update(GraduateProfile)
+                .where(id_column == old_id)
+                .values({id_field: target_id, field: target_name})
+            )
+            merged += result.rowcount
+        session.execute(update(LookupAlias).where(LookupAlias.kind == kind, LookupAlias.target_id == old_id)
+                        .values(target_id=target_id))
+        session.delete(session.get(model, old_id))
+        # search index ของทุก worker ยังมี profile เหล่านี้ภายใต้ชื่อเดิม → ให้สร้างใหม่
+        if merged:
+            table_versions.touch(session, REBUILD_MARKER)
+
+    session.merge(LookupAlias(kind=kind, alias_key=alias_key, target_id=target_id))
+    session.commit()
+
+    if merged:
+        # snapshot ของ graduate_profiles append ตาม id → แถวที่ถูก merge ต้องเขียนใหม่
+        mark_stale(snapshot_dir(), GraduateProfile.__tablename__)
+    click.echo(f"{kind} {alias_key!r} -> {target_id} (merged {merged} profile field(s))")
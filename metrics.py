@@ -0,0 +1,290 @@
+import atexit
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, abort, current_app, request
+
+logger = logging.getLogger(__name__)
+
+# Registry แบบเล็ก ๆ ที่ render เป็น Prometheus text format
+#
+# ค่าถูกเก็บใน memory ของแต่ละ process / gunicorn worker แต่ scrape หนึ่งครั้งไปถึง worker เดียว
+# → (METRICS_MULTIPROCESS) แต่ละ worker เขียนค่าของตัวเองลงไฟล์ <METRICS_DIR>/<pid ของ master>/<pid>.json
+#   ทุก METRICS_FLUSH_SECONDS แล้ว /metrics รวมไฟล์ของทุก worker ภายใต้ master เดียวกัน
+# - counter / histogram: รวมกันทุก worker (รวม worker ที่ตายไปแล้ว ไม่ให้ค่าลดลงเมื่อ gunicorn restart worker)
+# - gauge: ค่าของแต่ละ worker ที่ยังทำงานอยู่ แยกด้วย label pid
+# ค่าของ worker อื่นช้ากว่าจริงได้ไม่เกิน METRICS_FLUSH_SECONDS
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def render(self, items=None):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples(self.snapshot() if items is None else items))
+        return lines
+
+    def snapshot(self):
+        # [(label values, ค่า)] ที่ copy แล้ว (เขียนเป็น JSON ได้)
+        with self._lock:
+            return list(self._values.items())
+
+    def merge(self, snapshots):
+        # รวม snapshot ของหลาย process: [(pid, items)]
+        totals = {}
+        for _, items in snapshots:
+            for key, value in items:
+                totals[key] = totals.get(key, 0) + value
+        return list(totals.items())
+
+    def _reset_after_fork(self):
+        # process ลูกเริ่มนับจาก 0 (ค่าที่ติดมาจาก master ไม่ใช่ของ worker นี้)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        # คำนวณค่าตอน scrape (function คืนค่า {label tuple: value})
+        self._function = function
+
+    def snapshot(self):
+        if self._function is not None:
+            return list(self._function().items())
+        return super().snapshot()
+
+    def merge(self, snapshots):
+        # ค่าของแต่ละ worker ไม่ควรบวกกัน (เช่น utilization) → แยกด้วย label pid
+        return [(key + (pid,), value) for pid, items in snapshots for key, value in items]
+
+    def _samples(self, items):
+        labelnames = self.labelnames
+        if items and len(items[0][0]) > len(labelnames):
+            labelnames = labelnames + ('pid',)
+        return [f"{self.name}{_format_labels(labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+
+    def merge(self, snapshots):
+        totals = {}
+        for _, items in snapshots:
+            for key, (counts, count, total) in items:
+                state = totals.setdefault(key, [[0] * len(self.buckets), 0, 0.0])
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += count
+                state[2] += total
+        return [(key, tuple(state)) for key, state in totals.items()]
+
+    def _samples(self, items):
+        lines = []
+        for key, (counts, count, total) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, (('le', bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+        return lines
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MultiprocessStore:
+    # ไฟล์ค่า metric ของทุก worker ภายใต้ master (gunicorn / uvicorn --workers) เดียวกัน
+
+    def __init__(self, base, flush_seconds=5.0):
+        self.base = base
+        self.flush_seconds = flush_seconds
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return os.path.join(self.base, str(os.getppid()))
+
+    def start(self):
+        # เรียกตอน request แรกของแต่ละ process (หลัง fork แล้ว → ไม่มี thread ติดไปตอน gunicorn --preload fork)
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            os.makedirs(self.directory, exist_ok=True)
+            self._remove_dead_masters()
+            threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Writing metrics failed")
+
+    def _remove_dead_masters(self):
+        # ไฟล์ของ master ที่ไม่อยู่แล้ว (deploy ก่อนหน้า)
+        for name in os.listdir(self.base):
+            if name.isdigit() and int(name) != os.getppid() and not _pid_alive(int(name)):
+                shutil.rmtree(os.path.join(self.base, name), ignore_errors=True)
+
+    def flush(self):
+        data = {metric.name: metric.snapshot() for metric in REGISTRY}
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+
+    def collect(self):
+        # {ชื่อ metric: [(pid, items)]} จากไฟล์ของทุก worker (ของ process นี้อ่านจาก memory)
+        pid = os.getpid()
+        collected = {metric.name: [(str(pid), metric.snapshot())] for metric in REGISTRY}
+        gauges = {metric.name for metric in REGISTRY if isinstance(metric, Gauge)}
+        directory = self.directory
+        for file_name in os.listdir(directory):
+            name, extension = os.path.splitext(file_name)
+            if extension != '.json' or not name.isdigit() or int(name) == pid:
+                continue
+            try:
+                with open(os.path.join(directory, file_name), encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(int(name))
+            for metric_name, items in data.items():
+                if metric_name not in collected or (metric_name in gauges and not alive):
+                    continue
+                collected[metric_name].append((name, [(tuple(key), value) for key, value in items]))
+        return collected
+
+
+_store = None
+
+
+def render():
+    lines = []
+    if _store is None:
+        for metric in REGISTRY:
+            lines.extend(metric.render())
+    else:
+        collected = _store.collect()
+        for metric in REGISTRY:
+            lines.extend(metric.render(metric.merge(collected[metric.name])))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    # ถ้าตั้ง METRICS_TOKEN ไว้ต้องส่ง Authorization: Bearer <token>
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        abort(403)
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    global _store
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    if app.config.get('METRICS_MULTIPROCESS', True):
+        base = app.config.get('METRICS_DIR') or os.path.join(
+            '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), f"careertracker-metrics-{os.getuid()}")
+        _store = MultiprocessStore(base, app.config.get('METRICS_FLUSH_SECONDS', 5.0))
+        app.before_request(_store.start)
+    else:
+        _store = None
+
+
+def _reset_after_fork():
+    for metric in REGISTRY:
+        metric._reset_after_fork()
+    if _store is not None:
+        _store._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
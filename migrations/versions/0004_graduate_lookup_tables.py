@@ -0,0 +1,138 @@
+"""graduate lookup tables
+
+Revision ID: 0004_graduate_lookup_tables
+Revises: 0003_graduate_query_indexes
+Create Date: 2026-10-18 16:02:13.518240
+
+"""
+import unicodedata
+from collections import Counter, defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_graduate_lookup_tables'
+down_revision = '0003_graduate_query_indexes'
+branch_labels = None
+depends_on = None
+
+LOOKUP_TABLES = {
+    'company': 'companies',
+    'position': 'positions',
+    'faculty': 'faculties',
+    'major': 'majors',
+}
+
+# คอลัมน์ชื่อ → (kind, คอลัมน์ id, ชื่อ FK) เหมือน lookups.PROFILE_FIELDS
+PROFILE_FIELDS = {
+    'faculty': ('faculty', 'faculty_id', 'fk_graduate_profiles_faculty_id'),
+    'major': ('major', 'major_id', 'fk_graduate_profiles_major_id'),
+    'career_company': ('company', 'career_company_id', 'fk_graduate_profiles_career_company_id'),
+    'career_position': ('position', 'career_position_id', 'fk_graduate_profiles_career_position_id'),
+    'internship_company': ('company', 'internship_company_id', 'fk_graduate_profiles_internship_company_id'),
+    'internship_position': ('position', 'internship_position_id', 'fk_graduate_profiles_internship_position_id'),
+}
+
+INDEXED_FIELDS = ('faculty_id', 'major_id', 'career_company_id', 'career_position_id', 'internship_company_id')
+
+# สำเนาของ lookups.normalize ณ revision นี้ (migration ไม่ import โค้ดของ app)
+COMPANY_PREFIXES = frozenset(unicodedata.normalize('NFKC', word) for word in ('บริษัท', 'บจก', 'บมจ', 'หจก'))
+COMPANY_SUFFIXES = frozenset(unicodedata.normalize('NFKC', word) for word in (
+    'จำกัด', 'มหาชน', 'co', 'company', 'ltd', 'limited', 'inc', 'corp', 'corporation', 'pcl', 'plc', 'public'))
+
+
+def _normalize(kind, value):
+    text = unicodedata.normalize('NFKC', value or '').casefold()
+    words = ''.join(' ' if unicodedata.category(char)[0] in 'PSZC' else char for char in text).split()
+    if kind == 'company':
+        while len(words) > 1 and words[0] in COMPANY_PREFIXES:
+            words.pop(0)
+        while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+            words.pop()
+    return ' '.join(words)[:100]
+
+
+def _backfill():
+    # ชื่อที่สะกดต่างกันแต่ normalize แล้วเหมือนกันรวมเป็นแถวเดียว ชื่อหลัก = ชื่อที่ใช้บ่อยที่สุด
+    # จากนั้นอัปเดต profile ทีละ "ค่าเดิม" (จำนวนค่าที่ไม่ซ้ำ ไม่ใช่จำนวนแถว)
+    conn = op.get_bind()
+    graduates = sa.table('graduate_profiles', *(sa.column(name) for name in PROFILE_FIELDS),
+                         *(sa.column(id_field) for _, id_field, _ in PROFILE_FIELDS.values()))
+
+    counts = defaultdict(lambda: defaultdict(Counter))   # kind → key → Counter(ชื่อ)
+    raw_values = defaultdict(list)                       # field → [ค่าเดิม]
+    for field, (kind, _, _) in PROFILE_FIELDS.items():
+        column = graduates.c[field]
+        for value, count in conn.execute(sa.select(column, sa.func.count()).where(column.isnot(None)).group_by(column)):
+            key = _normalize(kind, value)
+            if key:
+                counts[kind][key][' '.join(value.split())[:100]] += count
+                raw_values[field].append(value)
+
+    resolved = {}   # (kind, key) → (id, ชื่อหลัก)
+    for kind, keys in counts.items():
+        table = sa.table(LOOKUP_TABLES[kind], sa.column('id'), sa.column('name'), sa.column('name_key'))
+        rows = [{'name': min(names.items(), key=lambda item: (-item[1], item[0]))[0], 'name_key': key}
+                for key, names in keys.items()]
+        if rows:
+            conn.execute(table.insert(), rows)
+        for lookup_id, name, key in conn.execute(sa.select(table.c.id, table.c.name, table.c.name_key)):
+            resolved[(kind, key)] = (lookup_id, name)
+
+    for field, (kind, id_field, _) in PROFILE_FIELDS.items():
+        params = []
+        for value in raw_values[field]:
+            lookup_id, name = resolved[(kind, _normalize(kind, value))]
+            params.append({'b_value': value, 'b_id': lookup_id, 'b_name': name})
+        if params:
+            conn.execute(
+                graduates.update()
+                .where(graduates.c[field] == sa.bindparam('b_value'))
+                .values({id_field: sa.bindparam('b_id'), field: sa.bindparam('b_name')}),
+                params,
+            )
+
+
+def upgrade():
+    for table in LOOKUP_TABLES.values():
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('name_key', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name_key')
+        )
+    op.create_table('lookup_aliases',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('alias_key', sa.String(length=100), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'alias_key')
+    )
+
+    with op.batch_alter_table('graduate_profiles', schema=None) as batch_op:
+        for kind, id_field, fk_name in PROFILE_FIELDS.values():
+            batch_op.add_column(sa.Column(id_field, sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(fk_name, LOOKUP_TABLES[kind], [id_field], ['id'])
+
+    _backfill()
+
+    # สร้าง index หลัง backfill (ไม่ต้องอัปเดต index ระหว่าง UPDATE ทั้งตาราง)
+    with op.batch_alter_table('graduate_profiles', schema=None) as batch_op:
+        for id_field in INDEXED_FIELDS:
+            batch_op.create_index(f'ix_graduate_profiles_{id_field}_id', [id_field, 'id'], unique=False)
+
+
+def downgrade():
+    # ชื่อใน graduate_profiles ยังเป็นชื่อหลักที่ backfill แล้ว (ย้อนการสะกดเดิมไม่ได้)
+    with op.batch_alter_table('graduate_profiles', schema=None) as batch_op:
+        for id_field in reversed(INDEXED_FIELDS):
+            batch_op.drop_index(f'ix_graduate_profiles_{id_field}_id')
+        for _, id_field, fk_name in reversed(PROFILE_FIELDS.values()):
+            batch_op.drop_constraint(fk_name, type_='foreignkey')
+            batch_op.drop_column(id_field)
+
+    op.drop_table('lookup_aliases')
+    for table in reversed(LOOKUP_TABLES.values()):
+        op.drop_table(table)
@@ -0,0 +1,33 @@
+"""drop graduate name indexes
+
+Revision ID: 0008_drop_graduate_name_indexes
+Revises: 0007_table_versions
+Create Date: 2026-10-18 21:36:40.127593
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_drop_graduate_name_indexes'
+down_revision = '0007_table_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filter ของ faculty / major / company / position ใช้ index ของคอลัมน์ *_id แล้ว (0004)
+    with op.batch_alter_table('graduate_profiles', schema=None) as batch_op:
+        batch_op.drop_index('ix_graduate_profiles_faculty_id')
+        batch_op.drop_index('ix_graduate_profiles_career_company_id')
+        batch_op.drop_index('ix_graduate_profiles_career_position_id')
+        batch_op.drop_index('ix_graduate_profiles_major_id')
+
+
+def downgrade():
+    with op.batch_alter_table('graduate_profiles', schema=None) as batch_op:
+        batch_op.create_index('ix_graduate_profiles_major_id', ['major', 'id'], unique=False)
+        batch_op.create_index('ix_graduate_profiles_career_position_id', ['career_position', 'id'], unique=False)
+        batch_op.create_index('ix_graduate_profiles_career_company_id', ['career_company', 'id'], unique=False)
+        batch_op.create_index('ix_graduate_profiles_faculty_id', ['faculty', 'id'], unique=False)
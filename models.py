@@ -22,6 +22,15 @@ class User(db.Model):
     student_profile = db.relationship('StudentProfile', backref='users', uselist=False)
     graduate_profile = db.relationship('GraduateProfile', backref='users', uselist=False)
 
+    # ประวัติการศึกษา / การทำงานหลายรายการ เรียงตามวันที่เริ่ม (ดู history.py)
+    # ตั้ง list ใหม่ทั้งก้อนได้ แถวที่ไม่อยู่ใน list แล้วจะถูกลบ (delete-orphan)
+    academic_records = db.relationship(
+        'AcademicRecord', cascade='all, delete-orphan',
+        order_by=lambda: (AcademicRecord.start_date, AcademicRecord.record_id))
+    career_records = db.relationship(
+        'CareerRecord', cascade='all, delete-orphan',
+        order_by=lambda: (CareerRecord.start_date, CareerRecord.record_id))
+
 class StudentProfile(db.Model):
     __tablename__ = 'student_profiles'
 
@@ -41,8 +50,50 @@ class StudentProfile(db.Model):
     academic_projects = db.Column(db.Text)
     profile_image = db.Column(db.String(255))
 
+class LookupTable(db.Model):
+    # ตารางชื่อหลักของบริษัท / ตำแหน่ง / คณะ / สาขา (ดู lookups.py)
+    # name = ชื่อที่แสดง, name_key = ชื่อที่ normalize แล้ว (ไม่สนตัวพิมพ์ / ช่องว่าง / เครื่องหมาย)
+    __abstract__ = True
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    name_key = db.Column(db.String(100), unique=True, nullable=False)
+
+class Company(LookupTable):
+    __tablename__ = 'companies'
+
+class Position(LookupTable):
+    __tablename__ = 'positions'
+
+class Faculty(LookupTable):
+    __tablename__ = 'faculties'
+
+class Major(LookupTable):
+    __tablename__ = 'majors'
+
+class LookupAlias(db.Model):
+    # ชื่ออื่นที่หมายถึงแถวเดียวกัน เช่น "Siam Commercial Bank" → SCB (kind = company / position / faculty / major)
+    __tablename__ = 'lookup_aliases'
+
+    kind = db.Column(db.String(20), primary_key=True)
+    alias_key = db.Column(db.String(100), primary_key=True)
+    target_id = db.Column(db.Integer, nullable=False)
+
 class GraduateProfile(db.Model):
     __tablename__ = 'graduate_profiles'
+    # index (คอลัมน์ที่ใช้ filter, id) ใช้ได้ทั้ง WHERE col = ? ORDER BY id และ SELECT DISTINCT col
+    # โดยไม่ต้อง scan ทั้งตาราง (ชื่อ index = ชื่อคอลัมน์ตามลำดับ)
+    # filter / dropdown ใช้คอลัมน์ *_id (integer) ส่วนคอลัมน์ชื่อเก็บชื่อหลักไว้ใช้แสดงผลและ sort
+    # คอลัมน์ชื่อไม่มี index ของตัวเอง (เหมือน full_name): sort ตามชื่อเรียงแถวที่ filter ด้วย *_id มาแล้ว
+    # date_of_employment เป็นทั้ง filter ช่วงวันที่และ sort จึงมี index
+    __table_args__ = (
+        db.Index('ix_graduate_profiles_date_of_employment_id', 'date_of_employment', 'id'),
+        db.Index('ix_graduate_profiles_faculty_id_id', 'faculty_id', 'id'),
+        db.Index('ix_graduate_profiles_major_id_id', 'major_id', 'id'),
+        db.Index('ix_graduate_profiles_career_company_id_id', 'career_company_id', 'id'),
+        db.Index('ix_graduate_profiles_career_position_id_id', 'career_position_id', 'id'),
+        db.Index('ix_graduate_profiles_internship_company_id_id', 'internship_company_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), unique=True, nullable=False)
@@ -74,11 +125,18 @@ class GraduateProfile(db.Model):
     career_task = db.Column(db.Text)
     career_experience = db.Column(db.Text)
 
+    faculty_id = db.Column(db.Integer, db.ForeignKey('faculties.id', name='fk_graduate_profiles_faculty_id'))
+    major_id = db.Column(db.Integer, db.ForeignKey('majors.id', name='fk_graduate_profiles_major_id'))
+    internship_company_id = db.Column(db.Integer, db.ForeignKey('companies.id', name='fk_graduate_profiles_internship_company_id'))
+    internship_position_id = db.Column(db.Integer, db.ForeignKey('positions.id', name='fk_graduate_profiles_internship_position_id'))
+    career_company_id = db.Column(db.Integer, db.ForeignKey('companies.id', name='fk_graduate_profiles_career_company_id'))
+    career_position_id = db.Column(db.Integer, db.ForeignKey('positions.id', name='fk_graduate_profiles_career_position_id'))
+
 class AcademicRecord(db.Model):
     __tablename__ = 'academic_records'
 
     record_id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     degree = db.Column(db.String(100))
     institution = db.Column(db.String(255))
     major = db.Column(db.String(100))
@@ -90,8 +148,25 @@ class CareerRecord(db.Model):
     __tablename__ = 'career_records'
 
     record_id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
     company = db.Column(db.String(100), nullable=False)
     position = db.Column(db.String(100))
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    # jti ของ JWT ที่ถูก revoke (logout) เก็บไว้จนกว่า token จะหมดอายุ (ดู revocation.py)
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+
+    # ตัวนับต่อตาราง เพิ่มทุก commit ที่เขียนตารางนั้น (ETag เมื่อ cache ไม่ได้แชร์ระหว่าง worker, ดู http_cache.TableVersions)
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
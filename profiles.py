@@ -0,0 +1,60 @@
+from datetime import datetime
+
+# แปลงข้อมูลจากฟอร์ม (key แบบ camelCase ของ frontend) เป็นค่าคอลัมน์ของ profile
+# ใช้ร่วมกันระหว่าง /data/student-form, /data/graduate-form และ bulk import
+
+def parse_date(data, field):
+    value = data.get(field, '')
+    if value and not isinstance(value, str):
+        raise ValueError(f"Invalid date format for {field}")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        raise ValueError(f"Invalid date format for {field}")
+
+
+def student_values(data):
+    # แปลงข้อมูลวันที่ให้เป็น date object
+    date_of_birth = parse_date(data, 'dateOfBirth')
+    year_of_enrollment = parse_date(data, 'yearOfEnrollment')
+
+    return dict(
+        full_name=data.get('full_name'),
+        student_id=data.get('studentId'),
+        gender=data.get('gender'),
+        date_of_birth=date_of_birth,
+        phone_number=data.get('phoneNumber'),
+        faculty=data.get('faculty'),
+        major=data.get('major'),
+        year_of_enrollment=year_of_enrollment,
+        current_academic_year=data.get('currentAcademicYear'),
+        extracurricular_activities=data.get('extracurricularActivities'),
+        academic_projects=data.get('academicProjects'),
+    )
+
+
+def graduate_values(data):
+    values = student_values(data)
+    date_of_employment = parse_date(data, 'dateOfEmployment')
+
+    internship_completed = data.get('internshipStatus') == "completed"
+    employed = data.get('careerStatus') == "employed"
+
+    values.update(
+        # เช็คสถานะ Internship ก่อนบันทึกข้อมูล
+        internship_status=data.get('internshipStatus'),
+        internship_company=data.get('internshipCompany') if internship_completed else None,
+        internship_position=data.get('internshipPosition') if internship_completed else None,
+        internship_duration=data.get('internshipDuration') if internship_completed else None,
+        internship_task=data.get('internshipTask') if internship_completed else None,
+        internship_experience=data.get('internshipExperience') if internship_completed else None,
+
+        # เช็คสถานะ Career ก่อนบันทึกข้อมูล
+        career_status=data.get('careerStatus'),
+        career_company=data.get('careerCompany') if employed else None,
+        career_position=data.get('careerPosition') if employed else None,
+        date_of_employment=date_of_employment,
+        career_task=data.get('careerTask') if employed else None,
+        career_experience=data.get('careerExperience') if employed else None,
+    )
+    return values
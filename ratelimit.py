@@ -0,0 +1,328 @@
+import fcntl
+import hashlib
+import ipaddress
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# Admission control ของ route ที่แพง (/auth/login, /auth/signup: bcrypt + DB)
+# ตรวจก่อนเข้า view ทั้งหมด → request ที่เกินโควต้าถูกปฏิเสธโดยไม่แตะ DB หรือ bcrypt
+#
+# 1. token bucket ต่อ IP และต่อ email (email ถูก hash ก่อนใช้เป็น key) → 429 + Retry-After
+# 2. จำนวน request ของ route นั้นที่กำลังทำงานพร้อมกันใน worker นี้ → 503 + Retry-After
+#
+# ที่เก็บ bucket (RATELIMIT_BACKEND):
+# - "shared": ตารางใน shared memory (mmap ไฟล์ใน /dev/shm) ทุก gunicorn worker ในเครื่องเดียวกันเห็นค่าเดียวกัน
+# - "redis": Lua script ใน Redis (แชร์ทุกเครื่อง / instance) ใช้ client ที่ส่งมาทาง RATELIMIT_REDIS_CLIENT ได้ (เช่น fakeredis)
+# - "memory": ต่อ process (development / worker เดียว)
+# ถ้า backend ใช้งานไม่ได้ (Redis ล่ม) จะปล่อย request ผ่านแทนการปิด login ทั้งระบบ
+
+RATELIMIT_REJECTIONS = Counter(
+    'ratelimit_rejections_total', 'Requests rejected by admission control', ('route', 'reason'))
+RATELIMIT_ERRORS = Counter('ratelimit_backend_errors_total', 'Rate limit checks that failed open')
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+RULE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d+(?:\.\d+)?)?\s*([a-z]*)\s*$')
+
+# ค่า default ต่อ route: (per IP, per email, concurrency ต่อ worker)
+DEFAULT_LIMITS = {
+    'login': ('30/minute', '10/15minute', 8),
+    'signup': ('10/hour', '3/hour', 4),
+}
+
+
+class Rule:
+    # "10/minute", "5/15minute", "100/3600" → bucket จุได้ count token, เติมเต็มใน period วินาที
+
+    def __init__(self, count, period):
+        if count <= 0 or period <= 0:
+            raise ValueError("rate limit count and period must be positive")
+        self.count = count
+        self.period = period
+        self.rate = count / period
+
+    @classmethod
+    def parse(cls, value):
+        if not value or value.strip().lower() == 'off':
+            return None
+        match = RULE_RE.match(value.lower())
+        if not match:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        count, multiplier, unit = match.groups()
+        if unit and unit.rstrip('s') not in PERIODS:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(int(count), float(multiplier or 1) * (PERIODS[unit.rstrip('s')] if unit else 1))
+
+
+def _refill(tokens, updated, now, capacity, rate):
+    return min(capacity, tokens + max(now - updated, 0) * rate)
+
+
+def _take(tokens, capacity, rate, cost):
+    # คืนค่า (token ที่เหลือ, วินาทีที่ต้องรอ หรือ 0 ถ้าผ่าน)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class MemoryBuckets:
+    # bucket ภายใน process (LRU จำกัดจำนวน key)
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rule, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._data.pop(key, (rule.count, now))
+            tokens, wait = _take(_refill(tokens, updated, now, rule.count, rule.rate), rule.count, rule.rate, cost)
+            self._data[key] = (tokens, now)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return wait
+
+
+class SharedMemoryBuckets:
+    # ตาราง bucket ขนาดคงที่ใน mmap ที่ทุก worker เปิดไฟล์เดียวกัน
+    # แบ่งเป็น set ละ WAYS ช่อง (key เดียวกันอยู่ set เดียวกันเสมอ) ล็อกทีละ set ด้วย fcntl (ข้าม process)
+    # + threading.Lock (ข้าม thread ใน process เดียวกัน เพราะ fcntl lock เป็นของทั้ง process)
+    # set เต็ม → แทนที่ช่องที่ไม่ได้ใช้นานที่สุด (bucket ของ key นั้นเริ่มใหม่แบบเต็ม)
+    #
+    # ช่องละ 24 bytes: key hash (uint64, 0 = ว่าง), token ที่เหลือ, เวลาที่อัปเดต (time.monotonic ใช้ร่วมกันได้ทั้งเครื่อง)
+
+    SLOT = struct.Struct('<Qdd')
+    WAYS = 4
+    THREAD_LOCKS = 64
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.sets = max(slots // self.WAYS, 1)
+        self.size = self.sets * self.WAYS * self.SLOT.size
+        self._file = None
+        self._map = None
+        self._pid = None
+        self._thread_locks = None
+        self._open_lock = threading.Lock()
+
+    def _open(self):
+        # เปิด / map ไฟล์ครั้งแรกที่ใช้ในแต่ละ process (lock ของ thread ที่ค้างจาก process แม่ใช้ต่อไม่ได้หลัง fork)
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._open_lock:
+                if self._pid != pid:
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                    if os.fstat(fd).st_size < self.size:
+                        os.ftruncate(fd, self.size)
+                    self._file = fd
+                    self._map = mmap.mmap(fd, self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+                    self._thread_locks = [threading.Lock() for _ in range(self.THREAD_LOCKS)]
+                    self._pid = pid
+        return self._map
+
+    def take(self, key, rule, cost=1):
+        table = self._open()
+        digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+        index = digest % self.sets
+        start = index * self.WAYS * self.SLOT.size
+        length = self.WAYS * self.SLOT.size
+
+        with self._thread_locks[index % self.THREAD_LOCKS]:
+            fcntl.lockf(self._file, fcntl.LOCK_EX, length, start)
+            try:
+                now = time.monotonic()
+                slot = oldest = None
+                oldest_time = math.inf
+                for way in range(self.WAYS):
+                    offset = start + way * self.SLOT.size
+                    stored, tokens, updated = self.SLOT.unpack_from(table, offset)
+                    if stored == digest:
+                        slot = offset
+                        break
+                    if stored == 0 or updated < oldest_time:
+                        oldest, oldest_time = offset, (-math.inf if stored == 0 else updated)
+
+                if slot is None:
+                    slot, tokens, updated = oldest, rule.count, now
+                tokens, wait = _take(_refill(tokens, updated, now, rule.count, rule.rate), rule.count, rule.rate, cost)
+                self.SLOT.pack_into(table, slot, digest, tokens, now)
+            finally:
+                fcntl.lockf(self._file, fcntl.LOCK_UN, length, start)
+        return wait
+
+
+# คำนวณใน Redis ครั้งเดียว (atomic) ใช้เวลาของ Redis ไม่ใช่ของเครื่อง app ที่อาจไม่ตรงกัน
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+
+    def __init__(self, client, prefix='careertracker:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    def take(self, key, rule, cost=1):
+        return float(self._script(keys=[self.prefix + key], args=[rule.count, repr(rule.rate), cost]))
+
+
+class RouteLimits:
+
+    def __init__(self, per_ip, per_email, concurrency):
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+
+class RateLimiter:
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.backend = None
+        self.routes = {}
+        self.trusted_proxies = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        self.trusted_proxies = app.config.get('RATELIMIT_TRUSTED_PROXIES', 0)
+        self.routes = {}
+        for name, (per_ip, per_email, concurrency) in DEFAULT_LIMITS.items():
+            prefix = f"RATELIMIT_{name.upper()}"
+            self.routes[name] = RouteLimits(
+                Rule.parse(app.config.get(f"{prefix}_PER_IP") or per_ip),
+                Rule.parse(app.config.get(f"{prefix}_PER_EMAIL") or per_email),
+                app.config.get(f"{prefix}_CONCURRENCY", concurrency),
+            )
+
+        backend = app.config.get('RATELIMIT_BACKEND', 'shared')
+        if backend == 'redis':
+            client = app.config.get('RATELIMIT_REDIS_CLIENT')
+            if client is None:
+                import redis
+                client = redis.Redis.from_url(app.config.get('RATELIMIT_REDIS_URL') or app.config['CACHE_REDIS_URL'])
+            self.backend = RedisBuckets(client, app.config.get('CACHE_KEY_PREFIX', 'careertracker:') + 'ratelimit:')
+        elif backend == 'shared':
+            path = app.config.get('RATELIMIT_SHM_PATH') or os.path.join(
+                '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), f"careertracker-ratelimit-{os.getuid()}")
+            self.backend = SharedMemoryBuckets(path, app.config.get('RATELIMIT_SHM_SLOTS', 65536))
+        elif backend == 'memory':
+            self.backend = MemoryBuckets()
+        else:
+            raise ValueError(f"Unknown RATELIMIT_BACKEND: {backend}")
+
+        app.extensions['rate_limiter'] = self
+
+    def client_ip(self):
+        # หลัง reverse proxy (App Service front end) ใช้ X-Forwarded-For ตามจำนวน proxy ที่เชื่อถือ
+        # IPv6 นับรวมทั้ง /64 (เครื่องเดียวเปลี่ยน address ใน /64 ได้เอง)
+        address = request.remote_addr or ''
+        if self.trusted_proxies:
+            forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+            if len(forwarded) >= self.trusted_proxies:
+                address = forwarded[-self.trusted_proxies]
+        if address.count(':') == 1:
+            address = address.split(':')[0]  # "1.2.3.4:5678" จาก App Service
+        try:
+            ip = ipaddress.ip_address(address.strip('[]'))
+        except ValueError:
+            return address
+        if ip.version == 6:
+            if ip.ipv4_mapped:
+                return str(ip.ipv4_mapped)
+            return str(ipaddress.ip_network(f"{ip}/64", strict=False).network_address)
+        return str(ip)
+
+    def check(self, name, email=None):
+        # คืนค่า (reason, retry_after) ถ้าต้องปฏิเสธ, ไม่งั้น None
+        limits = self.routes[name]
+        checks = [('ip', limits.per_ip, self.client_ip())]
+        if email:
+            checks.append(('email', limits.per_email, hashlib.sha256(email.encode('utf-8')).hexdigest()[:32]))
+
+        for reason, rule, value in checks:
+            if rule is None:
+                continue
+            try:
+                wait = self.backend.take(f"{name}:{reason}:{value}", rule)
+            except Exception:
+                RATELIMIT_ERRORS.inc()
+                logger.warning("Rate limit backend unavailable, allowing request", exc_info=True)
+                return None
+            if wait > 0:
+                return reason, wait
+        return None
+
+
+def _reject(name, reason, status, retry_after, message):
+    RATELIMIT_REJECTIONS.inc(route=name, reason=reason)
+    return jsonify({"message": message}), status, {"Retry-After": str(max(int(math.ceil(retry_after)), 1))}
+
+
+def admission(name, email_field='email'):
+    # วางไว้บน view ของ route ที่แพง: ตรวจ bucket ต่อ IP / email แล้วจองที่ใน concurrency cap ของ route
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is None or not limiter.enabled:
+                return view(*args, **kwargs)
+
+            data = request.get_json(silent=True)
+            email = data.get(email_field) if isinstance(data, dict) else None
+            email = email.strip().lower() if isinstance(email, str) else None
+
+            rejected = limiter.check(name, email)
+            if rejected:
+                reason, retry_after = rejected
+                return _reject(name, reason, 429, retry_after, "Too many requests, please try again later.")
+
+            slots = limiter.routes[name].slots
+            if slots is None:
+                return view(*args, **kwargs)
+            if not slots.acquire(blocking=False):
+                return _reject(name, 'concurrency', 503, 1, "Server is busy, please try again.")
+            try:
+                return view(*args, **kwargs)
+            finally:
+                slots.release()
+
+        return wrapper
+
+    return decorator
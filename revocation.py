@@ -0,0 +1,184 @@
+import heapq
+import logging
+import os
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from extension import db
+from models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Revoke JWT (logout) โดยไม่เพิ่ม query ต่อ request ที่ต้อง login
+#
+# jti ที่ถูก revoke เก็บในตาราง revoked_tokens พร้อมเวลาหมดอายุของ token และถูกโหลดเข้า dict jti → exp
+# ใน memory ของแต่ละ worker → token_in_blocklist_loader เป็นแค่ `jti in dict` (ไม่ถึง 1 µs)
+# - โหลดทั้งตาราง (เฉพาะที่ยังไม่หมดอายุ) ตอน worker เริ่มก่อนรับ request (preload: gunicorn app:app, lifespan ของ asgi.py)
+#   app ที่สร้างเองโดยไม่ preload (test / CLI) จะโหลดใน request แรกที่ต้อง login แทน
+# - จากนั้นดึงเฉพาะแถวใหม่ (id > id ล่าสุด) ทุก REVOCATION_SYNC_SECONDS ใน background thread (request ไม่ต้องรอ query)
+#   → worker อื่นเห็นการ logout ภายในช่วงนี้
+# - jti ที่ token หมดอายุแล้วถูกลบออกจาก dict ตอน sync (heap เรียงตาม exp) เพราะ JWT ที่หมดอายุถูกปฏิเสธอยู่แล้ว
+#
+# ไม่ใช้ Bloom filter หน้า set: ใน CPython การ hash ของ set เร็วกว่าการคำนวณหลาย hash ของ Bloom filter
+# และ jti ที่ยังไม่หมดอายุ (ไม่เกินจำนวน logout ใน JWT_ACCESS_TOKEN_EXPIRES) ใช้ memory ไม่มาก
+
+# identity ของ SQL Server / sequence อาจ commit ไม่เรียงลำดับ → ดึงย้อนหลังจาก id ล่าสุดเท่านี้แถวทุกครั้ง
+SYNC_OVERLAP = 1000
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+class RevocationList:
+
+    def __init__(self, app=None):
+        self.sync_seconds = 1.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # เรียกหลัง JWTManager(app)
+        self.sync_seconds = app.config.get('REVOCATION_SYNC_SECONDS', self.sync_seconds)
+        app.extensions['revocation'] = self
+        if app.config.get('REVOCATION_ENABLED', True):
+            app.extensions['flask-jwt-extended'].token_in_blocklist_loader(self._check_token)
+
+        if hasattr(os, 'register_at_fork'):
+            # gunicorn --preload: thread ของ master ไม่ตามมาใน worker → ให้ worker เริ่ม sync เอง
+            ref = weakref.ref(self)
+
+            def reset_sync():
+                revocation = ref()
+                if revocation is not None:
+                    revocation._lock = threading.Lock()
+                    revocation._load_lock = threading.Lock()
+                    revocation._syncing = False
+
+            os.register_at_fork(after_in_child=reset_sync)
+
+    def _reset(self):
+        self._revoked = {}     # jti → exp (epoch วินาที)
+        self._expiry = []      # heap ของ (exp, jti) สำหรับลบ jti ที่หมดอายุ
+        self.max_id = 0
+        self.loaded = False
+        self._synced_at = 0.0
+        self._syncing = False
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def _check_token(self, jwt_header, jwt_payload):
+        return self.is_revoked(jwt_payload.get('jti'))
+
+    def load(self):
+        # โหลดทั้งรายการครั้งแรก (request ที่มาระหว่างโหลดรอ lock เดียวกัน ไม่ query ซ้ำ)
+        with self._load_lock:
+            if not self.loaded:
+                self.sync()
+
+    def preload(self, app):
+        # โหลดตอน worker เริ่ม → request แรกไม่ต้อง query เอง
+        # gunicorn --preload: โหลดใน master ครั้งเดียว worker ได้รายการไปตอน fork (ไม่ใช้ thread: fork ระหว่างที่
+        # thread อื่นถือ lock ของ DB driver อยู่ทำให้ worker ค้าง)
+        try:
+            with app.app_context():
+                self.load()
+        except Exception:
+            # DB ยังไม่พร้อม → ไม่ให้ worker start ไม่ขึ้น (โหลดตอน request แรกแทน)
+            logger.exception("Could not preload revoked tokens")
+
+    def is_revoked(self, jti):
+        if not self.loaded:
+            self.load()
+        elif time.monotonic() - self._synced_at >= self.sync_seconds and not self._syncing:
+            self._start_sync()
+        return jti in self._revoked
+
+    def _start_sync(self):
+        with self._lock:
+            if self._syncing:
+                return
+            self._syncing = True
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    self.sync()
+            except Exception:
+                logger.exception("Revocation list sync failed")
+            finally:
+                self._syncing = False
+
+        threading.Thread(target=run, name='revocation-sync', daemon=True).start()
+
+    def _add(self, jti, exp):
+        # เรียกขณะถือ self._lock (request อ่าน dict ได้โดยไม่ต้องรอ lock)
+        if jti not in self._revoked:
+            self._revoked[jti] = exp
+            heapq.heappush(self._expiry, (exp, jti))
+
+    def sync(self):
+        # ดึง jti ที่ยังไม่หมดอายุซึ่งถูก revoke หลัง sync ครั้งก่อน (ครั้งแรก = ทั้งตาราง) จาก primary
+        # (replica อาจยังไม่เห็นการ logout ล่าสุด)
+        now = time.time()
+        stmt = (
+            select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+            .where(RevokedToken.expires_at > _utc(now))
+        )
+        if self.loaded:
+            stmt = stmt.where(RevokedToken.id > self.max_id - SYNC_OVERLAP)
+        with db.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+
+        with self._lock:
+            for row_id, jti, expires_at in rows:
+                self._add(jti, expires_at.replace(tzinfo=timezone.utc).timestamp())
+                self.max_id = max(self.max_id, row_id)
+            # ลบ jti ที่ token หมดอายุแล้ว (ไล่จากหัว heap จนเจอตัวที่ยังไม่หมด)
+            while self._expiry and self._expiry[0][0] <= now:
+                _, jti = heapq.heappop(self._expiry)
+                self._revoked.pop(jti, None)
+            self.loaded = True
+            self._synced_at = time.monotonic()
+
+    def revoke(self, session, jti, expires, user_id=None):
+        # บันทึก jti (expires = exp ของ JWT เป็น epoch วินาที) แล้ว commit; worker นี้เห็นผลทันที
+        # worker อื่นเห็นภายใน REVOCATION_SYNC_SECONDS
+        try:
+            session.execute(insert(RevokedToken).values(
+                jti=jti, user_id=user_id, expires_at=_utc(expires), revoked_at=datetime.utcnow()))
+            session.commit()
+        except IntegrityError:
+            # revoke ไปแล้ว (logout ซ้ำ / พร้อมกัน)
+            session.rollback()
+        with self._lock:
+            self._add(jti, expires)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+revocation = RevocationList()
+
+
+@click.command('purge-revoked-tokens')
+@with_appcontext
+def purge_revoked_tokens_command():
+    """Delete revoked tokens that have already expired."""
+    result = db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    db.session.commit()
+    click.echo(f"Deleted {result.rowcount} expired revoked token(s)")
@@ -0,0 +1,76 @@
+from flask import Blueprint, request, jsonify
+from analytics import GROUP_FIELDS, employment_summary, top_employers, time_to_employment
+from db_routing import read_only
+from http_cache import cache_policy
+from serializers import json_response
+
+analytics_bp = Blueprint('analytics', __name__)
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 50
+ANALYTICS_MAX_AGE = 300
+
+
+def get_group_args():
+    # ?group_by=faculty|major|cohort และตัวกรอง ?faculty=&major=&cohort=
+    group_by = request.args.get('group_by') or None
+    if group_by is not None and group_by not in GROUP_FIELDS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_FIELDS)}")
+
+    filters = {field: request.args.get(field) for field in GROUP_FIELDS if request.args.get(field)}
+    if 'cohort' in filters:
+        try:
+            filters['cohort'] = int(filters['cohort'])
+        except ValueError:
+            raise ValueError("cohort must be a year, e.g. 2020")
+    return group_by, filters
+
+
+@analytics_bp.route('/employment', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), max_age=ANALYTICS_MAX_AGE)
+@read_only
+def get_employment():
+    # อัตราการได้งาน และอัตราที่ได้งานกับบริษัทที่ฝึกงาน
+    try:
+        group_by, filters = get_group_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    return json_response({"data": employment_summary(group_by, filters)})
+
+
+@analytics_bp.route('/top-employers', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), max_age=ANALYTICS_MAX_AGE)
+@read_only
+def get_top_employers():
+    # ?by=company|position&limit=10
+    try:
+        group_by, filters = get_group_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    try:
+        limit = int(request.args.get('limit', DEFAULT_TOP_N))
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+
+    by = request.args.get('by', 'company')
+    if by not in ('company', 'position'):
+        return jsonify({"status": "error", "message": "by must be 'company' or 'position'"}), 400
+    if limit < 1 or limit > MAX_TOP_N:
+        return jsonify({"status": "error", "message": f"limit must be between 1 and {MAX_TOP_N}"}), 400
+
+    return json_response({"data": top_employers(by, limit, group_by, filters)})
+
+
+@analytics_bp.route('/time-to-employment', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), max_age=ANALYTICS_MAX_AGE)
+@read_only
+def get_time_to_employment():
+    # จำนวนเดือนตั้งแต่เข้าเรียนจนได้งาน (mean / p25 / median / p75)
+    try:
+        group_by, filters = get_group_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    return json_response({"data": time_to_employment(group_by, filters)})
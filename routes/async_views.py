@@ -0,0 +1,308 @@
+import asyncio
+import logging
+
+from flask import Response, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+
+import lookups
+from accounts import get_profile, issue_access_token
+from extension import async_db, cache, search_index, uploads
+from graduate_query import build_statement, parse_query_args
+from http_cache import cache_policy
+from models import User, UserRole, StudentProfile, GraduateProfile
+from profiles import student_values, graduate_values
+from routes.data_routes import LOOKUP_MAX_AGE, get_image_type, get_limit, get_page_args, image_resolver, wants_ndjson
+from serializers import dumps, json_response, student_serializer, graduate_serializer
+
+logger = logging.getLogger(__name__)
+
+# async view ของ route ใน data_routes ที่ใช้เวลาส่วนใหญ่รอ Azure SQL / Azure Blob
+# ใช้เฉพาะตอนรันผ่าน asgi.py: view เหล่านี้รันบน event loop ด้วย async_db.session() และ blob client แบบ async
+# ส่วนตอนรันผ่าน WSGI (gunicorn app:app) ยังใช้ view เดิมใน data_routes ทั้งหมด
+#
+# - key คือ endpoint ของ view เดิม, query string / response เหมือนเดิมทุกอย่าง (รวม ETag จาก @cache_policy)
+# - request ที่ต้องตอบแบบ streaming (ndjson) หรือส่งทั้งตาราง → raise UseSyncView ให้ asgi.py ใช้ view เดิมใน thread pool
+#   (serialize ทั้งตารางบน event loop จะกัน request อื่นทั้งหมดของ worker)
+# - view ที่ไม่มีในนี้ (search, analytics, bulk import, snapshot ...) รันใน thread pool เหมือนกัน
+
+ASYNC_VIEWS = {}
+
+
+class UseSyncView(Exception):
+    # ให้ asgi.py ส่ง request นี้ไปที่ view แบบ sync แทน
+    pass
+
+
+def async_view(endpoint):
+    def decorator(view):
+        ASYNC_VIEWS[endpoint] = view
+        return view
+
+    return decorator
+
+
+def error(message, status):
+    return jsonify({"status": "error", "message": message}), status
+
+
+async def fetch_all(stmt, params=None):
+    async with async_db.session() as session:
+        return (await session.execute(stmt, params)).all()
+
+
+async def list_profiles(serializer):
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return error(str(e), 400)
+
+    if limit is None or wants_ndjson():
+        raise UseSyncView()
+
+    model = serializer.model
+    stmt = serializer.select()
+    if after is not None:
+        stmt = stmt.where(model.id > after)
+    rows = await fetch_all(stmt.order_by(model.id).limit(limit + 1))
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return json_response({"data": serializer.to_list(rows[:limit], image_resolver()), "next_cursor": next_cursor})
+
+
+async def graduates_where(*criteria):
+    stmt = graduate_serializer.select().where(*criteria).order_by(GraduateProfile.id)
+    return json_response(graduate_serializer.to_list(await fetch_all(stmt), image_resolver()))
+
+
+async def graduates_with(kind, name, column):
+    # เหมือน data_routes.graduates_with (แปลงชื่อเป็น id ปกติไม่ต้อง query เพราะ lookup table อยู่ใน memory)
+    async with async_db.session() as session:
+        lookup_id = await session.run_sync(lookups.find, kind, name)
+    if lookup_id is None:
+        return json_response([])
+    return await graduates_where(column == lookup_id)
+
+
+async def cached_json(key, stmt, skip_empty=True):
+    # เหมือน data_routes.cached_json แต่ query แบบ async
+    key = f"{key}:{g.get('table_versions', '')}"
+    body = cache.get(key)
+    if body is None:
+        body = dumps([value for value, in await fetch_all(stmt) if value or not skip_empty])
+        cache.set(key, body)
+    return Response(body, mimetype='application/json')
+
+
+@async_view('data.get_current_user')
+async def get_current_user():
+    verify_jwt_in_request()
+    async with async_db.session() as session:
+        user = await session.get(User, int(get_jwt_identity()), options=[
+            joinedload(User.student_profile),
+            joinedload(User.graduate_profile),
+        ])
+
+    if not user:
+        return error("User not found", 404)
+
+    if user.role not in (UserRole.student, UserRole.graduate):
+        return error("User role not assigned.", 400)
+
+    profile = get_profile(user)
+
+    if not profile:
+        return error("Profile not found.", 404)
+
+    return jsonify({
+        "full_name": profile.full_name,
+        "email": user.email,
+        "profile_image": image_resolver()(profile.profile_image),
+        "faculty": profile.faculty,
+        "major": profile.major
+    }), 200
+
+
+@async_view('data.get_student_data')
+@cache_policy(tables=('student_profiles',), images=True)
+async def get_student_data():
+    return await list_profiles(student_serializer)
+
+
+@async_view('data.get_graduate_data')
+@cache_policy(tables=('graduate_profiles',), images=True)
+async def get_graduate_data():
+    return await list_profiles(graduate_serializer)
+
+
+@async_view('data.get_graduates_by_faculty')
+@cache_policy(tables=('graduate_profiles',), images=True)
+async def get_graduates_by_faculty():
+    faculty = request.args.get('faculty')
+
+    if not faculty:
+        return error("Faculty is required", 400)
+
+    return await graduates_with('faculty', faculty, GraduateProfile.faculty_id)
+
+
+@async_view('data.get_graduates_by_company')
+@cache_policy(tables=('graduate_profiles',), images=True)
+async def get_graduates_by_company():
+    company_name = request.args.get('company', '').strip()
+
+    if not company_name:
+        return error("Company name is required", 400)
+
+    return await graduates_with('company', company_name, GraduateProfile.career_company_id)
+
+
+@async_view('data.get_graduates_by_career')
+@cache_policy(tables=('graduate_profiles',), images=True)
+async def get_graduates_by_career():
+    career_name = request.args.get('career', '').strip()
+
+    if not career_name:
+        return error("Career name is required", 400)
+
+    return await graduates_with('position', career_name, GraduateProfile.career_position_id)
+
+
+@async_view('data.query_graduates')
+@cache_policy(tables=('graduate_profiles',), images=True)
+async def query_graduates():
+    try:
+        query = parse_query_args(request.args)
+        limit = get_limit()
+    except ValueError as e:
+        return error(str(e), 400)
+
+    if wants_ndjson():
+        raise UseSyncView()
+
+    serializer = query.serializer
+    async with async_db.session() as session:
+        await session.run_sync(query.resolve_lookups)
+        rows = (await session.execute(build_statement(query.shape).limit(limit + 1), query.params)).all()
+    next_cursor = query.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return json_response({"data": serializer.to_list(rows[:limit], image_resolver()), "next_cursor": next_cursor})
+
+
+@async_view('data.get_faculties')
+@cache_policy(tables=('graduate_profiles',), max_age=LOOKUP_MAX_AGE)
+async def get_faculties():
+    stmt = lookups.used_names('faculty', GraduateProfile.faculty_id, include_null=True)
+    return await cached_json('faculties', stmt, skip_empty=False)
+
+
+@async_view('data.get_companies')
+@cache_policy(tables=('graduate_profiles',), max_age=LOOKUP_MAX_AGE)
+async def get_companies():
+    stmt = lookups.used_names('company', GraduateProfile.career_company_id)
+    try:
+        return await cached_json('companies', stmt)
+    except Exception as e:
+        return error(str(e), 500)
+
+
+@async_view('data.get_careers')
+@cache_policy(tables=('graduate_profiles',), max_age=LOOKUP_MAX_AGE)
+async def get_careers():
+    stmt = lookups.used_names('position', GraduateProfile.career_position_id)
+    try:
+        return await cached_json('careers', stmt)
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def save_profile(model, parse_values, invalid_image_message, prepare=None):
+    # บันทึก profile จากฟอร์ม โดยอัปโหลดรูปไปพร้อมกับงาน DB (โหลด user → insert → commit)
+    # แล้วใส่ URL รูปก่อนตอบกลับ (view แบบ sync ตอบก่อนแล้วค่อยอัปโหลดใน background)
+    # prepare(sync session, values): แก้ values ก่อน insert (รันผ่าน run_sync ใน transaction เดียวกัน)
+    # คืนค่า (error response หรือ None, user_id, role, values)
+    verify_jwt_in_request()
+    current_user_id = get_jwt_identity()
+    data = request.form.to_dict()
+
+    image = request.files.get('profileImage')
+    image_type = None
+    if 'profileImage' in request.files:
+        image_type = get_image_type(image)
+        if not image_type:
+            return error(invalid_image_message, 400), None, None, None
+
+    try:
+        values = parse_values(data)
+    except ValueError as e:
+        return error(str(e), 400), None, None, None
+
+    # ถ้า insert ล้มเหลวหลังอัปโหลดเสร็จแล้ว รูปจะค้างอยู่ใน storage โดยไม่มี profile อ้างถึง (เหมือน upload URL ที่ไม่ได้ confirm)
+    upload = None
+    if image_type:
+        image.stream.seek(0)
+        upload = asyncio.create_task(uploads.upload_async(image.stream.read(), image_type))
+
+    try:
+        async with async_db.session() as session:
+            user = await session.get(User, int(current_user_id))
+            if not user:
+                return error("User not found", 404), None, None, None
+
+            if prepare is not None:
+                await session.run_sync(prepare, values)
+
+            profile = model(
+                user_id=user.id,  # ใช้ user_id เชื่อมโยงกับ User
+                email=user.email,  # ใช้ email จาก User
+                profile_image=None,
+                **values
+            )
+            session.add(profile)
+            await session.commit()
+            profile_id = profile.id
+
+            # รอรูปหลัง commit แล้ว (ไม่ถือ transaction / lock ของ DB ไว้ระหว่างรอ blob storage)
+            if upload is not None:
+                try:
+                    image_url = await upload
+                except Exception:
+                    # รูปอัปโหลดไม่สำเร็จ → profile ไม่มีรูป (เหมือน upload ใน background ที่ล้มเหลว)
+                    logger.exception("Profile image upload failed for user %s", current_user_id)
+                else:
+                    await session.execute(update(model).where(model.id == profile_id).values(profile_image=image_url))
+                    await session.commit()
+
+            return None, current_user_id, user.role, dict(values, id=profile_id)
+    finally:
+        if upload is not None and not upload.done():
+            upload.cancel()
+
+
+@async_view('data.add_student')
+async def add_student():
+    response, current_user_id, role, _ = await save_profile(StudentProfile, student_values, "Invalid image file.")
+    if response is not None:
+        return response
+
+    return jsonify({
+        "status": "success",
+        "message": "Student profile created successfully",
+        "token": issue_access_token(current_user_id, role, True)  # ✅ token ใหม่ (has_profile = true)
+    }), 201
+
+
+@async_view('data.add_graduate')
+async def add_graduate():
+    response, current_user_id, role, values = await save_profile(GraduateProfile, graduate_values, "Invalid file type",
+                                                                prepare=lookups.canonicalize)
+    if response is not None:
+        return response
+
+    # ✅ เพิ่มเข้า search index ของ worker นี้ทันที (worker อื่นจะดึงเองตอน refresh)
+    search_index.add_profile(values.pop('id'), values)
+
+    return jsonify({
+        "status": "success",
+        "message": "Graduate profile created successfully",
+        "token": issue_access_token(current_user_id, role, True)  # ✅ token ใหม่ (has_profile = true)
+    }), 201
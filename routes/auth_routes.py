@@ -1,14 +1,25 @@
 from flask import Blueprint, request, jsonify
-from flask_bcrypt import Bcrypt
-from flask_jwt_extended import create_access_token
-from extension import db
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, unset_jwt_cookies
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
+from extension import db, hasher
+from accounts import get_profile, issue_access_token
+from hashing import HashingBusy
+from ratelimit import admission
+from revocation import revocation
 from models import User, UserRole, StudentProfile, GraduateProfile
 from datetime import datetime
-bcrypt = Bcrypt()
 auth_bp = Blueprint('auth', __name__)
 
 
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    # ✅ hashing pool เต็ม → ตอบ 503 ทันทีแทนการรอคิว
+    return jsonify({"message": "Server is busy, please try again."}), 503, {"Retry-After": "1"}
+
+
 @auth_bp.route('/signup', methods=['POST'])
+@admission('signup')
 def signup():
     data = request.json
     email = data.get('email', '').strip().lower()  # ✅ Trim & lowercase email
@@ -27,7 +38,7 @@ def signup():
         return jsonify({"message": "User with given email already exists."}), 400
 
     # ✅ Hash Password
-    hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+    hashed_password = hasher.generate_password_hash(password)
 
     # ✅ สร้าง User ใหม่ (กำหนด role เป็น unassigned)
     new_user = User(
@@ -46,6 +57,7 @@ def signup():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@admission('login')
 def login():
     data = request.json
     email = data.get('email', '').strip().lower()
@@ -54,24 +66,46 @@ def login():
     if not email or not password:
         return jsonify({"message": "Email and password are required."}), 400
 
-    # ✅ ตรวจสอบ email โดยใช้ lowercase
-    user = User.query.filter_by(email=email).first()
-    if not user or not bcrypt.check_password_hash(user.password_hash, password):
+    # ✅ ตรวจสอบ email โดยใช้ lowercase (โหลด profile มาพร้อมกันเพื่อใส่ใน JWT claims)
+    user = User.query.options(
+        joinedload(User.student_profile),
+        joinedload(User.graduate_profile),
+    ).filter_by(email=email).first()
+    if not user or not hasher.check_password_hash(user.password_hash, password):
         return jsonify({"message": "Invalid credentials."}), 401
 
-    # ✅ อัปเดต last_login ให้ใช้ datetime.utcnow()
-    user.last_login = datetime.utcnow()
+    user_id = user.id
+    role = user.role
+    has_profile = get_profile(user) is not None
+
+    # ✅ อัปเดต last_login (และ hash ใหม่ถ้า cost เก่า) ใน UPDATE เดียว
+    values = {"last_login": datetime.utcnow()}
+    if hasher.needs_rehash(user.password_hash):
+        values["password_hash"] = hasher.generate_password_hash(password)
+    db.session.execute(update(User).where(User.id == user_id).values(**values))
     db.session.commit()
 
     # ✅ ใช้ user.id เป็น identity ใน JWT
-    access_token = create_access_token(identity=str(user.id))
+    access_token = issue_access_token(user_id, role, has_profile)
 
     response = jsonify({
         "message": "Login successful.",
         "token": access_token,
-        "user_id": user.id,  # ✅ คืน user_id ให้ frontend ใช้ต่อ
-        "role": user.role.value  # ✅ คืน role ให้ frontend ใช้
+        "user_id": user_id,  # ✅ คืน user_id ให้ frontend ใช้ต่อ
+        "role": role.value  # ✅ คืน role ให้ frontend ใช้
     })
 
     response.headers["X-Content-Type-Options"] = "nosniff"
     return response, 200
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    # ✅ revoke token นี้ (jti) จนกว่าจะหมดอายุ → ใช้กับ @jwt_required() ไม่ได้อีก
+    claims = get_jwt()
+    revocation.revoke(db.session, claims["jti"], claims["exp"], int(get_jwt_identity()))
+
+    response = jsonify({"message": "Logout successful."})
+    unset_jwt_cookies(response)
+    return response, 200
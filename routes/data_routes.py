@@ -1,47 +1,170 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, abort, current_app, g, request, jsonify, send_from_directory, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
-from azure.storage.blob import BlobServiceClient
-from extension import db
+from extension import db, cache, uploads, search_index
 from models import User,UserRole,StudentProfile, GraduateProfile
-from config import Config
-import uuid
-from datetime import datetime
+from bulk_import import PROFILE_TYPES, DEFAULT_BATCH_SIZE, detect_format, import_profiles, read_rows
+from graduate_query import build_statement, parse_query_args
+import lookups
+from profiles import student_values, graduate_values
+from storage import FileSystemStorage, IMAGE_VARIANTS, sniff_image_type
+from db_routing import read_only
+from http_cache import cache_policy
+from accounts import get_user_with_profile, get_profile, issue_access_token
+from serializers import dumps, json_response, student_serializer, graduate_serializer
+from snapshot import SnapshotUnavailable, load_manifest, snapshot_dir, snapshot_file, write_snapshot
 
 data_bp = Blueprint('data', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-blob_service_client = BlobServiceClient.from_connection_string(Config.AZURE_STORAGE_CONNECTION_STRING)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+MAX_QUERY_LENGTH = 200
+# dropdown (faculties / companies / careers) เปลี่ยนไม่บ่อย ให้ client ใช้ของเดิมได้ 5 นาที
+LOOKUP_MAX_AGE = 300
+# ไฟล์ part ของ snapshot เขียนครั้งเดียวไม่แก้อีก
+SNAPSHOT_FILE_MAX_AGE = 7 * 24 * 3600
 
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def upload_to_blob_storage(file):
-    filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-    blob_client = blob_service_client.get_blob_client(container="profilepic", blob=filename)
-    blob_client.upload_blob(file)
-    return blob_client.url
+def is_admin():
+    user = db.session.get(User, int(get_jwt_identity()))
+    return user is not None and user.role == UserRole.admin
+
+
+def get_image_type(image):
+    # ต้องผ่านทั้งนามสกุลไฟล์และ magic bytes ของไฟล์จริง
+    if not image or not allowed_file(image.filename):
+        return None
+    return sniff_image_type(image.stream)
+
+
+def image_resolver():
+    # ?image_size=thumb|medium → URL ของรูปย่อ, ไม่ส่งมา → รูปต้นฉบับ
+    size = request.args.get('image_size')
+    size = size if size in IMAGE_VARIANTS else None
+    return lambda url: uploads.resolve_url(url, size)
+
+
+def get_limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def get_page_args():
+    # คืนค่า (limit, after) จาก query string, ถ้าไม่ได้ส่งมาทั้งคู่จะได้ (None, None)
+    after = request.args.get('after')
+
+    if request.args.get('limit') is None and after is None:
+        return None, None
+
+    limit = get_limit()
+
+    try:
+        after = int(after) if after else None
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+    return limit, after
+
+
+def paginate_by_id(stmt, model, limit, after):
+    # Keyset pagination บน primary key: WHERE id > :after ORDER BY id LIMIT :limit + 1
+    if after is not None:
+        stmt = stmt.where(model.id > after)
+
+    rows = db.session.execute(stmt.order_by(model.id).limit(limit + 1)).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def wants_ndjson():
+    # ?format=ndjson หรือ Accept: application/x-ndjson → ส่งแบบ streaming ทีละแถว
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+def stream_ndjson(stmt, serializer, params=None):
+    resolve_image = image_resolver()
+
+    # yield_per ใช้ server-side cursor ดึงทีละ batch, memory คงที่ไม่ว่าตารางจะใหญ่แค่ไหน
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE), params)
+        for row in result:
+            yield dumps(serializer.to_dict(row, resolve_image)) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def list_profiles(serializer):
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    model = serializer.model
+    stmt = serializer.select()
+    if wants_ndjson():
+        if after is not None:
+            stmt = stmt.where(model.id > after)
+        return stream_ndjson(stmt.order_by(model.id), serializer)
+
+    # ✅ ไม่ได้ส่ง limit/after มา → คืนค่าเป็น list แบบเดิมให้ frontend เก่า
+    if limit is None:
+        rows = db.session.execute(stmt.order_by(model.id))
+        return json_response(serializer.to_list(rows, image_resolver()))
+
+    rows, next_cursor = paginate_by_id(stmt, model, limit, after)
+    return json_response({"data": serializer.to_list(rows, image_resolver()), "next_cursor": next_cursor})
+
+
+def cached_json(key, loader):
+    # Read-through cache ที่เก็บ body ที่ encode แล้ว (ETag / 304 มาจาก @cache_policy)
+    # key รวม version ของตารางจาก @cache_policy → write จาก worker อื่นได้ body ใหม่ทันที
+    body = cache.get_or_set(f"{key}:{g.get('table_versions', '')}", lambda: dumps(loader()))
+    return Response(body, mimetype='application/json')
+
+
+def graduates_where(*criteria):
+    stmt = graduate_serializer.select().where(*criteria).order_by(GraduateProfile.id)
+    return json_response(graduate_serializer.to_list(db.session.execute(stmt), image_resolver()))
+
+
+def graduates_with(kind, name, column):
+    # แปลงชื่อ (หรือ alias) เป็น id ของ lookup table แล้ว seek index (column, id)
+    lookup_id = lookups.find(db.session, kind, name)
+    if lookup_id is None:
+        return json_response([])
+    return graduates_where(column == lookup_id)
 
 
 @data_bp.route('/current-user', methods=['GET'])
 @jwt_required()
 def get_current_user():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    # โหลด User พร้อม Profile ใน query เดียว
+    user = get_user_with_profile(current_user_id)
     
     if not user:
         return jsonify({"status": "error", "message": "User not found"}), 404
 
-    # ค้นหา Profile โดยใช้ user_id
-    if user.role == UserRole.student:
-        profile = StudentProfile.query.filter_by(user_id=user.id).first()
-    elif user.role == UserRole.graduate:
-        profile = GraduateProfile.query.filter_by(user_id=user.id).first()
-    else:
+    if user.role not in (UserRole.student, UserRole.graduate):
         return jsonify({"status": "error", "message": "User role not assigned."}), 400
 
+    profile = get_profile(user)
+
     if not profile:
         return jsonify({"status": "error", "message": "Profile not found."}), 404
 
@@ -49,7 +172,7 @@ def get_current_user():
     result = {
         "full_name": profile.full_name,
         "email": user.email,
-        "profile_image": profile.profile_image,
+        "profile_image": image_resolver()(profile.profile_image),
         "faculty": profile.faculty,
         "major": profile.major
     }
@@ -61,224 +184,259 @@ def get_current_user():
 
 
 @data_bp.route('/student-data', methods=['GET'])
+@cache_policy(tables=('student_profiles',), images=True)
+@read_only
 def get_student_data():
-    students = StudentProfile.query.all()
-    result = [{
-        "full_name": student.full_name,
-        "faculty": student.faculty,
-        "major": student.major,
-        "profile_image": student.profile_image if student.profile_image else None,
-        "extracurricular_activities": student.extracurricular_activities,
-        "academic_projects": student.academic_projects
-    } for student in students]
-
-    return jsonify(result), 200
+    return list_profiles(student_serializer)
 
 
 @data_bp.route('/graduate-data', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), images=True)
+@read_only
 def get_graduate_data():
-    graduates = GraduateProfile.query.all()
-    result = [{
-        "full_name": grad.full_name,
-        "faculty": grad.faculty,
-        "major": grad.major,
-        "profile_image": grad.profile_image if grad.profile_image else None,
-        "extracurricular_activities": grad.extracurricular_activities,
-        "academic_projects": grad.academic_projects,
-        "internship_status": grad.internship_status,
-        "internship_company": grad.internship_company,
-        "internship_position": grad.internship_position,
-        "internship_duration": grad.internship_duration,
-        "internship_task": grad.internship_task,
-        "internship_experience": grad.internship_experience,
-        "career_status": grad.career_status,
-        "career_company": grad.career_company,
-        "career_position": grad.career_position,
-        "date_of_employment": grad.date_of_employment.isoformat() if grad.date_of_employment else None,
-        "career_task": grad.career_task,
-        "career_experience": grad.career_experience
-    } for grad in graduates]
-
-    return jsonify(result), 200
+    return list_profiles(graduate_serializer)
 
 
 @data_bp.route('/graduates', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), images=True)
+@read_only
 def get_graduates_by_faculty():
     faculty = request.args.get('faculty')
 
     if not faculty:
         return jsonify({"status": "error", "message": "Faculty is required"}), 400
 
-    graduates = GraduateProfile.query.filter_by(faculty=faculty).all()
-
-    result = [{
-        "full_name": grad.full_name,
-        "faculty": grad.faculty,
-        "major": grad.major,
-        "profile_image": grad.profile_image if grad.profile_image else None,
-        "extracurricular_activities": grad.extracurricular_activities,
-        "academic_projects": grad.academic_projects,
-        "internship_status": grad.internship_status,
-        "internship_company": grad.internship_company,
-        "internship_position": grad.internship_position,
-        "internship_duration": grad.internship_duration,
-        "internship_task": grad.internship_task,
-        "internship_experience": grad.internship_experience,
-        "career_status": grad.career_status,
-        "career_company": grad.career_company,
-        "career_position": grad.career_position,
-        "date_of_employment": grad.date_of_employment.isoformat() if grad.date_of_employment else None,
-        "career_task": grad.career_task,
-        "career_experience": grad.career_experience
-    } for grad in graduates]
+    return graduates_with('faculty', faculty, GraduateProfile.faculty_id)
 
-    return jsonify(result), 200
+
+@data_bp.route('/graduates/query', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), images=True)
+@read_only
+def query_graduates():
+    # ✅ รวม filter หลายคอลัมน์ใน query เดียว แทนการเรียก /graduates?faculty, /graduates-by-company ... แล้วมา intersect เอง
+    try:
+        query = parse_query_args(request.args)
+        limit = get_limit()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    query.resolve_lookups(db.session)
+    stmt = build_statement(query.shape)
+    serializer = query.serializer
+    if wants_ndjson():
+        return stream_ndjson(stmt, serializer, query.params)
+
+    rows = db.session.execute(stmt.limit(limit + 1), query.params).all()
+    next_cursor = query.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return json_response({"data": serializer.to_list(rows[:limit], image_resolver()), "next_cursor": next_cursor})
 
 
 @data_bp.route('/faculties', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), max_age=LOOKUP_MAX_AGE)
+@read_only
 def get_faculties():
-    faculties = db.session.query(GraduateProfile.faculty).distinct().all()
-    faculties_list = [faculty[0] for faculty in faculties]
+    def load():
+        faculties = db.session.execute(lookups.used_names('faculty', GraduateProfile.faculty_id, include_null=True))
+        return [faculty[0] for faculty in faculties]
 
-    return jsonify(faculties_list), 200
+    return cached_json('faculties', load)
 
 @data_bp.route('/graduates-by-company', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), images=True)
+@read_only
 def get_graduates_by_company():
     company_name = request.args.get('company', '').strip()
 
     if not company_name:
         return jsonify({"status": "error", "message": "Company name is required"}), 400
 
-    graduates = GraduateProfile.query.filter_by(career_company=company_name).all()
-    results = [{
-        "full_name": grad.full_name,
-        "faculty": grad.faculty,
-        "major": grad.major,
-        "profile_image": grad.profile_image if grad.profile_image else None,
-        "extracurricular_activities": grad.extracurricular_activities,
-        "academic_projects": grad.academic_projects,
-        "internship_status": grad.internship_status,
-        "internship_company": grad.internship_company,
-        "internship_position": grad.internship_position,
-        "internship_duration": grad.internship_duration,
-        "internship_task": grad.internship_task,
-        "internship_experience": grad.internship_experience,
-        "career_status": grad.career_status,
-        "career_company": grad.career_company,
-        "career_position": grad.career_position,
-        "date_of_employment": grad.date_of_employment.isoformat() if grad.date_of_employment else None,
-        "career_task": grad.career_task,
-        "career_experience": grad.career_experience
-    } for grad in graduates]
-
-    return jsonify(results), 200
+    return graduates_with('company', company_name, GraduateProfile.career_company_id)
 
 @data_bp.route('/companies', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), max_age=LOOKUP_MAX_AGE)
+@read_only
 def get_companies():
+    def load():
+        companies = db.session.execute(lookups.used_names('company', GraduateProfile.career_company_id))
+        return [company[0] for company in companies if company[0]]
+
     try:
-        companies = db.session.query(GraduateProfile.career_company).filter(GraduateProfile.career_company.isnot(None)).distinct().all()
-        companies_list = [company[0] for company in companies if company[0]]
-        return jsonify(companies_list), 200
+        return cached_json('companies', load)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @data_bp.route('/careers', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), max_age=LOOKUP_MAX_AGE)
+@read_only
 def get_careers():
+    def load():
+        careers = db.session.execute(lookups.used_names('position', GraduateProfile.career_position_id))
+        return [career[0] for career in careers if career[0]]
+
     try:
-        careers = db.session.query(GraduateProfile.career_position).filter(GraduateProfile.career_position.isnot(None)).distinct().all()
-        careers_list = [career[0] for career in careers if career[0]]
-        return jsonify(careers_list), 200
+        return cached_json('careers', load)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @data_bp.route('/graduates-by-career', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), images=True)
+@read_only
 def get_graduates_by_career():
     career_name = request.args.get('career', '').strip()
 
     if not career_name:
         return jsonify({"status": "error", "message": "Career name is required"}), 400
 
-    graduates = GraduateProfile.query.filter_by(career_position=career_name).all()
-    results = [{
-        "full_name": grad.full_name,
-        "faculty": grad.faculty,
-        "major": grad.major,
-        "profile_image": grad.profile_image if grad.profile_image else None,
-        "extracurricular_activities": grad.extracurricular_activities,
-        "academic_projects": grad.academic_projects,
-        "internship_status": grad.internship_status,
-        "internship_company": grad.internship_company,
-        "internship_position": grad.internship_position,
-        "internship_duration": grad.internship_duration,
-        "internship_task": grad.internship_task,
-        "internship_experience": grad.internship_experience,
-        "career_status": grad.career_status,
-        "career_company": grad.career_company,
-        "career_position": grad.career_position,
-        "date_of_employment": grad.date_of_employment.isoformat() if grad.date_of_employment else None,
-        "career_task": grad.career_task,
-        "career_experience": grad.career_experience
-    } for grad in graduates]
-
-    return jsonify(results), 200
+    return graduates_with('position', career_name, GraduateProfile.career_position_id)
+
+
+
+@data_bp.route('/search', methods=['GET'])
+@cache_policy(tables=('graduate_profiles',), images=True)
+@read_only
+def search_graduates():
+    # ?q=คำค้น&limit=20&offset=0 (ค้นจากชื่อ, บริษัท, ตำแหน่ง, ฝึกงาน, โปรเจกต์) เรียงตามความเกี่ยวข้อง
+    query = request.args.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    if not query:
+        return jsonify({"status": "error", "message": "Missing search query (q)"}), 400
+
+    try:
+        limit = int(request.args.get('limit', SEARCH_PAGE_SIZE))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit and offset must be integers"}), 400
+    if limit < 1 or limit > MAX_SEARCH_PAGE_SIZE or offset < 0:
+        return jsonify({"status": "error", "message": f"limit must be between 1 and {MAX_SEARCH_PAGE_SIZE}"}), 400
+
+    search_index.ensure_fresh(db.session, GraduateProfile)
+    fuzzy = request.args.get('fuzzy', 'true').lower() != 'false'
+    total, page = search_index.search(query, limit, offset, fuzzy=fuzzy)
+
+    rows = {}
+    if page:
+        stmt = graduate_serializer.select().where(GraduateProfile.id.in_([doc_id for doc_id, _ in page]))
+        rows = {row[0]: row for row in db.session.execute(stmt)}
+
+    resolve_image = image_resolver()
+    data = [
+        dict(graduate_serializer.to_dict(rows[doc_id], resolve_image), score=round(score, 4))
+        for doc_id, score in page if doc_id in rows
+    ]
+    next_offset = offset + limit if offset + limit < total else None
+    return json_response({"data": data, "total": total, "next_offset": next_offset})
+
+
+@data_bp.route('/profile-image/upload-url', methods=['POST'])
+@jwt_required()
+def create_profile_image_upload():
+    # ✅ ออก upload URL อายุสั้น (SAS) ให้ browser อัปโหลดรูปตรงไปที่ storage ไม่ต้องผ่าน API
+    data = request.get_json(silent=True) or {}
+    upload = uploads.create_upload(int(get_jwt_identity()), data.get('content_type', ''))
+    if upload is None:
+        return jsonify({"status": "error", "message": "Invalid file type"}), 400
+
+    return jsonify({"status": "success", **upload}), 201
+
+
+@data_bp.route('/profile-image/confirm', methods=['POST'])
+@jwt_required()
+def confirm_profile_image():
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    blob_name = data.get('blob_name', '')
+
+    if not uploads.owns_blob(current_user_id, blob_name):
+        return jsonify({"status": "error", "message": "Invalid blob name"}), 400
+
+    user = get_user_with_profile(current_user_id)
+    if not user:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    profile = get_profile(user)
+    if not profile:
+        return jsonify({"status": "error", "message": "Profile not found."}), 404
+
+    # ✅ ตรวจ magic bytes ของไฟล์ที่อัปโหลดจริง
+    if not uploads.verify_uploaded(blob_name):
+        return jsonify({"status": "error", "message": "Invalid image file."}), 400
+
+    profile.profile_image = uploads.backend.url(blob_name)
+    db.session.commit()
+
+    # ✅ สร้างรูปย่อใน background
+    uploads.submit_variants(blob_name)
+
+    return jsonify({"status": "success", "message": "Profile image updated successfully"}), 200
 
 
+@data_bp.route('/local-blob/<path:name>', methods=['GET'])
+def get_local_blob(name):
+    # ใช้ได้เฉพาะตอน STORAGE_BACKEND=filesystem
+    if not isinstance(uploads.backend, FileSystemStorage):
+        abort(404)
+    return send_from_directory(uploads.backend.root, name)
+
+
+@data_bp.route('/local-blob/<path:name>', methods=['PUT'])
+def put_local_blob(name):
+    # จำลอง PUT ไปที่ Azure Blob ด้วย SAS (เฉพาะ development / ทดสอบ)
+    backend = uploads.backend
+    if not isinstance(backend, FileSystemStorage):
+        abort(404)
+    if not backend.verify_upload_token(name, request.args.get('token', ''), uploads.upload_url_ttl):
+        abort(403)
+
+    backend.upload(name, request.stream, request.content_type)
+    return '', 201
+
 
 @data_bp.route('/student-form', methods=['POST'])
 @jwt_required()
 def add_student():
     current_user_id = get_jwt_identity()  # ใช้ user_id
-    user = User.query.get(current_user_id)
+    user = db.session.get(User, int(current_user_id))
 
     if not user:
         return jsonify({"status": "error", "message": "User not found"}), 404
 
+    role = user.role  # เก็บไว้ออก token หลัง commit (object ถูก expire หลัง commit)
+
     data = request.form.to_dict()
 
+    # ✅ ตรวจไฟล์รูปก่อน แต่จะอัปโหลดใน background หลังบันทึก profile แล้ว
+    image = request.files.get('profileImage')
+    image_type = None
     if 'profileImage' in request.files:
-        image = request.files['profileImage']
-        if image and allowed_file(image.filename):
-            image_url = upload_to_blob_storage(image)
-        else:
+        image_type = get_image_type(image)
+        if not image_type:
             return jsonify({"status": "error", "message": "Invalid image file."}), 400
-    else:
-        image_url = None
-
-    # แปลงข้อมูลวันที่ให้เป็น date object
-    date_of_birth_str = data.get('dateOfBirth', '')
-    year_of_enrollment_str = data.get('yearOfEnrollment', '')
-
-    try:
-        date_of_birth = datetime.strptime(date_of_birth_str, "%Y-%m-%d").date() if date_of_birth_str else None
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format for dateOfBirth"}), 400
 
     try:
-        year_of_enrollment = datetime.strptime(year_of_enrollment_str, "%Y-%m-%d").date() if year_of_enrollment_str else None
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format for yearOfEnrollment"}), 400
+        values = student_values(data)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
     student = StudentProfile(
         user_id=user.id,  # ใช้ user_id เชื่อมโยงกับ User
-        full_name=data.get('full_name'),
-        student_id=data.get('studentId'),
-        gender=data.get('gender'),
-        date_of_birth=date_of_birth,
         email=user.email,  # ใช้ email จาก User
-        phone_number=data.get('phoneNumber'),
-        faculty=data.get('faculty'),
-        major=data.get('major'),
-        year_of_enrollment=year_of_enrollment,
-        current_academic_year=data.get('currentAcademicYear'),
-        extracurricular_activities=data.get('extracurricularActivities'),
-        academic_projects=data.get('academicProjects'),
-        profile_image=image_url
+        profile_image=None,
+        **values
     )
 
     db.session.add(student)
+    db.session.flush()
+    student_id = student.id
     db.session.commit()
 
-    return jsonify({"status": "success", "message": "Student profile created successfully"}), 201
+    # ✅ อัปโหลดรูปใน background แล้วค่อยอัปเดต profile_image เมื่อเสร็จ
+    if image_type:
+        uploads.submit(image, image_type, StudentProfile, student_id)
+
+    return jsonify({
+        "status": "success",
+        "message": "Student profile created successfully",
+        "token": issue_access_token(current_user_id, role, True)  # ✅ token ใหม่ (has_profile = true)
+    }), 201
 
 
 
@@ -287,78 +445,135 @@ def add_student():
 @jwt_required()
 def add_graduate():
     current_user_id = get_jwt_identity()  # ใช้ user_id
-    user = User.query.get(current_user_id)
+    user = db.session.get(User, int(current_user_id))
 
     if not user:
         return jsonify({"status": "error", "message": "User not found"}), 404
 
+    role = user.role  # เก็บไว้ออก token หลัง commit (object ถูก expire หลัง commit)
+
     data = request.form.to_dict()
 
+    # ✅ ตรวจไฟล์รูปก่อน แต่จะอัปโหลดใน background หลังบันทึก profile แล้ว
+    image = request.files.get('profileImage')
+    image_type = None
     if 'profileImage' in request.files:
-        image = request.files['profileImage']
-        if image and allowed_file(image.filename):
-            image_url = upload_to_blob_storage(image)
-        else:
+        image_type = get_image_type(image)
+        if not image_type:
             return jsonify({"status": "error", "message": "Invalid file type"}), 400
-    else:
-        image_url = None
-
-    # แปลงข้อมูลวันที่ให้เป็น date object
-    date_of_birth_str = data.get('dateOfBirth', '')
-    year_of_enrollment_str = data.get('yearOfEnrollment', '')
-    date_of_employment_str = data.get('dateOfEmployment', '')
 
     try:
-        date_of_birth = datetime.strptime(date_of_birth_str, "%Y-%m-%d").date() if date_of_birth_str else None
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format for dateOfBirth"}), 400
+        values = graduate_values(data)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    try:
-        year_of_enrollment = datetime.strptime(year_of_enrollment_str, "%Y-%m-%d").date() if year_of_enrollment_str else None
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format for yearOfEnrollment"}), 400
-
-    try:
-        date_of_employment = datetime.strptime(date_of_employment_str, "%Y-%m-%d").date() if date_of_employment_str else None
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format for dateOfEmployment"}), 400
+    # ✅ ชื่อบริษัท / ตำแหน่ง / คณะ / สาขา → ชื่อหลัก + id ของ lookup table
+    lookups.canonicalize(db.session, values)
 
     graduate = GraduateProfile(
         user_id=user.id,  # ใช้ user_id เชื่อมโยงกับ User
-        full_name=data.get('full_name'),  # ใช้ full_name ที่ถูกส่งมาจาก Frontend
-        student_id=data.get('studentId'),
-        gender=data.get('gender'),
-        date_of_birth=date_of_birth,
         email=user.email,  # ใช้ email จาก User
-        phone_number=data.get('phoneNumber'),
-        faculty=data.get('faculty'),
-        major=data.get('major'),
-        year_of_enrollment=year_of_enrollment,
-        current_academic_year=data.get('currentAcademicYear'),
-        extracurricular_activities=data.get('extracurricularActivities'),
-        academic_projects=data.get('academicProjects'),
-        profile_image=image_url,
-
-        # เช็คสถานะ Internship ก่อนบันทึกข้อมูล
-        internship_status=data.get('internshipStatus'),
-        internship_company=data.get('internshipCompany') if data.get('internshipStatus') == "completed" else None,
-        internship_position=data.get('internshipPosition') if data.get('internshipStatus') == "completed" else None,
-        internship_duration=data.get('internshipDuration') if data.get('internshipStatus') == "completed" else None,
-        internship_task=data.get('internshipTask') if data.get('internshipStatus') == "completed" else None,
-        internship_experience=data.get('internshipExperience') if data.get('internshipStatus') == "completed" else None,
-
-        # เช็คสถานะ Career ก่อนบันทึกข้อมูล
-        career_status=data.get('careerStatus'),
-        career_company=data.get('careerCompany') if data.get('careerStatus') == "employed" else None,
-        career_position=data.get('careerPosition') if data.get('careerStatus') == "employed" else None,
-        date_of_employment=date_of_employment,
-        career_task=data.get('careerTask') if data.get('careerStatus') == "employed" else None,
-        career_experience=data.get('careerExperience') if data.get('careerStatus') == "employed" else None
+        profile_image=None,
+        **values
     )
 
     db.session.add(graduate)
+    db.session.flush()
+    graduate_id = graduate.id
     db.session.commit()
 
-    return jsonify({"status": "success", "message": "Graduate profile created successfully"}), 201
+    if image_type:
+        uploads.submit(image, image_type, GraduateProfile, graduate_id)
+
+    # ✅ เพิ่มเข้า search index ของ worker นี้ทันที (worker อื่นจะดึงเองตอน refresh)
+    search_index.add_profile(graduate_id, values)
+
+    return jsonify({
+        "status": "success",
+        "message": "Graduate profile created successfully",
+        "token": issue_access_token(current_user_id, role, True)  # ✅ token ใหม่ (has_profile = true)
+    }), 201
+
 
+@data_bp.route('/bulk-import', methods=['POST'])
+@jwt_required()
+def bulk_import():
+    # ✅ นำเข้า profile ทีละหลายพันแถวจากไฟล์ CSV / NDJSON (เฉพาะ admin)
+    if not is_admin():
+        return jsonify({"status": "error", "message": "Admin access required."}), 403
+
+    kind = request.args.get('type', '')
+    if kind not in PROFILE_TYPES:
+        return jsonify({"status": "error", "message": "type must be 'student' or 'graduate'"}), 400
+
+    try:
+        batch_size = int(request.args.get('batch_size', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({"status": "error", "message": "batch_size must be an integer"}), 400
+
+    # รับได้ทั้ง multipart (field "file") หรือส่งไฟล์มาเป็น body ตรง ๆ
+    upload = request.files.get('file')
+    if upload:
+        stream, fmt = upload.stream, detect_format(upload.filename, upload.mimetype)
+    else:
+        stream, fmt = request.stream, detect_format(None, request.mimetype)
+    fmt = request.args.get('format', fmt)
 
+    try:
+        report = import_profiles(kind, read_rows(stream, fmt), batch_size)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    return jsonify({"status": "success", **report}), 200
+
+
+@data_bp.route('/snapshots', methods=['GET'])
+@jwt_required()
+def get_snapshot_manifest():
+    # ✅ รายการไฟล์ Parquet / Arrow ล่าสุด (จำนวนแถว, ขนาด, id สุดท้าย) ให้ notebook ดาวน์โหลดเฉพาะ part ที่ยังไม่มี (เฉพาะ admin)
+    if not is_admin():
+        return jsonify({"status": "error", "message": "Admin access required."}), 403
+
+    manifest = load_manifest(snapshot_dir())
+    if manifest is None:
+        return jsonify({"status": "error", "message": "No snapshot has been exported yet."}), 404
+
+    response = jsonify(manifest)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@data_bp.route('/snapshots', methods=['POST'])
+@jwt_required()
+def create_snapshot():
+    # ✅ สั่ง export ทันที (ปกติรันตามรอบด้วย `flask export-snapshot`): เพิ่มเฉพาะแถวใหม่ หรือ ?full=true เขียนใหม่ทั้งหมด
+    if not is_admin():
+        return jsonify({"status": "error", "message": "Admin access required."}), 403
+
+    full = request.args.get('full', 'false').lower() == 'true'
+    fmt = request.args.get('format', current_app.config.get('SNAPSHOT_FORMAT', 'parquet'))
+    try:
+        manifest = write_snapshot(snapshot_dir(), fmt, full, current_app.config.get('SNAPSHOT_MAX_PARTS', 24))
+    except SnapshotUnavailable as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    return jsonify({"status": "success", **manifest}), 200
+
+
+@data_bp.route('/snapshots/<path:name>', methods=['GET'])
+@jwt_required()
+def download_snapshot(name):
+    if not is_admin():
+        return jsonify({"status": "error", "message": "Admin access required."}), 403
+
+    directory = snapshot_dir()
+    if snapshot_file(load_manifest(directory), name) is None:
+        return jsonify({"status": "error", "message": "Snapshot file not found."}), 404
+
+    response = send_from_directory(directory, name, max_age=SNAPSHOT_FILE_MAX_AGE)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
@@ -0,0 +1,176 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager, load_only, selectinload
+
+from extension import db
+from models import User, GraduateProfile
+from db_routing import read_only
+from http_cache import cache_policy
+from history import RECORD_TYPES, apply_timeline, parse_timeline, record_to_dict, timeline_to_dict
+from routes.data_routes import DEFAULT_PAGE_SIZE, get_page_args
+from serializers import json_response
+
+history_bp = Blueprint('history', __name__)
+
+# path ใน URL → ชื่อ relationship บน User
+RECORD_KINDS = {
+    'academic-records': 'academic_records',
+    'career-records': 'career_records',
+}
+
+HISTORY_TABLES = ('graduate_profiles', 'academic_records', 'career_records')
+
+GRADUATE_FIELDS = ('full_name', 'faculty', 'major', 'career_company', 'career_position')
+
+
+def load_timeline(user_id):
+    # user + ทั้งสอง timeline: 3 query (user, academic_records IN, career_records IN) ไม่ว่าจะมีกี่รายการ
+    return db.session.get(User, user_id, options=[
+        selectinload(User.academic_records),
+        selectinload(User.career_records),
+    ])
+
+
+def get_record(kind, record_id, user_id):
+    model = RECORD_TYPES[kind][0]
+    return db.session.scalar(select(model).where(model.record_id == record_id, model.user_id == user_id))
+
+
+@history_bp.route('/me', methods=['GET'])
+@jwt_required()
+def get_my_history():
+    user = load_timeline(int(get_jwt_identity()))
+    if not user:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    return json_response(timeline_to_dict(user))
+
+
+@history_bp.route('/me', methods=['PUT'])
+@jwt_required()
+def replace_my_history():
+    # ✅ บันทึกทั้ง timeline ใน request / transaction เดียว แทนการเรียก POST / PUT / DELETE ทีละรายการ
+    try:
+        timeline = parse_timeline(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    user = load_timeline(int(get_jwt_identity()))
+    if not user:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    try:
+        apply_timeline(db.session, user, timeline)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    result = timeline_to_dict(user)  # สร้างก่อน commit (object ถูก expire หลัง commit)
+    db.session.commit()
+    return json_response(result)
+
+
+@history_bp.route('/me/<kind>', methods=['POST'])
+@jwt_required()
+def add_my_record(kind):
+    kind = RECORD_KINDS.get(kind)
+    if kind is None:
+        return jsonify({"status": "error", "message": "Unknown record type"}), 404
+
+    model, to_values, _ = RECORD_TYPES[kind]
+    try:
+        values = to_values(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    current_user_id = int(get_jwt_identity())
+    if not db.session.get(User, current_user_id):
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    record = model(user_id=current_user_id, **values)
+    db.session.add(record)
+    db.session.flush()
+    result = record_to_dict(kind, record)
+    db.session.commit()
+    return json_response(result, 201)
+
+
+@history_bp.route('/me/<kind>/<int:record_id>', methods=['PUT'])
+@jwt_required()
+def update_my_record(kind, record_id):
+    kind = RECORD_KINDS.get(kind)
+    if kind is None:
+        return jsonify({"status": "error", "message": "Unknown record type"}), 404
+
+    try:
+        values = RECORD_TYPES[kind][1](request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    record = get_record(kind, record_id, int(get_jwt_identity()))
+    if not record:
+        return jsonify({"status": "error", "message": "Record not found"}), 404
+
+    for field, value in values.items():
+        setattr(record, field, value)
+    db.session.flush()
+    result = record_to_dict(kind, record)
+    db.session.commit()
+    return json_response(result)
+
+
+@history_bp.route('/me/<kind>/<int:record_id>', methods=['DELETE'])
+@jwt_required()
+def delete_my_record(kind, record_id):
+    kind = RECORD_KINDS.get(kind)
+    if kind is None:
+        return jsonify({"status": "error", "message": "Unknown record type"}), 404
+
+    record = get_record(kind, record_id, int(get_jwt_identity()))
+    if not record:
+        return jsonify({"status": "error", "message": "Record not found"}), 404
+
+    db.session.delete(record)
+    db.session.commit()
+    return jsonify({"status": "success", "message": "Record deleted"}), 200
+
+
+@history_bp.route('/graduates', methods=['GET'])
+@cache_policy(tables=HISTORY_TABLES)
+@read_only
+def get_graduate_histories():
+    # graduate ทีละหน้าพร้อม timeline: 3 query ต่อหน้าเสมอ (graduate + user, academic_records IN, career_records IN)
+    # แทน 1 + 2N query ถ้าโหลด timeline ทีละคน
+    try:
+        limit, after = get_page_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    stmt = (
+        select(User)
+        .join(User.graduate_profile)
+        .options(
+            load_only(User.id),
+            contains_eager(User.graduate_profile).load_only(
+                GraduateProfile.id, *(getattr(GraduateProfile, field) for field in GRADUATE_FIELDS)),
+            selectinload(User.academic_records),
+            selectinload(User.career_records),
+        )
+        .order_by(GraduateProfile.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(GraduateProfile.id > after)
+    users = db.session.scalars(stmt).all()
+
+    data = []
+    for user in users[:limit]:
+        profile = user.graduate_profile
+        item = {"id": profile.id}
+        item.update((field, getattr(profile, field)) for field in GRADUATE_FIELDS)
+        item.update(timeline_to_dict(user))
+        data.append(item)
+
+    next_cursor = users[limit - 1].graduate_profile.id if len(users) > limit else None
+    return json_response({"data": data, "next_cursor": next_cursor})
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from extension import db
-from models import User, UserRole, StudentProfile, GraduateProfile
+from models import UserRole
+from accounts import get_user_with_profile, get_profile, issue_access_token
 
 user_bp = Blueprint('user', __name__)
 
@@ -20,35 +21,49 @@ def set_account_type():
     if accept_policy is not True:
         return jsonify({"status": "error", "message": "You must accept the privacy policy."}), 400
 
-    user = User.query.get(current_user_id)
+    # ✅ โหลด user พร้อม profile ใน query เดียว
+    user = get_user_with_profile(current_user_id)
     if not user:
         return jsonify({"status": "error", "message": "User not found."}), 404
 
     # ✅ แปลง account_type ให้ตรงกับ UserRole
-    user.role = UserRole[account_type]
+    role = UserRole[account_type]
+    user.role = role
+
+    # ✅ เช็คว่ามี Profile หรือยัง (ใช้ profile ที่โหลดมาแล้ว ไม่ต้อง query ซ้ำ)
+    has_profile = get_profile(user) is not None
     db.session.commit()
 
-    # ✅ เช็คว่ามี Profile หรือยัง
-    if user.role == UserRole.student:
-        profile = StudentProfile.query.filter_by(user_id=user.id).first()
-        redirect_url = "/student-form" if not profile else "/dashboard"
-    elif user.role == UserRole.graduate:
-        profile = GraduateProfile.query.filter_by(user_id=user.id).first()
-        redirect_url = "/graduate-form" if not profile else "/dashboard"
+    if role == UserRole.student:
+        redirect_url = "/student-form" if not has_profile else "/dashboard"
+    else:
+        redirect_url = "/graduate-form" if not has_profile else "/dashboard"
 
     return jsonify({
         "status": "success",
         "message": "Account type updated successfully.",
-        "redirect": redirect_url
+        "redirect": redirect_url,
+        "token": issue_access_token(current_user_id, role, has_profile)  # ✅ token ใหม่ที่มี role ล่าสุด
     }), 200
 
 @user_bp.route('/check-account-type', methods=['GET'])
 @jwt_required()
 def check_account_type():
     current_user_id = int(get_jwt_identity())
+    claims = get_jwt()
+
+    # ✅ token มี role และ profile แล้ว → ตอบจาก claims ได้เลยโดยไม่ต้อง query
+    # (role ที่ยังไม่ได้เลือก หรือยังไม่มี profile อาจเปลี่ยนหลังออก token จึงเช็คกับ DB)
+    if claims.get("has_profile") and claims.get("role") in ("student", "graduate"):
+        return jsonify({
+            "status": "success",
+            "has_account_type": True,
+            "account_type": claims["role"],
+            "redirect": "/dashboard"
+        }), 200
 
-    # ✅ ค้นหา user โดยใช้ user_id
-    user = User.query.get(current_user_id)
+    # ✅ ค้นหา user พร้อม profile โดยใช้ user_id
+    user = get_user_with_profile(current_user_id)
     if not user:
         return jsonify({"status": "error", "message": "User not found."}), 404
 
@@ -62,23 +77,21 @@ def check_account_type():
         }), 200
 
     # ✅ เช็คว่ามี `Profile` หรือยัง
-    profile = None
-    if user.role == UserRole.student:
-        profile = StudentProfile.query.filter_by(user_id=user.id).first()
-    elif user.role == UserRole.graduate:
-        profile = GraduateProfile.query.filter_by(user_id=user.id).first()
+    has_profile = get_profile(user) is not None
 
     # ✅ ถ้าไม่มี Profile ให้ Redirect ไปยังหน้ากรอกข้อมูล
-    if not profile:
+    if not has_profile:
         redirect_url = "/student-form" if user.role == UserRole.student else "/graduate-form"
     else:
         redirect_url = "/dashboard"
 
-    return jsonify({
+    response = {
         "status": "success",
         "has_account_type": True,
         "account_type": user.role.value,
-        "redirect": redirect_url
-    }), 200
-
-
+        "redirect": redirect_url,
+    }
+    # ✅ ออก token ใหม่เฉพาะเมื่อ claims ใน token ไม่ตรงกับ DB แล้ว (GET ที่เรียกซ้ำไม่ต้องได้ token ใหม่ทุกครั้ง)
+    if claims.get("role") != user.role.value or claims.get("has_profile") is not has_profile:
+        response["token"] = issue_access_token(user.id, user.role, has_profile)
+    return jsonify(response), 200
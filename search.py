@@ -0,0 +1,313 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+
+from sqlalchemy import select
+
+from http_cache import track_tables
+
+# Inverted index ภายใน process สำหรับค้นหา graduate profile (แต่ละ gunicorn worker มีของตัวเอง)
+# - ภาษาอังกฤษ/ตัวเลข: ตัดเป็นคำ, ค้นแบบ prefix และ fuzzy (edit distance) ได้
+# - ภาษาไทย (ไม่มีช่องว่างระหว่างคำ): ตัดเป็น character bigram แล้ว match แบบ substring โดยประมาณ
+# - จัดอันดับด้วย BM25 โดยให้น้ำหนักชื่อ / บริษัท / ตำแหน่ง มากกว่าข้อความยาว ๆ
+# posting list เก็บใน array (ต่อท้ายได้ถูก) แล้วคำนวณคะแนนทีละ term ด้วย numpy
+
+# คอลัมน์ของ GraduateProfile ที่ index และน้ำหนักของแต่ละคอลัมน์
+FIELD_WEIGHTS = {
+    'full_name': 3.0,
+    'career_company': 2.5,
+    'career_position': 2.0,
+    'internship_company': 1.5,
+    'internship_position': 1.5,
+    'faculty': 1.0,
+    'major': 1.0,
+    'academic_projects': 1.0,
+    'career_task': 0.5,
+    'career_experience': 0.5,
+    'internship_task': 0.5,
+    'internship_experience': 0.5,
+    'extracurricular_activities': 0.5,
+}
+
+TOKEN_RE = re.compile(r'[\u0e00-\u0e7f]+|[^\W\u0e00-\u0e7f_]+')
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+MAX_EXPANSIONS = 50
+MIN_PREFIX_LENGTH = 2
+MIN_FUZZY_LENGTH = 4
+BUILD_BATCH_SIZE = 2000
+# transaction ที่ได้ id น้อยกว่าแต่ commit ทีหลังจะไม่พลาด เพราะอ่านย้อนหลังเผื่อไว้ (_add ข้าม id ที่มีแล้ว)
+REFRESH_OVERLAP = 200
+# version ของ marker นี้ (TableVersions) เปลี่ยนเมื่อ profile เดิมถูกแก้ค่าที่ index ไว้ (เช่น merge ของ add-lookup-alias)
+# → ensure_fresh สร้าง index ใหม่ทั้งหมด เพราะ refresh ปกติดึงแค่ id ใหม่
+REBUILD_MARKER = 'search_index_rebuild'
+track_tables(REBUILD_MARKER)
+
+
+def _is_thai(token):
+    return '\u0e00' <= token[0] <= '\u0e7f'
+
+
+def _bigrams(run):
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def tokenize(text):
+    # คืนค่า list ของ term ที่เก็บใน index
+    terms = []
+    for token in TOKEN_RE.findall(normalize(text or '')):
+        if _is_thai(token):
+            terms.extend(_bigrams(token))
+        else:
+            terms.append(token)
+    return terms
+
+
+def parse_query(text):
+    # แต่ละกลุ่มคือ (ชนิด, terms): ('word', [คำ]) หรือ ('thai', [bigram ของคำไทยหนึ่งช่วง])
+    groups = []
+    for token in TOKEN_RE.findall(normalize(text or '')):
+        if _is_thai(token):
+            groups.append(('thai', list(dict.fromkeys(_bigrams(token)))))
+        else:
+            groups.append(('word', [token]))
+    return groups
+
+
+def edit_distance(a, b, limit):
+    # Levenshtein ที่หยุดทันทีเมื่อเกิน limit (คืนค่า limit + 1)
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SearchIndex:
+
+    def __init__(self, app=None):
+        self.refresh_seconds = 30
+        self._versions = None
+        self._lock = threading.RLock()
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # index สร้างตอนค้นหาครั้งแรก แล้วดึงเฉพาะ profile ใหม่ (id > id ล่าสุด) ทุก SEARCH_REFRESH_SECONDS
+        # ซึ่งครอบคลุม bulk import และการเขียนจาก worker อื่นด้วย
+        # เรียกหลัง table_versions.init_app
+        self.refresh_seconds = app.config.get('SEARCH_REFRESH_SECONDS', self.refresh_seconds)
+        self._versions = app.extensions.get('table_versions')
+        app.extensions['search_index'] = self
+
+    def _reset(self):
+        self._postings = {}        # term → (array ของ doc id, array ของ weighted tf)
+        self._terms = []           # term ที่เรียงแล้ว (ใช้ bisect หา prefix)
+        self._by_first = {}        # ตัวอักษรแรก → set ของคำ (ใช้หา fuzzy)
+        self._lengths = array('f')  # index ด้วย doc id, 0 = ไม่มีใน index
+        self._doc_count = 0
+        self._total_length = 0.0
+        self.max_id = 0
+        self.built = False
+        self.built_marker = None
+        self._checked_at = 0.0
+
+    def __len__(self):
+        return self._doc_count
+
+    def __contains__(self, doc_id):
+        return doc_id < len(self._lengths) and self._lengths[doc_id] > 0
+
+    # ---------- indexing ----------
+
+    def _add(self, doc_id, fields, sort_terms=True):
+        if doc_id in self:
+            return
+
+        frequencies = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length += weight
+
+        for term, tf in frequencies.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array('I'), array('f'))
+                if sort_terms:
+                    insort(self._terms, term)
+                else:
+                    self._terms.append(term)
+                if not _is_thai(term):
+                    self._by_first.setdefault(term[0], set()).add(term)
+            posting[0].append(doc_id)
+            posting[1].append(tf)
+
+        if doc_id >= len(self._lengths):
+            self._lengths.extend([0.0] * (doc_id + 1 - len(self._lengths)))
+        self._lengths[doc_id] = max(length, 1.0)
+        self._doc_count += 1
+        self._total_length += length
+        self.max_id = max(self.max_id, doc_id)
+
+    def add_profile(self, doc_id, fields):
+        # เรียกหลัง add_graduate commit แล้ว (ถ้ายังไม่ได้สร้าง index ก็ไม่ต้องทำอะไร)
+        with self._lock:
+            if self.built:
+                self._add(doc_id, fields)
+
+    def _load(self, session, model, after_id, sort_terms):
+        columns = [getattr(model, field) for field in FIELD_WEIGHTS]
+        stmt = (
+            select(model.id, *columns)
+            .where(model.id > after_id)
+            .order_by(model.id)
+            .execution_options(yield_per=BUILD_BATCH_SIZE)
+        )
+        count = 0
+        for row in session.execute(stmt):
+            self._add(row[0], dict(zip(FIELD_WEIGHTS, row[1:])), sort_terms)
+            count += 1
+        return count
+
+    def ensure_fresh(self, session, model):
+        now = time.monotonic()
+        if self.built and now - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if self.built and now - self._checked_at < self.refresh_seconds:
+                return
+            # อ่าน marker ก่อนโหลด: ถ้าเปลี่ยนระหว่างโหลดจะสร้างใหม่อีกรอบตอน refresh ถัดไป
+            marker = self._versions.get(REBUILD_MARKER)[0] if self._versions is not None else None
+            if not self.built or marker != self.built_marker:
+                self._reset()
+                self._load(session, model, 0, sort_terms=False)
+                self._terms.sort()
+                self.built = True
+                self.built_marker = marker
+            else:
+                self._load(session, model, max(self.max_id - REFRESH_OVERLAP, 0), sort_terms=True)
+            self._checked_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    # ---------- querying ----------
+
+    def _prefix_terms(self, prefix):
+        terms = self._terms
+        matches = []
+        for index in range(bisect_left(terms, prefix), len(terms)):
+            term = terms[index]
+            if not term.startswith(prefix):
+                break
+            if term != prefix and not _is_thai(term):
+                matches.append(term)
+        if len(matches) > MAX_EXPANSIONS:
+            matches.sort(key=lambda term: -len(self._postings[term][0]))
+            matches = matches[:MAX_EXPANSIONS]
+        return matches
+
+    def _fuzzy_terms(self, word):
+        limit = 1 if len(word) <= 5 else 2
+        candidates = self._by_first.get(word[0], ())
+        matches = [
+            term for term in candidates
+            if abs(len(term) - len(word)) <= limit and edit_distance(word, term, limit) <= limit
+        ]
+        if len(matches) > MAX_EXPANSIONS:
+            matches.sort(key=lambda term: -len(self._postings[term][0]))
+            matches = matches[:MAX_EXPANSIONS]
+        return matches
+
+    def _expand(self, word, prefix, fuzzy):
+        # คำจริงใน index ที่จะใช้แทนคำค้น พร้อมน้ำหนัก
+        expansions = []
+        if word in self._postings:
+            expansions.append((word, 1.0))
+        if prefix and len(word) >= MIN_PREFIX_LENGTH:
+            expansions.extend((term, PREFIX_WEIGHT) for term in self._prefix_terms(word))
+        if fuzzy and not expansions and len(word) >= MIN_FUZZY_LENGTH:
+            expansions.extend((term, FUZZY_WEIGHT) for term in self._fuzzy_terms(word))
+        return expansions
+
+    def _term_scores(self, term, weight, lengths, avg_length):
+        # คืนค่า (doc ids, คะแนน BM25) ของ term เป็น numpy array
+        # copy ออกมา (astype / arithmetic) เพื่อไม่ให้ค้าง buffer export ของ array ที่ยังต้องต่อท้ายได้
+        import numpy as np
+        doc_ids = np.frombuffer(self._postings[term][0], dtype=np.uint32).astype(np.intp)
+        tf = np.frombuffer(self._postings[term][1], dtype=np.float32).astype(np.float64)
+        df = len(doc_ids)
+        idf = math.log(1 + (self._doc_count - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_ids] / avg_length)
+        return doc_ids, weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def search(self, query, limit=20, offset=0, prefix=True, fuzzy=True):
+        # คืนค่า (จำนวนที่ match ทั้งหมด, list ของ (doc id, score) ของหน้าที่ขอ) เรียงจากคะแนนมากไปน้อย
+        groups = parse_query(query)
+        if not groups:
+            return 0, []
+
+        # import ตอนค้นหาครั้งแรก ไม่ให้ worker ทุกตัวเสียเวลา import numpy ตอน start
+        import numpy as np
+
+        with self._lock:
+            if not self._doc_count:
+                return 0, []
+            lengths = np.array(self._lengths, dtype=np.float64)
+            avg_length = self._total_length / self._doc_count or 1.0
+            totals = np.zeros(len(lengths), dtype=np.float64)
+            matched = np.zeros(len(lengths), dtype=np.int32)
+
+            for kind, terms in groups:
+                group = np.zeros(len(lengths), dtype=np.float64)
+                if kind == 'thai':
+                    # ต้องพบ bigram อย่างน้อย 75% ของคำไทยนั้น
+                    hits = np.zeros(len(lengths), dtype=np.int32)
+                    for term in terms:
+                        if term in self._postings:
+                            doc_ids, scores = self._term_scores(term, 1.0, lengths, avg_length)
+                            group[doc_ids] += scores
+                            hits[doc_ids] += 1
+                    group[hits < max(1, math.ceil(len(terms) * 0.75))] = 0
+                else:
+                    # คำเดียวกันที่ match หลายแบบ (exact / prefix / fuzzy) นับคะแนนที่ดีที่สุด
+                    for term, weight in self._expand(terms[0], prefix, fuzzy):
+                        doc_ids, scores = self._term_scores(term, weight, lengths, avg_length)
+                        group[doc_ids] = np.maximum(group[doc_ids], scores)
+
+                totals += group
+                matched += group > 0
+
+        # profile ที่ match ครบทุกคำได้คะแนนเต็ม, match บางคำ ("Google Thailand" กับ "Google") ได้ลดหลั่นลงไป
+        candidates = np.flatnonzero(matched)
+        scores = totals[candidates] * matched[candidates] / len(groups)
+        end = offset + limit
+        if end < len(candidates):
+            # เรียงเฉพาะส่วนที่ต้องใช้ ไม่ต้อง sort ทั้งหมด
+            top = np.argpartition(-scores, end - 1)[:end]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], -scores[top]))][offset:end]
+        return len(candidates), [(int(candidates[i]), float(scores[i])) for i in top]
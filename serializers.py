@@ -0,0 +1,98 @@
+import json
+from flask import Response
+from sqlalchemy import Date, select
+from models import StudentProfile, GraduateProfile
+
+# orjson เร็วกว่า json ของ stdlib หลายเท่า ถ้าไม่ได้ติดตั้งจะ fallback ไปใช้ json ปกติ
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _empty_to_none(value):
+    return value or None
+
+
+class ProfileSerializer:
+    # สร้าง dict จาก Core Row โดยตรง (ไม่ต้องสร้าง ORM object)
+    # mapping คอลัมน์ → key และตัวแปลงค่าถูกคำนวณครั้งเดียวตอนสร้าง serializer
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.keys = tuple(key for key, _ in fields)
+        self.columns = tuple(column for _, column in fields)
+        self.converters = {}
+        for key, column in fields:
+            if isinstance(column.type, Date):
+                self.converters[key] = _isoformat
+            elif key == 'profile_image':
+                self.converters[key] = _empty_to_none
+
+    def select(self):
+        # id อยู่คอลัมน์แรกเสมอ ใช้เป็น cursor ของ keyset pagination
+        return select(self.model.id, *self.columns)
+
+    def only(self, keys):
+        # serializer ที่มีเฉพาะบาง field ตามลำดับที่ขอ (ใช้กับ ?fields=)
+        columns = dict(zip(self.keys, self.columns))
+        return ProfileSerializer(self.model, [(key, columns[key]) for key in keys])
+
+    def to_dict(self, row, resolve_image=None):
+        result = dict(zip(self.keys, row[1:]))
+        for key, convert in self.converters.items():
+            value = result[key]
+            if value is not None:
+                result[key] = convert(value)
+        # แปลง URL รูปที่เก็บใน DB เป็น URL ที่ sign แล้ว / ขนาดที่ขอ
+        if resolve_image is not None and 'profile_image' in result:
+            result['profile_image'] = resolve_image(result['profile_image'])
+        return result
+
+    def to_list(self, rows, resolve_image=None):
+        return [self.to_dict(row, resolve_image) for row in rows]
+
+
+student_serializer = ProfileSerializer(StudentProfile, (
+    ("full_name", StudentProfile.full_name),
+    ("faculty", StudentProfile.faculty),
+    ("major", StudentProfile.major),
+    ("profile_image", StudentProfile.profile_image),
+    ("extracurricular_activities", StudentProfile.extracurricular_activities),
+    ("academic_projects", StudentProfile.academic_projects),
+))
+
+graduate_serializer = ProfileSerializer(GraduateProfile, (
+    ("full_name", GraduateProfile.full_name),
+    ("faculty", GraduateProfile.faculty),
+    ("major", GraduateProfile.major),
+    ("profile_image", GraduateProfile.profile_image),
+    ("extracurricular_activities", GraduateProfile.extracurricular_activities),
+    ("academic_projects", GraduateProfile.academic_projects),
+    ("internship_status", GraduateProfile.internship_status),
+    ("internship_company", GraduateProfile.internship_company),
+    ("internship_position", GraduateProfile.internship_position),
+    ("internship_duration", GraduateProfile.internship_duration),
+    ("internship_task", GraduateProfile.internship_task),
+    ("internship_experience", GraduateProfile.internship_experience),
+    ("career_status", GraduateProfile.career_status),
+    ("career_company", GraduateProfile.career_company),
+    ("career_position", GraduateProfile.career_position),
+    ("date_of_employment", GraduateProfile.date_of_employment),
+    ("career_task", GraduateProfile.career_task),
+    ("career_experience", GraduateProfile.career_experience),
+))
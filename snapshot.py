@@ -0,0 +1,305 @@
+import fcntl
+import json
+import os
+import sys
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Date, Float, Integer, select
+
+from extension import db
+from models import StudentProfile, GraduateProfile, AcademicRecord, CareerRecord
+
+# Snapshot แบบ columnar (Parquet หรือ Arrow IPC) ของ profile / record สำหรับงานวิเคราะห์ offline (pandas, DuckDB)
+# แทนการดึง /data/graduate-data เป็น JSON ซ้ำ ๆ ทั้งตาราง
+#
+#   <SNAPSHOT_DIR>/manifest.json
+#   <SNAPSHOT_DIR>/graduate_profiles/part-00000.parquet   ← รอบแรก (ทั้งตาราง)
+#   <SNAPSHOT_DIR>/graduate_profiles/part-00001.parquet   ← รอบถัดไป: เฉพาะแถวที่ยังไม่เคย export
+#
+#   pd.read_parquet('snapshots/graduate_profiles')   หรือ   pa.ipc.open_file(pa.memory_map(path)) สำหรับ .arrow
+#
+# - ตาราง profile เพิ่มแถวอย่างเดียว (ค่าที่แก้ภายหลังมีแค่ profile_image ซึ่งไม่ได้ export) จึง append ตาม primary key ได้
+#   identity ของ SQL Server อาจ commit ไม่เรียงลำดับ → อ่านย้อนหลังจาก id ล่าสุด SNAPSHOT_OVERLAP แถวทุกรอบ
+#   และข้าม id ในช่วงนั้นที่ export ไปแล้ว (เก็บไว้ใน recent_ids ของ manifest)
+#   ยกเว้น `flask add-lookup-alias` ที่ merge ชื่อใน graduate_profiles → เรียก mark_stale ให้รอบถัดไปเขียนใหม่ทั้งตาราง
+# - academic_records / career_records ถูกแก้ / ลบผ่าน /history (REWRITTEN_TABLES) → เขียนใหม่ทั้งตารางทุกรอบ
+# - ใช้ --full เพื่อเขียนใหม่ทุกตาราง
+# - เมื่อจำนวน part เกิน SNAPSHOT_MAX_PARTS จะเขียนใหม่ทั้งตารางเป็นไฟล์เดียว
+# - ไม่ export ข้อมูลติดต่อ / ระบุตัวตน (email, เบอร์โทร, วันเกิด, รหัสนักศึกษา, ชื่อ, รูป)
+# - คอลัมน์หมวดหมู่เก็บแบบ dictionary → pandas อ่านเป็น Categorical และไฟล์เล็กลงมาก
+
+SNAPSHOT_TABLES = {
+    'graduate_profiles': (GraduateProfile, (
+        'id', 'user_id', 'gender', 'faculty', 'major', 'year_of_enrollment', 'current_academic_year',
+        'extracurricular_activities', 'academic_projects',
+        'internship_status', 'internship_company', 'internship_position', 'internship_duration',
+        'internship_task', 'internship_experience',
+        'career_status', 'career_company', 'career_position', 'date_of_employment', 'career_task',
+        'career_experience',
+    )),
+    'student_profiles': (StudentProfile, (
+        'id', 'user_id', 'gender', 'faculty', 'major', 'year_of_enrollment', 'current_academic_year',
+        'extracurricular_activities', 'academic_projects',
+    )),
+    'academic_records': (AcademicRecord, (
+        'record_id', 'user_id', 'degree', 'institution', 'major', 'gpa', 'start_date', 'end_date',
+    )),
+    'career_records': (CareerRecord, (
+        'record_id', 'user_id', 'company', 'position', 'start_date', 'end_date',
+    )),
+}
+
+# ตารางที่แถวเดิมถูก UPDATE / DELETE ได้ (history.apply_timeline, /history/me/<kind>/<id>) → append ตาม id ไม่ได้
+REWRITTEN_TABLES = {'academic_records', 'career_records'}
+
+DICTIONARY_COLUMNS = {
+    'gender', 'faculty', 'major', 'current_academic_year', 'degree', 'institution', 'company', 'position',
+    'internship_status', 'internship_company', 'internship_position', 'internship_duration',
+    'career_status', 'career_company', 'career_position',
+}
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.lock'
+BATCH_SIZE = 10000
+SNAPSHOT_OVERLAP = 1000
+COMPRESSION = 'zstd'
+
+
+class SnapshotUnavailable(Exception):
+    # ไม่ได้ติดตั้ง pyarrow → route ควรตอบ 503
+    pass
+
+
+def _pyarrow():
+    # import ตอนใช้งาน: pyarrow ใหญ่ และ worker ส่วนใหญ่ไม่ต้องใช้
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise SnapshotUnavailable("Snapshot export requires the pyarrow package")
+    return pyarrow
+
+
+def snapshot_dir(app=None):
+    app = app or current_app
+    return app.config.get('SNAPSHOT_DIR') or os.path.join(app.instance_path, 'snapshots')
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+@contextmanager
+def _locked(directory):
+    # กันไม่ให้ CLI (cron) กับ POST /data/snapshots เขียนพร้อมกัน (รวมถึงข้าม worker / process)
+    with open(os.path.join(directory, LOCK_NAME), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _arrow_type(pa, name, column):
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def _schema(pa, model, names):
+    table = model.__table__
+    return pa.schema([pa.field(name, _arrow_type(pa, name, table.c[name])) for name in names])
+
+
+def _open_writer(pa, path, schema, fmt):
+    if fmt == 'parquet':
+        return pa.parquet.ParquetWriter(path, schema, compression=COMPRESSION)
+    return pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=COMPRESSION))
+
+
+def _export_rows(pa, model, names, after_id, path, fmt, skip=frozenset()):
+    # เขียนแถวที่ primary key > after_id และไม่อยู่ใน skip ลง path ทีละ BATCH_SIZE แถว (ไม่โหลดทั้งตารางเข้า memory)
+    # คืนค่า (จำนวนแถว, primary key สุดท้าย, primary key ท้าย ๆ ที่เขียน) ไม่สร้างไฟล์ถ้าไม่มีแถวใหม่
+    table = model.__table__
+    key = table.c[names[0]]
+    schema = _schema(pa, model, names)
+    stmt = (select(*(table.c[name] for name in names)).where(key > after_id).order_by(key)
+            .execution_options(yield_per=BATCH_SIZE))
+
+    writer = None
+    batches = []
+    rows = 0
+    last_id = after_id
+    # id เรียงจากน้อยไปมาก → id ที่อยู่ในช่วง SNAPSHOT_OVERLAP สุดท้ายมีไม่เกิน SNAPSHOT_OVERLAP ตัว
+    written = deque(maxlen=SNAPSHOT_OVERLAP)
+    try:
+        for partition in db.session.execute(stmt).partitions():
+            partition = [row for row in partition if row[0] not in skip]
+            if not partition:
+                continue
+            written.extend(row[0] for row in partition)
+            columns = list(zip(*partition))
+            batch = pa.record_batch([pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                                    schema=schema)
+            rows += len(partition)
+            last_id = partition[-1][0]
+            if fmt == 'arrow':
+                # Arrow IPC file ใช้ dictionary ได้ชุดเดียวต่อคอลัมน์ทั้งไฟล์ → รวมทุก batch แล้ว unify ก่อนเขียน
+                batches.append(batch)
+                continue
+            if writer is None:
+                writer = _open_writer(pa, path + '.tmp', schema, fmt)
+            writer.write_batch(batch)
+
+        if batches:
+            writer = _open_writer(pa, path + '.tmp', schema, fmt)
+            writer.write_table(pa.Table.from_batches(batches, schema).unify_dictionaries())
+    except Exception:
+        if writer is not None:
+            writer.close()
+            os.remove(path + '.tmp')
+        raise
+
+    if writer is not None:
+        writer.close()
+        os.replace(path + '.tmp', path)
+    return rows, last_id, written
+
+
+def _recent_ids(model, names, entry):
+    # id ในช่วง SNAPSHOT_OVERLAP สุดท้ายที่ export ไปแล้ว
+    if 'recent_ids' in entry:
+        return set(entry['recent_ids'])
+    # manifest ที่เขียนก่อนมี recent_ids: แถวที่ id ไม่เกิน last_id ถือว่า export ไปแล้ว
+    key = model.__table__.c[names[0]]
+    return set(db.session.scalars(
+        select(key).where(key > entry['last_id'] - SNAPSHOT_OVERLAP, key <= entry['last_id'])))
+
+
+def write_snapshot(directory, fmt='parquet', full=False, max_parts=24):
+    # เพิ่มแถวใหม่ของทุกตารางลง snapshot (หรือเขียนใหม่ทั้งหมดเมื่อ full / ยังไม่มี / เปลี่ยน format / part เยอะเกิน)
+    # คืนค่า manifest ใหม่
+    pa = _pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    os.makedirs(directory, exist_ok=True)
+
+    with _locked(directory):
+        manifest = load_manifest(directory) or {}
+        if manifest.get('format') != fmt:
+            full = True
+        tables = dict(manifest.get('tables', {}))
+        obsolete = []
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+        for name, (model, names) in SNAPSHOT_TABLES.items():
+            entry = tables.get(name)
+            if (full or entry is None or name in REWRITTEN_TABLES or entry.get('stale')
+                    or entry.get('columns') != list(names) or len(entry['parts']) >= max_parts):
+                obsolete.extend(part['file'] for part in (entry or {}).get('parts', []))
+                # เลข part เดินต่อจากเดิม → ไม่เขียนทับไฟล์ที่ manifest เดิมยังอ้างถึง
+                entry = {'columns': list(names), 'rows': 0, 'last_id': 0, 'recent_ids': [], 'parts': [],
+                         'sequence': (entry or {}).get('sequence', 0)}
+
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+            file_name = f"{name}/part-{entry['sequence']:05d}{FORMATS[fmt]}"
+            recent = _recent_ids(model, names, entry)
+            rows, last_id, written = _export_rows(pa, model, names, max(entry['last_id'] - SNAPSHOT_OVERLAP, 0),
+                                                  os.path.join(directory, file_name), fmt, recent)
+            last_id = max(last_id, entry['last_id'])
+            entry = dict(entry, recent_ids=sorted(key for key in recent.union(written)
+                                                  if key > last_id - SNAPSHOT_OVERLAP))
+            if rows:
+                entry = dict(entry, rows=entry['rows'] + rows, last_id=last_id, sequence=entry['sequence'] + 1,
+                             parts=entry['parts'] + [{
+                                 'file': file_name,
+                                 'rows': rows,
+                                 'last_id': last_id,
+                                 'bytes': os.path.getsize(os.path.join(directory, file_name)),
+                                 'created_at': now,
+                             }])
+            entry['updated_at'] = now
+            tables[name] = entry
+
+        db.session.rollback()
+        manifest = {'format': fmt, 'updated_at': now, 'tables': tables}
+        _write_manifest(directory, manifest)
+
+        # ลบไฟล์เก่าหลังเขียน manifest ใหม่แล้ว (คนที่กำลังอ่าน manifest เดิมยังโหลดไฟล์เดิมได้จนถึงจุดนี้)
+        current = {part['file'] for entry in tables.values() for part in entry['parts']}
+        for file_name in obsolete:
+            if file_name not in current:
+                try:
+                    os.remove(os.path.join(directory, file_name))
+                except FileNotFoundError:
+                    pass
+
+    return manifest
+
+
+def mark_stale(directory, *names):
+    # แถวเดิมของตารางเหล่านี้ถูกแก้ → export รอบถัดไปเขียนใหม่ทั้งตาราง (ไม่มี snapshot ก็ไม่ต้องทำอะไร)
+    if load_manifest(directory) is None:
+        return
+    with _locked(directory):
+        manifest = load_manifest(directory)
+        for name in names:
+            if name in manifest['tables']:
+                manifest['tables'][name]['stale'] = True
+        _write_manifest(directory, manifest)
+
+
+def snapshot_file(manifest, path):
+    # path ต้องเป็นไฟล์ที่อยู่ใน manifest เท่านั้น (ไม่ให้ดาวน์โหลดไฟล์อื่นใน directory)
+    if manifest is None:
+        return None
+    for entry in manifest['tables'].values():
+        for part in entry['parts']:
+            if part['file'] == path:
+                return part
+    return None
+
+
+@click.command('export-snapshot')
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), help="Default: SNAPSHOT_FORMAT")
+@click.option('--full', is_flag=True, help="Rewrite every table instead of appending new rows")
+@click.option('--dir', 'directory', type=click.Path(file_okay=False), help="Default: SNAPSHOT_DIR")
+@with_appcontext
+def export_snapshot_command(fmt, full, directory):
+    """Write Parquet/Arrow snapshots of profiles and records for offline analytics."""
+    directory = directory or snapshot_dir()
+    try:
+        manifest = write_snapshot(directory, fmt or current_app.config.get('SNAPSHOT_FORMAT', 'parquet'), full,
+                                  current_app.config.get('SNAPSHOT_MAX_PARTS', 24))
+    except SnapshotUnavailable as e:
+        click.echo(str(e), file=sys.stderr)
+        sys.exit(1)
+
+    for name, entry in manifest['tables'].items():
+        size = sum(part['bytes'] for part in entry['parts'])
+        click.echo(f"{name}: rows={entry['rows']} parts={len(entry['parts'])} bytes={size}")
+    click.echo(f"manifest: {os.path.join(directory, MANIFEST_NAME)}")
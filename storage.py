@@ -0,0 +1,442 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from urllib.parse import quote, unquote
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import update
+
+from cache import MemoryCache
+from instrumentation import BLOB_DURATION, timed
+
+# Pillow ใช้สร้างรูปย่อ ถ้าไม่ได้ติดตั้งจะอัปโหลดเฉพาะรูปต้นฉบับ
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# ตรวจชนิดไฟล์จาก magic bytes แทนการเชื่อนามสกุลไฟล์
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'GIF87a', 'gif', 'image/gif'),
+    (b'GIF89a', 'gif', 'image/gif'),
+)
+
+# ชื่อ variant → ขนาดด้านยาวสุด (px)
+IMAGE_VARIANTS = {
+    'thumb': 128,
+    'medium': 512,
+}
+
+
+def sniff_image_bytes(head):
+    # คืนค่า (extension, content_type) หรือ None ถ้าไม่ใช่รูปที่รองรับ
+    for signature, extension, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension, content_type
+    return None
+
+
+def sniff_image_type(stream):
+    head = stream.read(16)
+    stream.seek(0)
+    image_type = sniff_image_bytes(head)
+    if image_type is None or not verify_image(stream):
+        return None
+    return image_type
+
+
+def verify_image(stream):
+    # magic bytes ถูกต้องแต่เนื้อไฟล์เสีย → ปฏิเสธตั้งแต่ตอนรับไฟล์ (ไม่ใช่ไปพังตอนสร้าง variant)
+    if Image is None:
+        return True
+    try:
+        with Image.open(stream) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+    finally:
+        stream.seek(0)
+
+
+def extension_for(content_type):
+    for _, extension, known_type in IMAGE_SIGNATURES:
+        if known_type == content_type:
+            return extension
+    return None
+
+
+def variant_name(blob_name, variant):
+    # "abc.png" → "abc_thumb.jpg"
+    return f"{blob_name.rsplit('.', 1)[0]}_{variant}.jpg"
+
+
+class AzureBlobStorage:
+
+    def __init__(self, connection_string, container, cdn_base_url=None):
+        self.connection_string = connection_string
+        self.container = container
+        self.cdn_base_url = cdn_base_url.rstrip('/') if cdn_base_url else None
+        self._client = None
+        self._pid = None
+        self._async_client = None
+        self._async_loop = None
+
+    @property
+    def client(self):
+        # สร้าง client ครั้งแรกที่ใช้งานในแต่ละ process: ไม่ import Azure SDK ตอน start
+        # และ worker ที่ fork มาจาก gunicorn --preload ไม่ใช้ connection pool (socket) ร่วมกับ master
+        pid = os.getpid()
+        if self._client is None or self._pid != pid:
+            from azure.storage.blob import BlobServiceClient
+            # อัปโหลดเป็น block ละ CHUNK_SIZE แทนการอ่านทั้งไฟล์เข้า memory แล้ว put ครั้งเดียว
+            self._client = BlobServiceClient.from_connection_string(
+                self.connection_string,
+                max_single_put_size=CHUNK_SIZE,
+                max_block_size=CHUNK_SIZE,
+            )
+            self._pid = pid
+        return self._client
+
+    def upload(self, name, stream, content_type, length=None):
+        from azure.storage.blob import ContentSettings
+        blob_client = self.client.get_blob_client(container=self.container, blob=name)
+        blob_client.upload_blob(
+            stream,
+            length=length,
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type),
+        )
+        return blob_client.url
+
+    @property
+    def async_client(self):
+        # client แบบ asyncio (aiohttp) สำหรับ async view ผูกกับ event loop ที่สร้าง → สร้างใหม่ต่อ loop / process
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            from azure.storage.blob.aio import BlobServiceClient
+            self._async_client = BlobServiceClient.from_connection_string(
+                self.connection_string,
+                max_single_put_size=CHUNK_SIZE,
+                max_block_size=CHUNK_SIZE,
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def upload_async(self, name, data, content_type):
+        from azure.storage.blob import ContentSettings
+        blob_client = self.async_client.get_blob_client(container=self.container, blob=name)
+        await blob_client.upload_blob(
+            data,
+            length=len(data),
+            overwrite=True,
+            content_settings=ContentSettings(content_type=content_type),
+        )
+        return blob_client.url
+
+    def url(self, name):
+        return self.client.get_blob_client(container=self.container, blob=name).url
+
+    def name_from_url(self, url):
+        prefix = f"{self.client.url.rstrip('/')}/{self.container}/"
+        if url.startswith(prefix):
+            return unquote(url[len(prefix):].split('?', 1)[0])
+        return None
+
+    def _sas(self, name, permission, expires_in):
+        from azure.storage.blob import generate_blob_sas
+        account_key = getattr(self.client.credential, 'account_key', None)
+        if not account_key:
+            return None
+        return generate_blob_sas(
+            account_name=self.client.account_name,
+            container_name=self.container,
+            blob_name=name,
+            account_key=account_key,
+            permission=permission,
+            expiry=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        )
+
+    def upload_url(self, name, content_type, expires_in):
+        # SAS แบบ create/write สำหรับ blob เดียว → browser PUT ไฟล์ตรงไปที่ storage
+        from azure.storage.blob import BlobSasPermissions
+        sas = self._sas(name, BlobSasPermissions(create=True, write=True), expires_in)
+        if sas is None:
+            raise RuntimeError("Direct uploads require a storage account key")
+        return {
+            "url": f"{self.url(name)}?{sas}",
+            "method": "PUT",
+            "headers": {"x-ms-blob-type": "BlockBlob", "Content-Type": content_type},
+        }
+
+    def signed_url(self, name, expires_in):
+        from azure.storage.blob import BlobSasPermissions
+        url = f"{self.cdn_base_url}/{quote(name)}" if self.cdn_base_url else self.url(name)
+        sas = self._sas(name, BlobSasPermissions(read=True), expires_in)
+        return f"{url}?{sas}" if sas else url
+
+    def read_head(self, name, length):
+        from azure.core.exceptions import ResourceNotFoundError
+        blob_client = self.client.get_blob_client(container=self.container, blob=name)
+        try:
+            return blob_client.download_blob(offset=0, length=length).readall()
+        except ResourceNotFoundError:
+            return None
+
+    def download(self, name, fileobj):
+        blob_client = self.client.get_blob_client(container=self.container, blob=name)
+        blob_client.download_blob().readinto(fileobj)
+
+
+class FileSystemStorage:
+    # ใช้แทน Azure Blob ตอน development / ทดสอบ (interface เดียวกัน)
+    # upload token แบบ SAS จำลองด้วย itsdangerous
+
+    def __init__(self, root, base_url, secret_key='local-blob'):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        self.signer = URLSafeTimedSerializer(secret_key, salt='local-blob-upload')
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def upload(self, name, stream, content_type, length=None):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path(name), 'wb') as f:
+            shutil.copyfileobj(stream, f, CHUNK_SIZE)
+        return self.url(name)
+
+    async def upload_async(self, name, data, content_type):
+        return await asyncio.to_thread(self.upload, name, BytesIO(data), content_type, len(data))
+
+    def url(self, name):
+        return f"{self.base_url}/{name}"
+
+    def name_from_url(self, url):
+        prefix = self.base_url + '/'
+        if url.startswith(prefix):
+            return unquote(url[len(prefix):].split('?', 1)[0])
+        return None
+
+    def upload_url(self, name, content_type, expires_in):
+        token = self.signer.dumps(name)
+        return {
+            "url": f"{self.url(name)}?token={token}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+    def verify_upload_token(self, name, token, max_age):
+        try:
+            return self.signer.loads(token, max_age=max_age) == name
+        except BadSignature:
+            return False
+
+    def signed_url(self, name, expires_in):
+        return self.url(name)
+
+    def read_head(self, name, length):
+        try:
+            with open(self.path(name), 'rb') as f:
+                return f.read(length)
+        except FileNotFoundError:
+            return None
+
+    def download(self, name, fileobj):
+        with open(self.path(name), 'rb') as f:
+            shutil.copyfileobj(f, fileobj, CHUNK_SIZE)
+
+
+class ImageUploads:
+    # รับไฟล์จาก request → spool ลง temp file → อัปโหลด + สร้าง variant ใน background
+    # แล้วค่อยอัปเดต profile_image ของ profile เมื่ออัปโหลดเสร็จ
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self.workers = 2
+        self.upload_url_ttl = 600
+        self.image_url_ttl = 3600
+        self._urls = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('UPLOAD_WORKERS', self.workers)
+        self.upload_url_ttl = app.config.get('IMAGE_UPLOAD_URL_TTL', self.upload_url_ttl)
+        self.image_url_ttl = app.config.get('IMAGE_URL_TTL', self.image_url_ttl)
+        # cache URL ที่ sign แล้วไว้ครึ่งหนึ่งของอายุ SAS เพื่อไม่ต้อง sign ใหม่ทุกแถว
+        self._urls = MemoryCache(max_entries=app.config.get('IMAGE_URL_CACHE_SIZE', 10000),
+                                 default_ttl=self.image_url_ttl // 2)
+
+        backend = app.config.get('STORAGE_BACKEND', 'azure')
+        if backend == 'azure':
+            self.backend = AzureBlobStorage(
+                app.config['AZURE_STORAGE_CONNECTION_STRING'],
+                app.config.get('STORAGE_CONTAINER', 'profilepic'),
+                app.config.get('IMAGE_CDN_BASE_URL'),
+            )
+        elif backend == 'filesystem':
+            self.backend = FileSystemStorage(
+                app.config.get('STORAGE_LOCAL_PATH') or os.path.join(app.instance_path, 'blobs'),
+                app.config.get('STORAGE_LOCAL_URL', '/data/local-blob'),
+                app.config.get('JWT_SECRET_KEY') or 'local-blob',
+            )
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+        app.extensions['uploads'] = self
+
+    def _get_executor(self):
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='upload')
+                    self._pid = pid
+        return self._executor
+
+    def submit(self, file, image_type, model, profile_id):
+        extension, content_type = image_type
+        blob_name = f"{uuid.uuid4().hex}.{extension}"
+
+        # stream ของ request จะถูกปิดเมื่อ request จบ จึง copy ลง temp file ทีละ chunk ก่อน
+        spool = tempfile.NamedTemporaryFile(prefix='upload-', delete=False)
+        with spool:
+            shutil.copyfileobj(file.stream, spool, CHUNK_SIZE)
+
+        return self._get_executor().submit(
+            self._process, spool.name, blob_name, content_type, model, profile_id
+        )
+
+    async def upload_async(self, data, image_type):
+        # อัปโหลดรูปต้นฉบับแบบ async (ใช้ใน async view ให้ทำพร้อมกับงาน DB ได้) แล้วสร้าง variant ใน background
+        # คืนค่า URL ที่เก็บใน profile_image
+        extension, content_type = image_type
+        blob_name = f"{uuid.uuid4().hex}.{extension}"
+        with timed(BLOB_DURATION, 'blob', operation='upload'):
+            url = await self.backend.upload_async(blob_name, data, content_type)
+        self.submit_variants(blob_name, data)
+        return url
+
+    def create_upload(self, user_id, content_type):
+        extension = extension_for(content_type)
+        if extension is None:
+            return None
+        blob_name = f"u{user_id}_{uuid.uuid4().hex}.{extension}"
+        upload = self.backend.upload_url(blob_name, content_type, self.upload_url_ttl)
+        upload["blob_name"] = blob_name
+        upload["expires_in"] = self.upload_url_ttl
+        return upload
+
+    def owns_blob(self, user_id, blob_name):
+        return blob_name.startswith(f"u{user_id}_") and '/' not in blob_name
+
+    def verify_uploaded(self, blob_name):
+        # อ่านแค่ header ของไฟล์ที่ browser อัปโหลดมาเพื่อตรวจ magic bytes
+        with timed(BLOB_DURATION, 'blob', operation='read_head'):
+            head = self.backend.read_head(blob_name, 16)
+        return sniff_image_bytes(head) if head else None
+
+    def submit_variants(self, blob_name, data=None):
+        # data: bytes ของรูปต้นฉบับถ้ามีอยู่แล้ว (ไม่ต้องดาวน์โหลดกลับมาจาก storage)
+        return self._get_executor().submit(self._process_variants, blob_name, data)
+
+    def _process_variants(self, blob_name, data=None):
+        if data is not None:
+            try:
+                self._upload_variants(BytesIO(data), blob_name)
+            except Exception:
+                logger.exception("Generating image variants failed for %s", blob_name)
+                raise
+            return
+
+        spool = tempfile.NamedTemporaryFile(prefix='variant-', delete=False)
+        try:
+            with spool, timed(BLOB_DURATION, 'blob', operation='download'):
+                self.backend.download(blob_name, spool)
+            self._upload_variants(spool.name, blob_name)
+        except Exception:
+            logger.exception("Generating image variants failed for %s", blob_name)
+            raise
+        finally:
+            os.unlink(spool.name)
+
+    def resolve_url(self, stored_url, size=None):
+        # URL ที่เก็บใน DB → URL ที่ sign แล้ว (ผ่าน CDN ถ้าตั้งค่าไว้) ตามขนาดที่ขอ
+        if not stored_url:
+            return None
+
+        key = f"{size or 'original'}:{stored_url}"
+        url = self._urls.get(key)
+        if url is None:
+            blob_name = self.backend.name_from_url(stored_url)
+            if blob_name is None:
+                return stored_url
+            if size in IMAGE_VARIANTS:
+                blob_name = variant_name(blob_name, size)
+            url = self.backend.signed_url(blob_name, self.image_url_ttl)
+            self._urls.set(key, url)
+        return url
+
+    def _process(self, path, blob_name, content_type, model, profile_id):
+        db = self.app.extensions['sqlalchemy']
+
+        try:
+            with open(path, 'rb') as f, timed(BLOB_DURATION, 'blob', operation='upload'):
+                url = self.backend.upload(blob_name, f, content_type, length=os.path.getsize(path))
+
+            # บันทึก URL ก่อนสร้าง variant → variant ที่สร้างไม่ได้ไม่ทำให้รูปต้นฉบับค้างโดยไม่มี profile อ้างถึง
+            with self.app.app_context():
+                db.session.execute(update(model).where(model.id == profile_id).values(profile_image=url))
+                db.session.commit()
+        except Exception:
+            logger.exception("Profile image upload failed for %s %s", model.__tablename__, profile_id)
+            os.unlink(path)
+            raise
+
+        try:
+            self._upload_variants(path, blob_name)
+        except Exception:
+            logger.exception("Generating image variants failed for %s", blob_name)
+        finally:
+            os.unlink(path)
+        return url
+
+    def _upload_variants(self, path, blob_name):
+        if Image is None:
+            return
+
+        with Image.open(path) as image:
+            image = image.convert('RGB')
+            for variant, size in IMAGE_VARIANTS.items():
+                resized = image.copy()
+                resized.thumbnail((size, size))
+                buffer = BytesIO()
+                resized.save(buffer, 'JPEG', quality=85, optimize=True)
+                buffer.seek(0)
+                with timed(BLOB_DURATION, 'blob', operation='upload_variant'):
+                    self.backend.upload(variant_name(blob_name, variant), buffer, 'image/jpeg',
+                                        length=buffer.getbuffer().nbytes)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None